@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor string can't be decoded"""
+
+
+def encode_cursor(created_at, pk):
+    """
+    Build an opaque cursor from the (created_at, id) of the last row on a page
+    """
+    raw = json.dumps({"c": created_at.isoformat(), "i": pk})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Reverse of encode_cursor -> (created_at, id)
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return datetime.fromisoformat(data["c"]), int(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Invalid cursor.")
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """
+    Read ?page_size= and clamp it between 1 and maximum
+    """
+    try:
+        page_size = int(request.query_params.get("page_size", default))
+    except (TypeError, ValueError):
+        page_size = default
+    return max(1, min(page_size, maximum))
+
+
+def keyset_paginate(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, field="created_at"):
+    """
+    Newest-first keyset pagination on (field, id).
+
+    Returns (rows, next_cursor). next_cursor is None on the last page.
+    Seeks past the cursor with an index-friendly WHERE instead of OFFSET,
+    so deep pages cost the same as the first one.
+    """
+    queryset = queryset.order_by(f"-{field}", "-id")
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f"{field}__lt": last_value}) |
+            Q(**{field: last_value, "id__lt": last_id})
+        )
+
+    # Fetch one extra row to know if there is a next page
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+
+    return rows, next_cursor
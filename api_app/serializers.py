@@ -1,17 +1,18 @@
 # serializers.py
 from rest_framework import serializers
-from logistics_app.models import CustomUser, PhoneOTP, TDSRate
+from logistics_app.models import CustomUser, PhoneOTP
 from django.contrib.auth.hashers import make_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import authenticate
 import uuid
 from logistics_app.models import VehicleType, Vehicle, Driver, Load, LoadRequest, TripComment, HoldingCharge, Payment
+from logistics_app.comment_reads import is_read_for
+from logistics_app import reference_data
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import password_validation
 from decimal import Decimal
 import pytz
 from django.utils import timezone
-from django.db.models import Sum
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -293,6 +294,10 @@ class LoadDetailsSerializer(serializers.ModelSerializer):
         if not vendor:
             return None
 
+        # Annotated by get_all_loads, avoids one query per load
+        if hasattr(obj, "vendor_request_status"):
+            return obj.vendor_request_status
+
         req = obj.requests.filter(vendor=vendor).first()
         if req:
             return req.status  # pending / accepted / rejected
@@ -340,6 +345,7 @@ class VehicleSerializer(serializers.ModelSerializer):
 
 class TripCommentSerializer(serializers.ModelSerializer):
     sender_name = serializers.CharField(source='sender.full_name', read_only=True)
+    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = TripComment
@@ -349,6 +355,14 @@ class TripCommentSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['sender', 'sender_type', 'created_at', 'is_read']
 
+    def get_is_read(self, obj):
+        # Per viewer: context carries the user and their {load_id: last_read_comment_id}
+        user = self.context.get('user')
+        if user is None:
+            return False
+        read_cursors = self.context.get('read_cursors', {})
+        return is_read_for(obj, user.id, read_cursors.get(obj.load_id, 0))
+
 class PaymentSerializer(serializers.ModelSerializer):
     recorded_by_name = serializers.CharField(source='recorded_by.full_name', read_only=True)
     recorded_by_phone = serializers.CharField(source='recorded_by.phone_number', read_only=True, allow_null=True)
@@ -507,7 +521,7 @@ class VendorTripDetailsSerializer(serializers.ModelSerializer):
         ]
     def get_tds_percentage(self, obj):
         """
-        If apply_tds is true → fetch value from TDSRate table
+        If apply_tds is true → the configured TDS rate (cached, see reference_data)
         If false → return default 2%
         """
         DEFAULT_TDS = 2.00
@@ -515,8 +529,7 @@ class VendorTripDetailsSerializer(serializers.ModelSerializer):
         if not obj.apply_tds:
             return DEFAULT_TDS
     
-        tds = TDSRate.objects.first()
-        return float(tds.rate) if tds else DEFAULT_TDS
+        return float(reference_data.tds_rate())
     
     def get_pod_received_at(self, obj):
         if not obj.pod_received_at:
@@ -592,9 +605,8 @@ class VendorTripDetailsSerializer(serializers.ModelSerializer):
         return serializer.data
     
     def get_total_amount_paid(self, obj):
-        """Calculate total amount paid for this load"""
-        total = obj.payments.aggregate(total=Sum('amount_paid'))['total']
-        return float(total) if total else 0.0
+        """Total amount paid for this load (maintained total_paid column)"""
+        return float(obj.total_paid)
     
 
 class LRUploadSerializer(serializers.ModelSerializer):
@@ -713,9 +725,16 @@ class VendorProfileUpdateSerializer(serializers.Serializer):
 
 
 
+class LocationOptionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+
+
 class LoadFilterOptionsSerializer(serializers.Serializer):
     locations = serializers.ListField(child=serializers.CharField())
     destinations = serializers.ListField(child=serializers.CharField())
+    pickup_places = LocationOptionSerializer(many=True)
+    drop_places = LocationOptionSerializer(many=True)
     vehicle_types = serializers.ListField(child=serializers.CharField())
     load_capacities = serializers.ListField(child=serializers.CharField())
 
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from django.core import signing
+from django.utils import timezone
+
+SYNC_TOKEN_SALT = "api_app.sync"
+
+# Tombstones older than this are pruned, so older tokens need a full resync
+TOMBSTONE_RETENTION_DAYS = 30
+
+# Re-scan a few seconds before the token so rows committed by slower
+# transactions aren't missed. Clients upsert by id, duplicates are harmless.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Above this many changed rows in one section, tell the client to resync
+MAX_SYNC_ROWS = 500
+
+
+class InvalidSyncToken(ValueError):
+    """Raised when a sync token is tampered with or malformed"""
+
+
+def make_sync_token(issued_at=None):
+    """
+    Opaque, signed token carrying the server time the sync was taken at
+    """
+    issued_at = issued_at or timezone.now()
+    return signing.dumps({"t": issued_at.isoformat()}, salt=SYNC_TOKEN_SALT, compress=True)
+
+
+def read_sync_token(token):
+    """
+    Reverse of make_sync_token -> datetime the token was issued at
+    """
+    try:
+        data = signing.loads(token, salt=SYNC_TOKEN_SALT)
+        return datetime.fromisoformat(data["t"])
+    except (signing.BadSignature, ValueError, KeyError, TypeError):
+        raise InvalidSyncToken("Invalid sync token.")
+
+
+def is_token_expired(issued_at):
+    """
+    True if tombstones from that point may already have been pruned
+    """
+    return issued_at < timezone.now() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
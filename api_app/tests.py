@@ -1,3 +1,84 @@
+from datetime import date
+
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from logistics_app.models import CustomUser, Customer, Load, VehicleType
+
+
+class FilteredLoadsViewTests(TestCase):
+    """Query parameter validation of GET /api/loads/filtered/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = CustomUser.objects.create_user(
+            email='filter@example.com', full_name='Filter Vendor', phone_number='9700000000', role='vendor'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.vendor)
+
+    def _get(self, params):
+        return self.client.get(reverse('filtered-loads'), params)
+
+    def test_bad_match(self):
+        response = self._get({'from_location': 'Mumbai', 'match': 'regex'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.data['status'])
+        self.assertIn('contains, fuzzy', response.data['message'])
+
+    def test_non_integer_location_id(self):
+        for param in ('from_location_id', 'to_location_id'):
+            with self.subTest(param=param):
+                response = self._get({param: 'mumbai'})
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.data['status'])
+
+    def test_valid_params(self):
+        response = self._get({'from_location_id': '1', 'match': 'fuzzy'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['filters_applied']['from_location_id'], [1])
+        self.assertEqual(response.data['data']['total_count'], 0)
+
+
+class UpdateTripCurrentLocationTests(TestCase):
+    """PATCH /api/trips/<trip_id>/location/ reports rejected pings"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='location@example.com', full_name='Location User', phone_number='9710000000', role='vendor'
+        )
+        cls.load = Load.objects.create(
+            load_id='LOCATION1', customer=Customer.objects.create(customer_name='Location', phone_number='9710000001'),
+            vehicle_type=VehicleType.objects.create(name='14 FT'), pickup_location='Pune', drop_location='Mumbai',
+            pickup_date=date(2025, 1, 1)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _patch(self, trip_id, current_location):
+        return self.client.patch(
+            reverse('update_trip_current_location', args=[trip_id]), {'current_location': current_location},
+            format='json'
+        )
+
+    def test_updated(self):
+        response = self._patch(self.load.id, 'Lonavala')
+        self.assertEqual(response.status_code, 200)
+        self.load.refresh_from_db()
+        self.assertEqual(self.load.current_location, 'Lonavala')
+
+    def test_invalid_location(self):
+        response = self._patch(self.load.id, 'x' * 256)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'location is too long')
+        self.load.refresh_from_db()
+        self.assertIsNone(self.load.current_location)
 
-# Create your tests here.
+    def test_trip_not_found(self):
+        self.assertEqual(self._patch(self.load.id + 1000, 'Lonavala').status_code, 404)
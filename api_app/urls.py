@@ -46,6 +46,13 @@ urlpatterns = [
     path('api/notifications/',UserNotificationsView.as_view(), name='user_notifications'),
     
     path('api/notifications/<int:notification_id>/mark-read/', MarkNotificationReadView.as_view(), name='mark_notification_read'),
+
+    path('api/notifications/mark-all-read/', MarkAllNotificationsReadView.as_view(), name='mark_all_notifications_read'),
+
+    path('api/notifications/badge/', NotificationBadgeView.as_view(), name='notification_badge'),
+
+    # Incremental sync for the mobile app
+    path('sync/', VendorSyncView.as_view(), name='vendor-sync'),
     path('logout/', LogoutView.as_view(),name='LogoutView'),
 
 
@@ -57,6 +64,7 @@ urlpatterns = [
         UpdateTripCurrentLocationAPIView.as_view(),
         name='update_trip_current_location'
     ),
+    path('trips/location/pings/', TripLocationPingBatchView.as_view(), name='trip-location-pings'),
 
     path('forgot-password/request/', views.forgot_password_request, name='forgot-password-request'),
     path('forgot-password/verify-otp/', views.verify_otp_forgot_password, name='verify-otp-forgot-password'),
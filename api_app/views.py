@@ -15,12 +15,16 @@ from rest_framework.permissions import AllowAny
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Q, Sum
+from django.db.models import Q, Sum, Count, OuterRef, Subquery, FilteredRelation, Exists, Prefetch
 from logistics_app.models import PhoneOTP
 from .utils import generate_otp,send_otp_fast2sms
 from django.db import transaction
-from logistics_app.models import TDSRate
-from decimal import Decimal
+from .pagination import keyset_paginate, get_page_size, InvalidCursor
+from .sync import make_sync_token, read_sync_token, is_token_expired, InvalidSyncToken, SYNC_OVERLAP, MAX_SYNC_ROWS
+from logistics_app.models import Notification, SyncTombstone
+from logistics_app import kpis, comment_reads, location_search, filter_options, reference_data, trip_etags, trip_history
+from logistics_app.notifications import mark_notifications_read
+from logistics_app.locations import ingest_location_pings, MAX_PINGS_PER_BATCH, TRIP_NOT_FOUND
 
 # send OTP
 class SendOTPAPIView(APIView):
@@ -177,7 +181,7 @@ class LoginView(APIView):
 @method_decorator(csrf_exempt, name='dispatch')  
 class VehicleTypeListView(APIView):
     def get(self,request):
-        types = VehicleType.objects.all().order_by('name')
+        types = reference_data.vehicle_types()
         serializer = VehicleTypeSerializer(types, many=True)
         return Response({
             'status': True,
@@ -249,16 +253,49 @@ class AddDriverView(APIView):
 @permission_classes([IsAuthenticated])
 def get_all_loads(request):
     # Exclude loads that already have any accepted LoadRequest
-    loads = Load.objects.exclude(requests__status='accepted').order_by('-created_at')   # fetch all
-    try:
-        tds_rate = TDSRate.objects.first()
-        default_tds_percentage = tds_rate.rate if tds_rate else Decimal('2.00')
-    except:
-        default_tds_percentage = Decimal('2.00')
+    # Vendor's own request status is resolved for all rows in one subquery
+    # (read by LoadDetailsSerializer.get_request_status)
+    vendor_request_status = LoadRequest.objects.filter(
+        load=OuterRef('pk'),
+        vendor=request.user
+    ).order_by('id').values('status')[:1]
+
+    loads = (
+        Load.objects.exclude(requests__status='accepted')
+        .select_related('created_by', 'vehicle_type')
+        .annotate(vendor_request_status=Subquery(vendor_request_status))
+        .order_by('-created_at')
+    )
+    default_tds_percentage = reference_data.tds_rate()
+    context = {"vendor": request.user, "default_tds_percentage": default_tds_percentage}  # Pass vendor context
+
+    # Feed mode: ?cursor=<opaque>&page_size=<n>, keyset on (created_at, id)
+    if 'cursor' in request.query_params or 'page_size' in request.query_params:
+        try:
+            page, next_cursor = keyset_paginate(
+                loads,
+                cursor=request.query_params.get('cursor') or None,
+                page_size=get_page_size(request)
+            )
+        except InvalidCursor:
+            return Response({
+                "status": False,
+                "message": "Invalid cursor."
+            }, status=400)
+
+        serializer = LoadDetailsSerializer(page, many=True, context=context)
+        return Response({
+            "status": True,
+            "message": "Loads fetched successfully.",
+            "data": serializer.data,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }, status=200)
+
     serializer = LoadDetailsSerializer(
         loads, 
         many=True,
-        context={"vendor": request.user,"default_tds_percentage": default_tds_percentage }  # Pass vendor context
+        context=context
     )
 
     return Response({
@@ -434,7 +471,7 @@ class SendTripMessage(APIView):
             comment=comment_text
         )
 
-        serializer = TripCommentSerializer(comment_obj)
+        serializer = TripCommentSerializer(comment_obj, context={"user": request.user})
         return Response(
             {"message": "Message sent", "data": serializer.data},
             status=status.HTTP_201_CREATED
@@ -447,9 +484,18 @@ class LoadAllMessages(APIView):
     def get(self, request, load_id):
         load = get_object_or_404(Load, id=load_id)
 
-        messages = TripComment.objects.filter(load=load).order_by("created_at")
+        messages = list(TripComment.objects.filter(load=load).select_related("sender").order_by("created_at"))
+
+        context = {
+            "user": request.user,
+            "read_cursors": comment_reads.read_cursors(request.user.id, [load.id])
+        }
+        serializer = TripCommentSerializer(messages, many=True, context=context)
+
+        # Fetching the thread reads it, one upsert
+        if messages:
+            comment_reads.mark_thread_read(request.user.id, load.id, messages[-1].id)
 
-        serializer = TripCommentSerializer(messages, many=True)
         return Response(serializer.data, status=200)
     
 class VendorOngoingTrips(APIView):
@@ -532,6 +578,10 @@ class VendorAcceptedLoadDetails(APIView):
 
 @method_decorator(csrf_exempt, name='dispatch') 
 class VendorTripDetailsView(RetrieveAPIView):
+    """
+    Trip details for the vendor app. Conditional GET (trip_etags): a poll
+    of an unchanged trip is one query and a 304 or a cached body.
+    """
     permission_classes = [IsAuthenticated]
     serializer_class = VendorTripDetailsSerializer
     lookup_field = "id"
@@ -540,6 +590,25 @@ class VendorTripDetailsView(RetrieveAPIView):
         vendor = self.request.user
         return Load.objects.filter(requests__vendor=vendor)
 
+    def retrieve(self, request, *args, **kwargs):
+        # Exists instead of the join: one row per load whatever the requests
+        loads = Load.objects.filter(
+            Exists(LoadRequest.objects.filter(load=OuterRef('pk'), vendor=request.user))
+        )
+        validator = trip_etags.trip_validator(loads, kwargs[self.lookup_field], 'vendor_trip_details')
+        if validator is None:
+            # Let DRF answer the 404 as before
+            return super().retrieve(request, *args, **kwargs)
+        if trip_etags.is_not_modified(request, validator):
+            return trip_etags.not_modified(validator)
+
+        data = trip_etags.cached_body(validator)
+        if data is None:
+            data = super().retrieve(request, *args, **kwargs).data
+            trip_etags.cache_body(validator, data)
+
+        return trip_etags.with_validator(Response(data), validator)
+
 @method_decorator(csrf_exempt, name='dispatch')
 class VendorLRUploadView(APIView):
     permission_classes = [IsAuthenticated]
@@ -861,58 +930,34 @@ class VendorProfileUpdateView(APIView):
 
 @method_decorator(csrf_exempt, name='dispatch')
 class LoadFilterOptionsView(APIView):
+    """
+    Filter sheet options, served from the cache (see
+    logistics_app/filter_options.py). Send the ETag back as
+    If-None-Match to get a 304 when nothing changed.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
         """
-        Get all available filter options for loads dynamically from database
+        Get all available filter options for loads
         """
         try:
-            # Get unique locations (from pickup_location)
-            locations = Load.objects.filter(
-                pickup_location__isnull=False
-            ).exclude(
-                pickup_location=''
-            ).values_list(
-                'pickup_location', flat=True
-            ).distinct().order_by('pickup_location')
-            
-            # Get unique destinations (from drop_location)
-            destinations = Load.objects.filter(
-                drop_location__isnull=False
-            ).exclude(
-                drop_location=''
-            ).values_list(
-                'drop_location', flat=True
-            ).distinct().order_by('drop_location')
-            
-            # Get unique vehicle types
-            vehicle_types = VehicleType.objects.all().values_list('name', flat=True).order_by('name')
-            
-            # Get unique load capacities from weight field
-            load_capacities = Load.objects.filter(
-                weight__isnull=False
-            ).exclude(
-                weight=''
-            ).values_list(
-                'weight', flat=True
-            ).distinct().order_by('weight')
-            
-            # Prepare response data
-            data = {
-                'locations': list(locations),
-                'destinations': list(destinations),
-                'vehicle_types': list(vehicle_types),
-                'load_capacities': list(load_capacities),
-            }
-            
-            serializer = LoadFilterOptionsSerializer(data)
+            options = filter_options.get_options()
+            etag = options['etag']
+            if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['ETag'] = etag
+                return response
+
+            serializer = LoadFilterOptionsSerializer(options['data'])
             
-            return Response({
+            response = Response({
                 'status': True,
                 'message': 'Filter options retrieved successfully',
                 'data': serializer.data
             }, status=status.HTTP_200_OK)
+            response['ETag'] = etag
+            return response
             
         except Exception as e:
             return Response({
@@ -922,6 +967,15 @@ class LoadFilterOptionsView(APIView):
 
 @method_decorator(csrf_exempt, name='dispatch')
 class FilteredLoadsView(APIView):
+    """
+    GET /api/loads/filtered/?from_location=..&to_location=..&match=contains|fuzzy
+    GET /api/loads/filtered/?from_location_id=..&to_location_id=..
+
+    match=fuzzy ranks locations by trigram similarity and tolerates typos
+    (see logistics_app/location_search.py), default is a substring match.
+    The *_location_id filters take ids from the filter options
+    (pickup_places / drop_places) and are plain integer lookups.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -932,24 +986,38 @@ class FilteredLoadsView(APIView):
             vehicle_types = request.GET.getlist('vehicle_type')
             load_capacities = request.GET.getlist('load_capacity')
 
+            from_location_ids = request.GET.getlist('from_location_id')
+            to_location_ids = request.GET.getlist('to_location_id')
+
             pickup_date = request.GET.get('pickup_date')
             drop_date = request.GET.get('drop_date')
 
-            loads = Load.objects.all()
+            try:
+                from_location_ids = [int(value) for value in from_location_ids]
+                to_location_ids = [int(value) for value in to_location_ids]
+            except ValueError:
+                return Response({
+                    'status': False,
+                    'message': 'from_location_id and to_location_id must be integers'
+                }, status=status.HTTP_400_BAD_REQUEST)
 
-            # ✅ MULTI from_location
-            if from_locations:
-                q = Q()
-                for loc in from_locations:
-                    q |= Q(pickup_location__icontains=loc)
-                loads = loads.filter(q)
+            match = request.GET.get('match', location_search.CONTAINS)
+            if match not in location_search.MODES:
+                return Response({
+                    'status': False,
+                    'message': f"match must be one of: {', '.join(location_search.MODES)}"
+                }, status=status.HTTP_400_BAD_REQUEST)
 
-            # ✅ MULTI to_location
-            if to_locations:
-                q = Q()
-                for loc in to_locations:
-                    q |= Q(drop_location__icontains=loc)
-                loads = loads.filter(q)
+            # Vendor's own request status in one subquery
+            # (read by LoadDetailsSerializer.get_request_status)
+            vendor_request_status = LoadRequest.objects.filter(
+                load=OuterRef('pk'),
+                vendor=request.user
+            ).order_by('id').values('status')[:1]
+
+            loads = Load.objects.select_related('created_by', 'vehicle_type').annotate(
+                vendor_request_status=Subquery(vendor_request_status)
+            )
 
             # ✅ MULTI vehicle types
             if vehicle_types:
@@ -969,7 +1037,23 @@ class FilteredLoadsView(APIView):
             if drop_date:
                 loads = loads.filter(drop_date=drop_date)
 
-            loads = loads.order_by('-created_at')
+            # ✅ MULTI canonical locations
+            if from_location_ids:
+                loads = loads.filter(pickup_place_id__in=from_location_ids)
+
+            if to_location_ids:
+                loads = loads.filter(drop_place_id__in=to_location_ids)
+
+            # ✅ MULTI from_location / to_location, trigram indexed
+            loads = location_search.filter_locations(
+                loads,
+                from_locations=from_locations,
+                to_locations=to_locations,
+                mode=match
+            )
+
+            with location_search.search_transaction(match):
+                loads = list(loads)
 
             serializer = LoadDetailsSerializer(
                 loads,
@@ -984,12 +1068,15 @@ class FilteredLoadsView(APIView):
                     'filters_applied': {
                         'from_location': from_locations,
                         'to_location': to_locations,
+                        'from_location_id': from_location_ids,
+                        'to_location_id': to_location_ids,
                         'vehicle_type': vehicle_types,
                         'load_capacity': load_capacities,
                         'pickup_date': pickup_date,
                         'drop_date': drop_date,
+                        'match': match,
                     },
-                    'total_count': loads.count(),
+                    'total_count': len(loads),
                     'loads': serializer.data
                 }
             }, status=status.HTTP_200_OK)
@@ -1100,8 +1187,48 @@ class VendorProfileView(APIView):
 class VendorDashboardCountsDetailedView(APIView):
     """
     Alternative: Count ALL vendor-related loads (requests + assignments)
+    Counts are cached per vendor, HEAD / If-None-Match let the app skip the body.
     """
     permission_classes = [IsAuthenticated]
+
+    @staticmethod
+    def compute_counts(vendor):
+        """All dashboard counts in one conditional-aggregation query"""
+        counts = Load.objects.annotate(
+            vendor_request=FilteredRelation('requests', condition=Q(requests__vendor=vendor))
+        ).aggregate(
+            # 1. ACTIVE TRIPS: Loads with ACCEPTED requests
+            active_trips=Count('id', filter=Q(vendor_request__status='accepted'), distinct=True),
+            # 2. NEW PENDING LOADS
+            new_loads=Count('id', filter=Q(status='pending'), distinct=True),
+            # 3. Count vendor's requests by status
+            pending_requests=Count('vendor_request', filter=Q(vendor_request__status='pending')),
+            accepted_requests=Count('vendor_request', filter=Q(vendor_request__status='accepted')),
+            rejected_requests=Count('vendor_request', filter=Q(vendor_request__status='rejected')),
+        )
+
+        return {
+            'active_trips': counts['active_trips'],
+            'new_loads': counts['new_loads'],  # ALL vendor-related loads
+            'counts_by_status': {
+                'pending_requests': counts['pending_requests'],
+                'accepted_requests': counts['accepted_requests'],
+                'rejected_requests': counts['rejected_requests'],
+            }
+        }
+
+    def head(self, request):
+        """ETag only, the app compares it with the one it has"""
+        vendor = request.user
+        if vendor.role != 'vendor':
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        etag = kpis.vendor_dashboard_etag(vendor.id)
+        response = Response(status=status.HTTP_200_OK)
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
     
     def get(self, request):
         try:
@@ -1112,52 +1239,22 @@ class VendorDashboardCountsDetailedView(APIView):
                     'status': False,
                     'message': 'Access denied. Vendor role required.'
                 }, status=status.HTTP_403_FORBIDDEN)
-            
-            from django.db.models import Q
-            
-            # 1. ACTIVE TRIPS: Loads with ACCEPTED requests
-            active_trips_count = Load.objects.filter(
-                requests__vendor=vendor,
-                requests__status="accepted"
-            ).distinct().count()
-            
-            # 2. NEW PENDING LOADS: Count only new/pending loads related to vendor
-            #    - Loads vendor has requested (pending)
-            #    - Loads assigned to vendor's vehicles/drivers but still in 'pending' status
-            all_vendor_loads_count = Load.objects.filter(
-                
-                status='pending'
-            ).distinct().count()
-            
-            # 3. (Optional) Count loads by request status
-            pending_requests = LoadRequest.objects.filter(
-                vendor=vendor,
-                status='pending'
-            ).count()
-            
-            accepted_requests = LoadRequest.objects.filter(
-                vendor=vendor,
-                status='accepted'
-            ).count()
-            
-            rejected_requests = LoadRequest.objects.filter(
-                vendor=vendor,
-                status='rejected'
-            ).count()
-            
-            return Response({
+
+            etag = kpis.vendor_dashboard_etag(vendor.id)
+            if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['ETag'] = etag
+                return response
+
+            data, etag = kpis.get_vendor_dashboard_counts(vendor, self.compute_counts)
+
+            response = Response({
                 'status': True,
                 'message': 'Dashboard counts fetched successfully',
-                'data': {
-                    'active_trips': active_trips_count,
-                    'new_loads': all_vendor_loads_count,  # ALL vendor-related loads
-                    'counts_by_status': {
-                        'pending_requests': pending_requests,
-                        'accepted_requests': accepted_requests,
-                        'rejected_requests': rejected_requests,
-                    }
-                }
+                'data': data
             }, status=status.HTTP_200_OK)
+            response['ETag'] = etag
+            return response
             
         except Exception as e:
             return Response({
@@ -1314,55 +1411,56 @@ class VendorTripHistoryView(APIView):
     """
     API to get vendor's trip history - completed loads only
     Shows pod_uploaded and payment_completed status loads with POD file details
+
+    Cursor paginated with ?cursor=<opaque>&page_size=<n> (newest first),
+    the full list without them. The counts and summary cover all
+    completed trips, see logistics_app/trip_history.py.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         vendor = request.user
-        
-        # Define completed statuses
-        COMPLETED_STATUSES = [
-            'pod_uploaded',
-            'payment_completed',
-            'trip_closed',
-        ]
-        
-        # Get loads where vendor has sent a request and it's accepted
-        requested_loads = Load.objects.filter(
-            requests__vendor=vendor,
-            requests__status="accepted",
-            trip_status__in=COMPLETED_STATUSES
-        ).distinct()
 
-        # Get loads assigned to vendor (vehicle or driver)
-        assigned_loads = Load.objects.filter(
-            Q(driver__owner=vendor) | Q(vehicle__owner=vendor),
-            trip_status__in=COMPLETED_STATUSES
-        ).distinct()
+        loads = trip_history.vendor_trips(vendor).select_related(
+            'vehicle', 'driver', 'pod_uploaded_by'
+        ).prefetch_related(
+            Prefetch(
+                'payments',
+                queryset=Payment.objects.select_related('recorded_by').order_by('-payment_date')
+            ),
+            Prefetch(
+                'requests',
+                queryset=LoadRequest.objects.filter(vendor=vendor).order_by('id'),
+                to_attr='vendor_requests'
+            ),
+        )
 
-        # Combine results
-        loads = (requested_loads | assigned_loads).distinct().order_by('-created_at')
+        # Feed mode: ?cursor=<opaque>&page_size=<n>, keyset on (created_at, id)
+        if 'cursor' in request.query_params or 'page_size' in request.query_params:
+            try:
+                page, next_cursor = keyset_paginate(
+                    loads,
+                    cursor=request.query_params.get('cursor') or None,
+                    page_size=get_page_size(request)
+                )
+            except InvalidCursor:
+                return Response({
+                    "status": False,
+                    "message": "Invalid cursor."
+                }, status=400)
+        else:
+            # Older app builds expect every trip in one response
+            page, next_cursor = loads.order_by('-created_at'), None
 
-        # Get counts by status
-        status_counts = {}
-        for status in COMPLETED_STATUSES:
-            count = Load.objects.filter(
-                Q(requests__vendor=vendor, requests__status="accepted") |
-                Q(driver__owner=vendor) |
-                Q(vehicle__owner=vendor),
-                trip_status=status
-            ).distinct().count()
-            status_counts[status] = count
+        # Counts and summary over all trips, one cached aggregate
+        summary = trip_history.get_summary(vendor)
 
         # Prepare detailed response with POD file information
-        trip_history = []
-        
-        for load in loads:
+        trips = []
+
+        for load in page:
             # Get load request info
-            load_request = LoadRequest.objects.filter(
-                load=load, 
-                vendor=vendor
-            ).first()
+            load_request = load.vendor_requests[0] if load.vendor_requests else None
             
             # Build POD file URL
             pod_file_url = None
@@ -1381,14 +1479,12 @@ class VendorTripHistoryView(APIView):
                 "payment_records_count": 0
             }
             
-            # Fetch all payment records for this load
-            payments = Payment.objects.filter(load=load).order_by('-payment_date')
-            if payments.exists():
+            # All payment records for this load (prefetched)
+            payments = load.payments.all()
+            if payments:
                 payment_records = []
-                total_paid = Decimal('0.00')
                 
                 for payment in payments:
-                    total_paid += payment.amount_paid
                     payment_records.append({
                         "id": payment.id,
                         "amount_paid": float(payment.amount_paid),
@@ -1400,7 +1496,7 @@ class VendorTripHistoryView(APIView):
                 
                 payment_details = {
                     "payments": payment_records,
-                    "total_amount_paid": float(total_paid),
+                    "total_amount_paid": float(load.total_paid),
                     "payment_records_count": len(payment_records)
                 }
             
@@ -1453,29 +1549,22 @@ class VendorTripHistoryView(APIView):
                 # Payment details for closed trips
                 "payment_info": payment_details
             }
-            trip_history.append(trip_data)
+            trips.append(trip_data)
 
         return Response({
             "status": True,
             "message": "Trip history fetched successfully",
             "data": {
-                "trips": trip_history,
-                "total_count": loads.count(),
-                "status_counts": status_counts,
+                "trips": trips,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+                "total_count": summary['total_count'],
+                "status_counts": summary['status_counts'],
                 "status_display": {
                     'pod_received_at_office': 'POD Received at Office',
                     'balance_paid': 'Balance Paid',
                 },
-                "summary": {
-                    "total_completed_trips": sum(status_counts.values()),
-                    "pod_uploaded_count": status_counts.get('pod_uploaded', 0),
-                    "payment_completed_count": status_counts.get('payment_completed', 0),
-                    "trips_with_pod": loads.filter(pod_document__isnull=False).count(),
-                    "trips_without_pod": loads.filter(pod_document__isnull=True).count(),
-                    "trips_with_payments": loads.filter(payments__isnull=False).distinct().count(),
-                    "total_amount_paid_all_trips": float(Payment.objects.filter(load__in=loads).aggregate(Sum('amount_paid'))['amount_paid__sum'] or Decimal('0.00')),
-                    "average_payment_per_trip": float((Payment.objects.filter(load__in=loads).aggregate(Sum('amount_paid'))['amount_paid__sum'] or Decimal('0.00')) / max(loads.count(), 1)),
-                }
+                "summary": summary['summary'],
             }
         }, status=200)
 
@@ -1552,12 +1641,15 @@ class AcceptLoadRequestView(APIView):
                 )
                 
                 # Reject other pending requests for this load
-                LoadRequest.objects.filter(
+                pending_requests = LoadRequest.objects.filter(
                     load=load,
                     status='pending'
                 ).exclude(
                     id=request_id
-                ).update(status='rejected')
+                )
+                rejected_vendor_ids = list(pending_requests.values_list('vendor_id', flat=True))
+                pending_requests.update(status='rejected')
+                kpis.bump_vendor_dashboards_on_commit(rejected_vendor_ids)
                 
                 # Send rejection notifications to other vendors
                 rejected_requests = LoadRequest.objects.filter(
@@ -1644,8 +1736,32 @@ class RejectLoadRequestView(APIView):
                 'message': f'Error: {str(e)}'
             }, status=500)
 
+
+def notification_data(notification):
+    """Notification -> API dict, related_trip must be select_related"""
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'type': notification.notification_type,
+        'type_display': notification.get_notification_type_display(),
+        'is_read': notification.is_read,
+        'created_at': notification.created_at,
+        'trip_id': notification.related_trip_id,
+        'trip_load_id': notification.related_trip.load_id if notification.related_trip else None,
+    }
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class UserNotificationsView(APIView):
+    """
+    GET /api/notifications/?cursor=<opaque>&page_size=<n>
+
+    Newest first, keyset paginated on (created_at, id). The unread count
+    comes from the maintained per-user counter, not a COUNT(*). Without
+    cursor / page_size the full list and total_count are returned, as
+    older app builds expect.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
@@ -1653,33 +1769,44 @@ class UserNotificationsView(APIView):
             # Get notifications for current user
             notifications = Notification.objects.filter(
                 recipient=request.user
-            ).order_by('-created_at')
-            
-            # Prepare response data
-            notification_data = []
-            for notification in notifications:
-                notification_data.append({
-                    'id': notification.id,
-                    'title': notification.title,
-                    'message': notification.message,
-                    'type': notification.notification_type,
-                    'type_display': notification.get_notification_type_display(),
-                    'is_read': notification.is_read,
-                    'created_at': notification.created_at,
-                    'trip_id': notification.related_trip.id if notification.related_trip else None,
-                    'trip_load_id': notification.related_trip.load_id if notification.related_trip else None,
-                })
-            
-            # Get unread count
-            unread_count = notifications.filter(is_read=False).count()
+            ).select_related('related_trip')
+
+            if 'cursor' not in request.query_params and 'page_size' not in request.query_params:
+                notification_list = [
+                    notification_data(notification)
+                    for notification in notifications.order_by('-created_at')
+                ]
+                return Response({
+                    'status': True,
+                    'message': 'Notifications fetched successfully',
+                    'data': {
+                        'notifications': notification_list,
+                        'unread_count': kpis.get_unread_count(request.user.id),
+                        'total_count': len(notification_list)
+                    }
+                }, status=200)
+
+            # Feed mode: keyset on (created_at, id)
+            try:
+                page, next_cursor = keyset_paginate(
+                    notifications,
+                    cursor=request.query_params.get('cursor') or None,
+                    page_size=get_page_size(request)
+                )
+            except InvalidCursor:
+                return Response({
+                    'status': False,
+                    'message': 'Invalid cursor.'
+                }, status=400)
             
             return Response({
                 'status': True,
                 'message': 'Notifications fetched successfully',
                 'data': {
-                    'notifications': notification_data,
-                    'unread_count': unread_count,
-                    'total_count': notifications.count()
+                    'notifications': [notification_data(notification) for notification in page],
+                    'unread_count': kpis.get_unread_count(request.user.id),
+                    'next_cursor': next_cursor,
+                    'has_more': next_cursor is not None
                 }
             }, status=200)
             
@@ -1689,30 +1816,47 @@ class UserNotificationsView(APIView):
                 'message': f'Error fetching notifications: {str(e)}'
             }, status=500)
 
+
+@method_decorator(csrf_exempt, name='dispatch')
+class NotificationBadgeView(APIView):
+    """
+    GET /api/notifications/badge/ -> just the unread count, one indexed lookup
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({
+            'status': True,
+            'message': 'Unread count fetched successfully',
+            'data': {
+                'unread_count': kpis.get_unread_count(request.user.id)
+            }
+        }, status=200)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class MarkNotificationReadView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request, notification_id):
         try:
-            notification = Notification.objects.get(
-                id=notification_id,
-                recipient=request.user
-            )
-            
-            notification.is_read = True
-            notification.save()
+            if not Notification.objects.filter(id=notification_id, recipient=request.user).exists():
+                return Response({
+                    'status': False,
+                    'message': 'Notification not found'
+                }, status=404)
+
+            # Conditional update, the unread counter only moves if it was unread
+            mark_notifications_read(request.user.id, [notification_id])
             
             return Response({
                 'status': True,
-                'message': 'Notification marked as read'
+                'message': 'Notification marked as read',
+                'data': {
+                    'unread_count': kpis.get_unread_count(request.user.id)
+                }
             }, status=200)
             
-        except Notification.DoesNotExist:
-            return Response({
-                'status': False,
-                'message': 'Notification not found'
-            }, status=404)
         except Exception as e:
             return Response({
                 'status': False,
@@ -1726,10 +1870,7 @@ class MarkAllNotificationsReadView(APIView):
     def post(self, request):
         try:
             # Mark all notifications as read for current user
-            updated_count = Notification.objects.filter(
-                recipient=request.user,
-                is_read=False
-            ).update(is_read=True)
+            updated_count = mark_notifications_read(request.user.id)
             
             return Response({
                 'status': True,
@@ -1770,6 +1911,64 @@ class LogoutView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class TripLocationPingBatchView(APIView):
+    """
+    Batch location ping ingestion.
+
+    POST /api/trips/location/pings/
+    {"pings": [{"trip_id": 12, "location": "Pune", "recorded_at": "2025-01-01T10:00:00+05:30",
+                "latitude": 18.52, "longitude": 73.85}, ...]}
+
+    Pings may cover several trips. Each one is accepted or rejected on its
+    own, the response lists the outcome per ping in request order.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        user = request.user
+        pings = request.data.get('pings')
+
+        if not isinstance(pings, list) or not pings:
+            return Response({
+                "status": False,
+                "message": "pings must be a non-empty list."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(pings) > MAX_PINGS_PER_BATCH:
+            return Response({
+                "status": False,
+                "message": f"At most {MAX_PINGS_PER_BATCH} pings per request."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Trips this user may report for
+        if user.is_staff or user.role == 'admin':
+            loads = Load.objects.all()
+        elif user.role == 'traffic_person':
+            loads = Load.objects.filter(created_by=user)
+        else:
+            vendor_load_ids = LoadRequest.objects.filter(
+                vendor=user,
+                status__in=["pending", "accepted"]
+            ).values('load_id')
+            loads = Load.objects.filter(
+                Q(id__in=vendor_load_ids) | Q(driver__owner=user) | Q(vehicle__owner=user)
+            )
+
+        results = ingest_location_pings(pings, loads, reported_by=user)
+        accepted_count = sum(1 for result in results if result['accepted'])
+
+        return Response({
+            "status": True,
+            "message": f"{accepted_count} of {len(results)} pings accepted.",
+            "data": {
+                "accepted": accepted_count,
+                "rejected": len(results) - accepted_count,
+                "results": results
+            }
+        }, status=status.HTTP_200_OK)
+
+
 # update current location
 class UpdateTripCurrentLocationAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -1794,9 +1993,19 @@ class UpdateTripCurrentLocationAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        load.current_location = current_location
-        load.updated_at = timezone.now()
-        load.save(update_fields=['current_location', 'updated_at'])
+        # Same path as the batch endpoint, keeps the location history
+        updated_at = timezone.now()
+        result = ingest_location_pings(
+            [{'trip_id': load.id, 'location': current_location, 'recorded_at': updated_at.isoformat()}],
+            Load.objects.filter(id=load.id),
+            reported_by=request.user
+        )[0]
+        if not result['accepted']:
+            return Response(
+                {'success': False, 'error': result['error']},
+                status=status.HTTP_404_NOT_FOUND if result['error'] == TRIP_NOT_FOUND
+                else status.HTTP_400_BAD_REQUEST
+            )
 
         return Response(
             {
@@ -1805,8 +2014,8 @@ class UpdateTripCurrentLocationAPIView(APIView):
                 'data': {
                     'trip_id': load.id,
                     'load_id': load.load_id,
-                    'current_location': load.current_location,
-                    'updated_at': load.updated_at
+                    'current_location': current_location,
+                    'updated_at': updated_at
                 }
             },
             status=status.HTTP_200_OK
@@ -2144,4 +2353,129 @@ class UpdateTripLocationStatusView(APIView):
             return Response({
                 "status": False,
                 "message": f"Error updating trip status: {str(e)}"
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class VendorSyncView(APIView):
+    """
+    Incremental sync for the vendor app.
+
+    GET /api/sync/?token=<sync_token>
+    Returns loads, trips, notifications and trip comments changed since the
+    token plus ids deleted since then, and a new token for the next poll.
+    Without a token (or with an expired one) only a token is returned with
+    full_resync=true; the app then reloads the full lists once.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        vendor = request.user
+        now = timezone.now()
+        next_token = make_sync_token(now)
+
+        token = request.query_params.get('token')
+        if not token:
+            return self._full_resync(next_token)
+
+        try:
+            since = read_sync_token(token)
+        except InvalidSyncToken:
+            return Response({
+                "status": False,
+                "message": "Invalid sync token."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if is_token_expired(since):
+            return self._full_resync(next_token)
+
+        since = since - SYNC_OVERLAP
+
+        # Loads this vendor is working on (requested or assigned)
+        vendor_load_ids = LoadRequest.objects.filter(
+            vendor=vendor,
+            status__in=["pending", "accepted"]
+        ).values('load_id')
+        vendor_loads = Q(id__in=vendor_load_ids) | Q(driver__owner=vendor) | Q(vehicle__owner=vendor)
+
+        vendor_request_status = LoadRequest.objects.filter(
+            load=OuterRef('pk'),
+            vendor=vendor
+        ).order_by('id').values('status')[:1]
+
+        changed_loads = (
+            Load.objects.filter(updated_at__gt=since, updated_at__lte=now)
+            .select_related('created_by', 'vehicle_type')
+            .annotate(vendor_request_status=Subquery(vendor_request_status))
+            .order_by('updated_at')
+        )
+
+        # Marketplace loads still open to requests
+        loads = list(changed_loads.exclude(requests__status='accepted')[:MAX_SYNC_ROWS + 1])
+        trips = list(changed_loads.filter(vendor_loads).distinct()[:MAX_SYNC_ROWS + 1])
+        # Loads that got accepted by someone else drop out of the marketplace
+        closed_load_ids = list(
+            changed_loads.filter(requests__status='accepted')
+            .exclude(vendor_loads)
+            .values_list('id', flat=True)
+            .distinct()[:MAX_SYNC_ROWS + 1]
+        )
+
+        notifications = list(
+            Notification.objects.filter(
+                recipient=vendor,
+                created_at__gt=since,
+                created_at__lte=now
+            ).select_related('related_trip').order_by('created_at')[:MAX_SYNC_ROWS + 1]
+        )
+
+        comments = list(
+            TripComment.objects.filter(
+                load__in=Load.objects.filter(vendor_loads).values('id'),
+                updated_at__gt=since,
+                updated_at__lte=now
+            ).select_related('sender').order_by('updated_at')[:MAX_SYNC_ROWS + 1]
+        )
+
+        if any(len(rows) > MAX_SYNC_ROWS for rows in (loads, trips, closed_load_ids, notifications, comments)):
+            return self._full_resync(next_token)
+
+        deleted = {"loads": [], "trip_comments": [], "notifications": []}
+        tombstones = SyncTombstone.objects.filter(
+            deleted_at__gt=since,
+            deleted_at__lte=now
+        ).filter(
+            Q(recipient_user_id__isnull=True) | Q(recipient_user_id=vendor.id)
+        ).values_list('object_type', 'object_id')
+        for object_type, object_id in tombstones:
+            deleted[f"{object_type}s"].append(object_id)
+
+        default_tds_percentage = reference_data.tds_rate()
+        context = {"vendor": vendor, "default_tds_percentage": default_tds_percentage}
+
+        return Response({
+            "status": True,
+            "message": "Changes fetched successfully.",
+            "data": {
+                "token": next_token,
+                "full_resync": False,
+                "loads": LoadDetailsSerializer(loads, many=True, context=context).data,
+                "trips": LoadDetailsSerializer(trips, many=True, context=context).data,
+                "notifications": [notification_data(notification) for notification in notifications],
+                "trip_comments": TripCommentSerializer(comments, many=True, context={
+                    "user": vendor,
+                    "read_cursors": comment_reads.read_cursors(vendor.id, {comment.load_id for comment in comments})
+                }).data,
+                "closed_loads": closed_load_ids,
+                "deleted": deleted,
+            }
+        }, status=status.HTTP_200_OK)
+
+    def _full_resync(self, next_token):
+        return Response({
+            "status": True,
+            "message": "Full resync required.",
+            "data": {
+                "token": next_token,
+                "full_resync": True,
+            }
+        }, status=status.HTTP_200_OK)
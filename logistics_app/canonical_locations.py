@@ -0,0 +1,146 @@
+"""
+Canonical location dictionary.
+
+Free-text places ('Pune', 'pune ', 'Pune, MH') resolve to one Location
+row:
+
+    1. every spelling seen is kept as a LocationAlias (lowercased,
+       whitespace collapsed), so a repeat is one indexed lookup
+    2. a new spelling is matched on its city key, lanes.normalize_place,
+       the same rule the vehicle lanes use, and becomes an alias of the
+       Location with that key, which is created if needed
+
+Spellings that differ in more than that ('Poona') can be folded into
+one Location with merge_locations.
+
+Load.pickup_place / drop_place and Vehicle.place are set on save. Rows
+that existed before were mapped by migration 0092, the backfill_locations
+command catches any written without save() since, so load filters and
+the filter option lists work on integer ids and this small table
+instead of scanning and de-duplicating text.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import Q
+
+from .lanes import normalize_place
+from .models import Load, Location, LocationAlias, Vehicle
+
+
+def alias_key(value):
+    """'  Pune,  MH ' -> 'pune, mh'"""
+    if not value:
+        return ''
+    return re.sub(r'\s+', ' ', str(value)).strip().lower()[:255]
+
+
+def display_name(value):
+    """'pune ,mh' -> 'Pune'"""
+    return re.sub(r'\s+', ' ', str(value).split(',')[0]).strip().title()[:255]
+
+
+def resolve_locations(values):
+    """
+    {value: location id} for the given strings, creating Locations and
+    aliases that don't exist yet. Values without a usable place map to None.
+    A few queries per call, however many values.
+    """
+    keys = {value: alias_key(value) for value in set(values) if alias_key(value)}
+    if not keys:
+        return {value: None for value in values}
+
+    known = dict(
+        LocationAlias.objects.filter(alias__in=set(keys.values())).values_list('alias', 'location_id')
+    )
+
+    missing = {}
+    for value, key in keys.items():
+        city = normalize_place(value)
+        if key not in known and city:
+            missing[key] = (city, display_name(value))
+
+    if missing:
+        cities = {city for city, _ in missing.values()}
+        with transaction.atomic():
+            # ignore_conflicts: a concurrent request may have created the
+            # same rows, ids are read back afterwards either way
+            Location.objects.bulk_create(
+                [Location(name=name, normalized_name=city) for city, name in dict(missing.values()).items()],
+                ignore_conflicts=True
+            )
+            location_ids = dict(
+                Location.objects.filter(normalized_name__in=cities).values_list('normalized_name', 'id')
+            )
+            LocationAlias.objects.bulk_create(
+                [LocationAlias(alias=key, location_id=location_ids[city]) for key, (city, _) in missing.items()],
+                ignore_conflicts=True
+            )
+        known.update(
+            LocationAlias.objects.filter(alias__in=list(missing)).values_list('alias', 'location_id')
+        )
+
+    return {value: known.get(keys.get(value)) for value in values}
+
+
+def resolve_location(value):
+    return resolve_locations([value]).get(value)
+
+
+def assign_load_places(loads):
+    """Set pickup_place / drop_place of the loads from their text (not saved)"""
+    places = resolve_locations(
+        [load.pickup_location for load in loads] + [load.drop_location for load in loads]
+    )
+    for load in loads:
+        load.pickup_place_id = places.get(load.pickup_location)
+        load.drop_place_id = places.get(load.drop_location)
+
+
+def assign_vehicle_places(vehicles):
+    """Set place of the vehicles from their location text (not saved)"""
+    places = resolve_locations([vehicle.location for vehicle in vehicles])
+    for vehicle in vehicles:
+        vehicle.place_id = places.get(vehicle.location)
+
+
+def _backfill(queryset, assign, fields, chunk_size):
+    total = 0
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id).order_by('id')[:chunk_size])
+        if not chunk:
+            return total
+        assign(chunk)
+        # bulk_update: no save() side effects, updated_at stays as it was
+        queryset.model.objects.bulk_update(chunk, fields)
+        total += len(chunk)
+        last_id = chunk[-1].id
+
+
+def backfill_loads(chunk_size=1000):
+    """Map loads without canonical places, chunk by chunk -> loads updated"""
+    queryset = Load.objects.filter(
+        Q(pickup_place__isnull=True) | Q(drop_place__isnull=True)
+    ).only('id', 'pickup_location', 'drop_location', 'pickup_place', 'drop_place')
+    return _backfill(queryset, assign_load_places, ['pickup_place', 'drop_place'], chunk_size)
+
+
+def backfill_vehicles(chunk_size=1000):
+    """Same for Vehicle.place -> vehicles updated"""
+    queryset = Vehicle.objects.filter(place__isnull=True).exclude(location__isnull=True).exclude(location='').only(
+        'id', 'location', 'place'
+    )
+    return _backfill(queryset, assign_vehicle_places, ['place'], chunk_size)
+
+
+def merge_locations(target, sources):
+    """Fold the source Locations (and their aliases) into target"""
+    source_ids = [source.pk for source in sources if source.pk != target.pk]
+    with transaction.atomic():
+        LocationAlias.objects.filter(location_id__in=source_ids).update(location=target)
+        Load.objects.filter(pickup_place_id__in=source_ids).update(pickup_place=target)
+        Load.objects.filter(drop_place_id__in=source_ids).update(drop_place=target)
+        Vehicle.objects.filter(place_id__in=source_ids).update(place=target)
+        Location.objects.filter(id__in=source_ids).delete()
+    return len(source_ids)
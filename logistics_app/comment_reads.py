@@ -0,0 +1,75 @@
+"""
+Per-user read state of trip chats.
+
+Each (user, load) pair has one TripCommentReadCursor row holding the id
+of the last comment the user has seen. A comment is unread for a user if
+someone else sent it and its id is above their cursor. Marking a thread
+read is one INSERT ... ON CONFLICT that never moves the cursor back, and
+unread counts for any number of trips come from one grouped query.
+"""
+from django.db import connection
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import TripComment, TripCommentReadCursor
+
+
+def mark_thread_read(user_id, load_id, comment_id=None):
+    """
+    Move the user's cursor to comment_id, or to the newest comment of the
+    load if None. One statement, a concurrent older mark can't undo it.
+    """
+    cursor_table = TripCommentReadCursor._meta.db_table
+    comment_table = TripComment._meta.db_table
+
+    if comment_id is None:
+        last_read = f'(SELECT COALESCE(MAX(id), 0) FROM {comment_table} WHERE load_id = %s)'
+        params = [user_id, load_id, load_id]
+    else:
+        last_read = '%s'
+        params = [user_id, load_id, comment_id]
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {cursor_table} (user_id, load_id, last_read_comment_id, updated_at)
+            VALUES (%s, %s, {last_read}, NOW())
+            ON CONFLICT (user_id, load_id) DO UPDATE SET
+                last_read_comment_id = GREATEST(
+                    {cursor_table}.last_read_comment_id, EXCLUDED.last_read_comment_id
+                ),
+                updated_at = EXCLUDED.updated_at
+        """, params)
+
+
+def read_cursors(user_id, load_ids):
+    """{load_id: last_read_comment_id} for the given loads, 0 if never read"""
+    cursors = dict(
+        TripCommentReadCursor.objects.filter(user_id=user_id, load_id__in=load_ids)
+        .values_list('load_id', 'last_read_comment_id')
+    )
+    return {load_id: cursors.get(load_id, 0) for load_id in load_ids}
+
+
+def unread_counts(user_id, load_ids):
+    """{load_id: unread comment count} for a page of trips, one query"""
+    last_read = TripCommentReadCursor.objects.filter(
+        user_id=user_id, load_id=OuterRef('load_id')
+    ).values('last_read_comment_id')[:1]
+
+    rows = (
+        TripComment.objects
+        .filter(load_id__in=load_ids)
+        .exclude(sender_id=user_id)
+        .annotate(last_read=Coalesce(Subquery(last_read), Value(0)))
+        .filter(id__gt=F('last_read'))
+        .values('load_id')
+        .annotate(unread=Count('id'))
+        .order_by()
+    )
+    counts = {row['load_id']: row['unread'] for row in rows}
+    return {load_id: counts.get(load_id, 0) for load_id in load_ids}
+
+
+def is_read_for(comment, user_id, last_read_comment_id):
+    """Read state of one comment for one viewer"""
+    return comment.sender_id == user_id or comment.id <= last_read_comment_id
@@ -0,0 +1,68 @@
+"""
+WebSocket consumer for real-time trip events (see realtime.py).
+
+    ws://<host>/ws/trips/                 admin web session (cookie auth)
+    ws://<host>/ws/trips/?token=<access>  mobile app (SimpleJWT access token)
+
+The socket is push only: on connect the user joins the groups their role
+allows and receives every trip.status / trip.comment / trip.location
+event for those trips.
+"""
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed, TokenError
+
+from . import realtime
+
+
+@database_sync_to_async
+def _user_for_token(raw_token):
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed, TokenError):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Authenticate ?token=<access token> for clients without a session"""
+
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+        if token:
+            scope['user'] = await _user_for_token(token[0])
+        return await super().__call__(scope, receive, send)
+
+
+class TripEventsConsumer(AsyncJsonWebsocketConsumer):
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated or getattr(user, 'is_blocked', False):
+            await self.close(code=4401)
+            return
+
+        self.trip_groups = realtime.groups_for_user(user)
+        if not self.trip_groups:
+            await self.close(code=4403)
+            return
+
+        for group in self.trip_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        for group in getattr(self, 'trip_groups', []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # Push only, clients have nothing to send
+        pass
+
+    async def trip_event(self, event):
+        await self.send_json({key: value for key, value in event.items() if key != 'type'})
@@ -0,0 +1,136 @@
+"""
+Option lists of the vendor app load filter sheet (api_app LoadFilterOptionsView).
+
+The values in use are kept in the small LoadFilterOption table: saving a
+load adds its pickup / drop Location ids and capacity if they are new,
+the prune_load_filter_options task (Celery beat) removes the ones no load
+uses any more and re-adds anything missed by queryset .update() calls.
+
+The assembled lists are cached with an ETag (hash of the content). Any
+change to the table, a VehicleType or a Location drops the cache entry,
+the next request rebuilds it from the small tables. In the common case
+a request is one cache read and no query; if the client's If-None-Match
+matches it gets a 304 with no body.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Load, LoadFilterOption, Location, VehicleType
+
+PICKUP = 'pickup'
+DROP = 'drop'
+CAPACITY = 'capacity'
+
+CACHE_KEY = 'load_filter_options:data'
+
+# Load fields the options depend on, for the post_save dirty check
+LOAD_FIELDS = ('pickup_place_id', 'drop_place_id', 'weight')
+
+
+def option_keys(loads):
+    """{(kind, value)} offered by the given loads"""
+    keys = set()
+    for load in loads:
+        if load.pickup_place_id:
+            keys.add((PICKUP, str(load.pickup_place_id)))
+        if load.drop_place_id:
+            keys.add((DROP, str(load.drop_place_id)))
+        if load.weight:
+            keys.add((CAPACITY, load.weight))
+    return keys
+
+
+def build_options():
+    """Option lists + ETag from the small tables, no Load scan"""
+    values = {PICKUP: set(), DROP: set(), CAPACITY: set()}
+    keys = []
+    for kind, value in LoadFilterOption.objects.values_list('kind', 'value'):
+        values[kind].add(value)
+        keys.append([kind, value])
+
+    place_ids = {int(value) for value in values[PICKUP] | values[DROP]}
+    names = dict(Location.objects.filter(id__in=place_ids).values_list('id', 'name'))
+
+    def places(kind):
+        ids = [int(value) for value in values[kind] if int(value) in names]
+        return [{'id': pk, 'name': names[pk]} for pk in sorted(ids, key=lambda pk: names[pk].lower())]
+
+    pickup_places = places(PICKUP)
+    drop_places = places(DROP)
+    data = {
+        'locations': [place['name'] for place in pickup_places],
+        'destinations': [place['name'] for place in drop_places],
+        'pickup_places': pickup_places,
+        'drop_places': drop_places,
+        'vehicle_types': list(VehicleType.objects.values_list('name', flat=True).order_by('name')),
+        'load_capacities': sorted(values[CAPACITY]),
+    }
+    digest = hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    return {'data': data, 'keys': keys, 'etag': f'"fo-{digest}"'}
+
+
+def get_options():
+    """{'data', 'keys', 'etag'}, from the cache unless something changed"""
+    options = cache.get(CACHE_KEY)
+    if options is None:
+        options = build_options()
+        cache.set(CACHE_KEY, options, None)
+    return options
+
+
+def invalidate():
+    cache.delete(CACHE_KEY)
+
+
+def record_loads(loads):
+    """
+    Add the options of saved loads that aren't known yet. Known values
+    are checked against the cached keys, so this usually costs no query.
+    """
+    keys = option_keys(loads)
+    if not keys:
+        return 0
+
+    known = {tuple(key) for key in get_options()['keys']}
+    missing = keys - known
+    if not missing:
+        return 0
+
+    LoadFilterOption.objects.bulk_create(
+        [LoadFilterOption(kind=kind, value=value) for kind, value in missing],
+        ignore_conflicts=True
+    )
+    transaction.on_commit(invalidate)
+    return len(missing)
+
+
+def prune_options():
+    """
+    Make the table match the loads: drop unused values, add missed ones.
+    Returns (added, removed).
+    """
+    in_use = set()
+    for kind, field in ((PICKUP, 'pickup_place_id'), (DROP, 'drop_place_id'), (CAPACITY, 'weight')):
+        values = (
+            Load.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''} if kind == CAPACITY else {})
+            .values_list(field, flat=True).distinct().order_by()
+        )
+        in_use.update((kind, str(value)) for value in values)
+
+    stored = {
+        (kind, value): pk
+        for pk, kind, value in LoadFilterOption.objects.values_list('id', 'kind', 'value')
+    }
+    stale = [pk for key, pk in stored.items() if key not in in_use]
+    added = [LoadFilterOption(kind=kind, value=value) for kind, value in in_use - set(stored)]
+
+    with transaction.atomic():
+        LoadFilterOption.objects.filter(id__in=stale).delete()
+        LoadFilterOption.objects.bulk_create(added, ignore_conflicts=True)
+        if stale or added:
+            transaction.on_commit(invalidate)
+
+    return len(added), len(stale)
@@ -1,6 +1,6 @@
 # firebase_service.py
 import firebase_admin
-from firebase_admin import credentials, messaging
+from firebase_admin import credentials, messaging, exceptions
 from django.conf import settings
 import os
 import logging
@@ -60,4 +60,58 @@ class FirebaseService:
             
         except Exception as e:
             logger.error(f"Error sending Firebase notification: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    # Errors that will fail again no matter how often we retry
+    PERMANENT_ERRORS = (
+        messaging.UnregisteredError,
+        messaging.SenderIdMismatchError,
+        exceptions.InvalidArgumentError,
+    )
+
+    # FCM accepts at most 500 messages per send_each call
+    MAX_BATCH_SIZE = 500
+
+    @classmethod
+    def build_message(cls, fcm_token, title, body, data=None):
+        """FCM data values must be strings"""
+        return messaging.Message(
+            notification=messaging.Notification(
+                title=title,
+                body=body,
+            ),
+            token=fcm_token,
+            data={key: str(value) for key, value in (data or {}).items() if value is not None}
+        )
+
+    @classmethod
+    def send_batch(cls, messages):
+        """
+        Send up to MAX_BATCH_SIZE messages in one FCM request.
+
+        Returns one (success, error, retryable) tuple per message, in order,
+        or None if Firebase is not available (the whole batch should be retried).
+        """
+        if not cls.initialize():
+            logger.error("Firebase not initialized")
+            return None
+
+        try:
+            batch_response = messaging.send_each(messages)
+        except Exception as e:
+            logger.error(f"Error sending Firebase notification batch: {e}")
+            return None
+
+        results = []
+        for response in batch_response.responses:
+            if response.success:
+                results.append((True, None, False))
+            else:
+                retryable = not isinstance(response.exception, cls.PERMANENT_ERRORS)
+                results.append((False, str(response.exception), retryable))
+
+        logger.info(
+            f"Firebase batch sent: {batch_response.success_count} ok, "
+            f"{batch_response.failure_count} failed"
+        )
+        return results
@@ -0,0 +1,219 @@
+"""
+Server-side paging of the admin grids: load list, trip management,
+payment management and POD management.
+
+The page views render the first page only. The other pages come from the
+grid's rows endpoint (views.grid_rows), rendered with the same row
+template, and static/js/server_grid.js swaps them into the table as the
+user pages, searches, filters or sorts. The browser never holds more
+than one page.
+
+Pages are keyset pages on (sort field, id) instead of OFFSET: the cursor
+holds the last row's values and the next page seeks past it, so a deep
+page costs the same as the first one. Each grid only offers sort fields
+with a matching index (Load.Meta, Payment.Meta). The base querysets and
+the role rules are the ones in load_queries.py. The total is counted on
+the first page of a search / filter only, the browser keeps it while
+paging.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.http import QueryDict
+from django.template.loader import render_to_string
+
+from . import load_queries
+from .models import Load
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+LOAD_SEARCH_FIELDS = ['load_id', 'pickup_location', 'drop_location', 'customer__customer_name']
+
+GRIDS = {
+    'loads': {
+        'queryset': load_queries.pending_loads,
+        'prefetch': ['customer__contacts'],
+        'template': 'load_list_rows.html',
+        'context_name': 'loads',
+        'sorts': ['created_at', 'load_id'],
+        'default_sort': '-created_at',
+        'search': LOAD_SEARCH_FIELDS,
+        'filters': {},
+    },
+    'trips': {
+        'queryset': load_queries.open_trips,
+        'template': 'trip_management_rows.html',
+        'context_name': 'trips',
+        'sorts': ['updated_at', 'load_id'],
+        'default_sort': '-updated_at',
+        'search': LOAD_SEARCH_FIELDS + ['driver__full_name', 'vehicle__reg_no'],
+        'filters': {'trip_status': dict(Load.TRIP_STATUS_CHOICES)},
+    },
+    'payments': {
+        'queryset': load_queries.payments,
+        'template': 'payment_management_rows.html',
+        'context_name': 'payments',
+        'sorts': ['payment_date'],
+        'default_sort': '-payment_date',
+        'search': [
+            'load__load_id', 'load__pickup_location', 'load__drop_location', 'description',
+            'recorded_by__full_name',
+        ],
+        'filters': {},
+    },
+    'pods': {
+        'queryset': load_queries.pod_loads,
+        'template': 'pod_management_rows.html',
+        'context_name': 'loads',
+        'sorts': ['created_at', 'load_id'],
+        'default_sort': '-created_at',
+        'search': LOAD_SEARCH_FIELDS + ['driver__full_name', 'vehicle__reg_no'],
+        'filters': {'pod_status': dict(Load.POD_STATUS_CHOICES)},
+    },
+}
+
+
+class GridError(ValueError):
+    """Raised for an unknown sort or filter value or a bad cursor"""
+
+
+def encode_cursor(value, pk):
+    """Opaque cursor from the (sort field, id) of the last row on a page"""
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    raw = json.dumps([value, pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, field):
+    """Reverse of encode_cursor -> (value, id), value converted for the model field"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        value = field.to_python(value)
+        if value is None:
+            raise ValueError
+        return value, int(pk)
+    except Exception:
+        raise GridError('Invalid cursor.')
+
+
+def get_page_size(params, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Read ?page_size= and clamp it between 1 and maximum"""
+    try:
+        page_size = int(params.get('page_size', default))
+    except (TypeError, ValueError):
+        page_size = default
+    return max(1, min(page_size, maximum))
+
+
+def _search(queryset, fields, term):
+    q = Q()
+    for field in fields:
+        q |= Q(**{f'{field}__icontains': term})
+    return queryset.filter(q)
+
+
+def seek(queryset, sort, cursor=None):
+    """Order by (sort field, id) and skip to the rows after the cursor"""
+    field_name = sort.lstrip('-')
+    descending = sort.startswith('-')
+    queryset = queryset.order_by(sort, '-id' if descending else 'id')
+    if not cursor:
+        return queryset
+
+    lookup = 'lt' if descending else 'gt'
+    last_value, last_id = decode_cursor(cursor, queryset.model._meta.get_field(field_name))
+    return queryset.filter(
+        Q(**{f'{field_name}__{lookup}': last_value}) |
+        Q(**{field_name: last_value, f'id__{lookup}': last_id})
+    )
+
+
+def get_page(grid, request, params=None):
+    """
+    One page of the grid for request.user, from the request's query
+    parameters (or params): cursor, page_size, sort ('load_id',
+    '-created_at'), q and the grid's filters ('all' or empty = no filter).
+
+    Returns {'rows', 'next_cursor', 'has_more', 'total', 'page_size', 'sort'},
+    total is None unless this is a first page or ?total=1 was passed.
+    """
+    config = GRIDS[grid]
+    params = request.GET if params is None else params
+
+    sort = params.get('sort') or config['default_sort']
+    field_name = sort.lstrip('-')
+    if field_name not in config['sorts']:
+        raise GridError(f'Invalid sort. Use one of: {", ".join(config["sorts"])}')
+
+    queryset = config['queryset'](request.user)
+    if config.get('prefetch'):
+        queryset = queryset.prefetch_related(*config['prefetch'])
+
+    for param, choices in config['filters'].items():
+        value = params.get(param)
+        if not value or value == 'all':
+            continue
+        if value not in choices:
+            raise GridError(f'Invalid {param}.')
+        queryset = queryset.filter(**{param: value})
+
+    term = params.get('q', '').strip()
+    if term:
+        queryset = _search(queryset, config['search'], term)
+
+    cursor = params.get('cursor')
+    total = None
+    if not cursor or params.get('total') == '1':
+        total = queryset.count()
+
+    queryset = seek(queryset, sort, cursor)
+
+    page_size = get_page_size(params)
+    # Fetch one extra row to know if there is a next page
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field_name), last.pk)
+
+    return {
+        'rows': rows,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'total': total,
+        'page_size': page_size,
+        'sort': sort,
+    }
+
+
+def get_initial_page(grid, request):
+    """get_page for the page views: bad parameters in the URL give the default first page"""
+    try:
+        return get_page(grid, request)
+    except GridError:
+        return get_page(grid, request, params=QueryDict())
+
+
+def page_state(page):
+    """The JSON-safe part of a page, for the rows endpoint and the first render"""
+    return {
+        'count': len(page['rows']),
+        'next_cursor': page['next_cursor'],
+        'has_more': page['has_more'],
+        'total': page['total'],
+        'page_size': page['page_size'],
+        'sort': page['sort'],
+    }
+
+
+def render_rows(grid, request, rows):
+    """The <tr>s of a page, same template as the page view's first render"""
+    config = GRIDS[grid]
+    return render_to_string(config['template'], {config['context_name']: rows}, request=request)
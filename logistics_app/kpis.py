@@ -0,0 +1,276 @@
+"""
+Maintained KPI counters for the admin dashboard.
+
+Every Load contributes +1 to a few (scope, metric) counters:
+    total_loads, trip_status:<status>, unassigned_loads (no driver)
+in the 'global' scope and in 'user:<created_by_id>'. Saves and deletes
+apply the difference between the old and new contribution with
+F() updates, so the dashboard reads a handful of rows instead of
+running COUNT(*) scans. Drivers and vehicles feed active_drivers /
+active_vehicles in the global scope. Each user's unread notification
+count lives in 'user:<id>' / unread_notifications.
+
+Queryset .update() calls bypass this, reconcile_kpi_counters (Celery)
+recomputes everything periodically to correct any drift.
+
+The vendor app dashboard (api_app VendorDashboardCountsDetailedView)
+is cached here too, see the section at the bottom.
+"""
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .models import KPICounter, Load, Driver, Vehicle, Notification
+
+GLOBAL_SCOPE = 'global'
+
+TOTAL_LOADS = 'total_loads'
+UNASSIGNED_LOADS = 'unassigned_loads'
+ACTIVE_DRIVERS = 'active_drivers'
+ACTIVE_VEHICLES = 'active_vehicles'
+UNREAD_NOTIFICATIONS = 'unread_notifications'
+
+# Fields of Load the counters depend on
+LOAD_KPI_FIELDS = ('trip_status', 'driver_id', 'created_by_id')
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def trip_status_metric(trip_status):
+    return f'trip_status:{trip_status}'
+
+
+def load_kpi_snapshot(load):
+    """
+    Values of the fields the counters depend on, taken from the instance
+    dict so deferred fields don't trigger a query. None if not complete.
+    """
+    values = load.__dict__
+    if load.pk is None or any(field not in values for field in LOAD_KPI_FIELDS):
+        return None
+    return tuple(values[field] for field in LOAD_KPI_FIELDS)
+
+
+def flag_snapshot(instance, field, active_value):
+    """True/False for Driver.is_active / Vehicle.status, None if deferred"""
+    if instance.pk is None or field not in instance.__dict__:
+        return None
+    return instance.__dict__[field] == active_value
+
+
+def _load_contribution(snapshot):
+    """(scope, metric) keys a load with this snapshot counts towards"""
+    if snapshot is None:
+        return Counter()
+
+    trip_status, driver_id, created_by_id = snapshot
+    metrics = [TOTAL_LOADS, trip_status_metric(trip_status)]
+    if driver_id is None:
+        metrics.append(UNASSIGNED_LOADS)
+
+    scopes = [GLOBAL_SCOPE]
+    if created_by_id is not None:
+        scopes.append(user_scope(created_by_id))
+
+    return Counter((scope, metric) for scope in scopes for metric in metrics)
+
+
+def apply_deltas(deltas):
+    """Add each non-zero delta to its counter, creating missing rows"""
+    for (scope, metric), delta in deltas.items():
+        if not delta:
+            continue
+        updated = KPICounter.objects.filter(scope=scope, metric=metric).update(value=F('value') + delta)
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                KPICounter.objects.create(scope=scope, metric=metric, value=delta)
+        except IntegrityError:
+            # Created concurrently, just add to it
+            KPICounter.objects.filter(scope=scope, metric=metric).update(value=F('value') + delta)
+
+
+def record_load_change(old_snapshot, new_snapshot):
+    """Move a load's contribution from old_snapshot to new_snapshot"""
+    if old_snapshot == new_snapshot:
+        return
+    deltas = Counter(_load_contribution(new_snapshot))
+    deltas.subtract(_load_contribution(old_snapshot))
+    apply_deltas(deltas)
+
+
+def record_loads_created(loads):
+    """Counters for loads inserted with bulk_create, which fires no signals"""
+    deltas = Counter()
+    for load in loads:
+        deltas.update(_load_contribution(load_kpi_snapshot(load)))
+    apply_deltas(deltas)
+
+
+def record_flag_change(metric, was_counted, is_counted):
+    """Driver.is_active / Vehicle.status style single-flag counters"""
+    if bool(was_counted) == bool(is_counted):
+        return
+    apply_deltas({(GLOBAL_SCOPE, metric): 1 if is_counted else -1})
+
+
+def record_unread_change(recipient_id, was_unread, is_unread):
+    """Notification created / read / deleted"""
+    if bool(was_unread) == bool(is_unread):
+        return
+    apply_deltas({(user_scope(recipient_id), UNREAD_NOTIFICATIONS): 1 if is_unread else -1})
+
+
+def record_notifications_created(notifications):
+    """Unread counters for notifications inserted with bulk_create"""
+    apply_deltas(Counter(
+        (user_scope(notification.recipient_id), UNREAD_NOTIFICATIONS)
+        for notification in notifications
+        if not notification.is_read
+    ))
+
+
+def get_unread_count(user_id):
+    """A user's unread notification count, one indexed lookup"""
+    value = KPICounter.objects.filter(
+        scope=user_scope(user_id), metric=UNREAD_NOTIFICATIONS
+    ).values_list('value', flat=True).first()
+    return max(value or 0, 0)
+
+
+def compute_counters():
+    """Recompute every counter from scratch -> {(scope, metric): value}"""
+    counts = Counter()
+
+    rows = Load.objects.values('created_by_id', 'trip_status').annotate(
+        total=Count('id'),
+        unassigned=Count('id', filter=Q(driver__isnull=True)),
+    ).order_by()
+    for row in rows:
+        scopes = [GLOBAL_SCOPE]
+        if row['created_by_id'] is not None:
+            scopes.append(user_scope(row['created_by_id']))
+        for scope in scopes:
+            counts[(scope, TOTAL_LOADS)] += row['total']
+            counts[(scope, trip_status_metric(row['trip_status']))] += row['total']
+            counts[(scope, UNASSIGNED_LOADS)] += row['unassigned']
+
+    unread = Notification.objects.filter(is_read=False).values('recipient_id').annotate(
+        total=Count('id')
+    ).order_by()
+    for row in unread:
+        counts[(user_scope(row['recipient_id']), UNREAD_NOTIFICATIONS)] = row['total']
+
+    counts[(GLOBAL_SCOPE, ACTIVE_DRIVERS)] = Driver.objects.filter(is_active=True).count()
+    counts[(GLOBAL_SCOPE, ACTIVE_VEHICLES)] = Vehicle.objects.filter(status='active').count()
+    return counts
+
+
+def reconcile_counters():
+    """
+    Overwrite the stored counters with freshly computed values.
+    Returns the number of counters that had drifted.
+    """
+    with transaction.atomic():
+        # Lock the counters first so concurrent deltas wait for us
+        stored = {
+            (counter.scope, counter.metric): counter
+            for counter in KPICounter.objects.select_for_update()
+        }
+        fresh = compute_counters()
+
+        drifted = []
+        for key, counter in stored.items():
+            value = fresh.pop(key, 0)
+            if counter.value != value:
+                counter.value = value
+                drifted.append(counter)
+        KPICounter.objects.bulk_update(drifted, ['value'])
+
+        KPICounter.objects.bulk_create([
+            KPICounter(scope=scope, metric=metric, value=value)
+            for (scope, metric), value in fresh.items()
+        ])
+
+    return len(drifted) + len(fresh)
+
+
+def get_counters(scope):
+    """All counters of one scope as {metric: value}, one query"""
+    return dict(KPICounter.objects.filter(scope=scope).values_list('metric', 'value'))
+
+
+# =========================
+# Vendor app dashboard cache
+# =========================
+# Cached counts are keyed by two version numbers: a global one bumped on
+# Load.status transitions (new_loads is shared by every vendor) and a
+# per-vendor one bumped when that vendor's LoadRequests change. Bumping a
+# version orphans the old entry, no key scanning needed. The versions also
+# make a cheap ETag without touching the database.
+
+VENDOR_DASHBOARD_TIMEOUT = 60 * 10
+
+
+def _version_key(vendor_id=None):
+    if vendor_id is None:
+        return 'vendor_dashboard:version:global'
+    return f'vendor_dashboard:version:{vendor_id}'
+
+
+def _new_version():
+    # Time based so a cache restart never reuses an old version/ETag
+    return int(time.time() * 1000)
+
+
+def bump_vendor_dashboard_version(vendor_id=None):
+    """Invalidate one vendor's cached counts, or everyone's if vendor_id is None"""
+    try:
+        cache.incr(_version_key(vendor_id))
+    except ValueError:
+        cache.set(_version_key(vendor_id), _new_version(), None)
+
+
+def bump_vendor_dashboards_on_commit(vendor_ids):
+    """
+    Per-vendor bumps after commit, for LoadRequest queryset .update()
+    calls (they fire no signals)
+    """
+    for vendor_id in set(vendor_ids):
+        transaction.on_commit(lambda vendor_id=vendor_id: bump_vendor_dashboard_version(vendor_id))
+
+
+def vendor_dashboard_versions(vendor_id):
+    """(global_version, vendor_version), creating them if missing"""
+    keys = [_version_key(), _version_key(vendor_id)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return versions[keys[0]], versions[keys[1]]
+
+
+def vendor_dashboard_etag(vendor_id):
+    global_version, vendor_version = vendor_dashboard_versions(vendor_id)
+    return f'"vd-{vendor_id}-{global_version}-{vendor_version}"'
+
+
+def get_vendor_dashboard_counts(vendor, compute):
+    """
+    Cached result of compute(vendor) -> (counts, etag).
+    compute is only called on a cache miss.
+    """
+    etag = vendor_dashboard_etag(vendor.id)
+    key = f'vendor_dashboard:counts:{etag[1:-1]}'
+    counts = cache.get(key)
+    if counts is None:
+        counts = compute(vendor)
+        cache.set(key, counts, VENDOR_DASHBOARD_TIMEOUT)
+    return counts, etag
@@ -0,0 +1,194 @@
+"""
+Vehicle lanes and new-load vendor alerts.
+
+Each vehicle's lanes (current location -> every entry of to_location)
+are stored as normalized rows in VehicleLane, kept in step by the
+Vehicle post_save signal. A new load is matched against that table with
+one indexed lookup on (destination, origin), joined to the vehicle for
+type / capacity / status, instead of looping over every vehicle.
+
+The alerts go through the push outbox (see notifications.py), so the
+dispatcher sends them in batches of up to 500 per FCM request.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import CustomUser, Load, Notification, PushOutbox, Vehicle, VehicleLane
+from .notifications import kick_push_dispatcher
+from . import kpis
+
+logger = logging.getLogger(__name__)
+
+NEW_LOAD_NOTIFICATION_TYPE = 'new_load'
+
+
+def normalize_place(value):
+    """
+    'Pune, Maharashtra, India' -> 'pune'
+
+    Only the first comma separated part is kept: vehicles list cities,
+    load addresses usually carry the state / country too.
+    """
+    if not value:
+        return ''
+    return re.sub(r'\s+', ' ', str(value).split(',')[0]).strip().lower()
+
+
+def lane_snapshot(vehicle):
+    """Fields the lanes are built from, None if any is deferred"""
+    values = vehicle.__dict__
+    if vehicle.pk is None or 'location' not in values or 'to_location' not in values:
+        return None
+    return values['location'], tuple(values['to_location'] or ())
+
+
+def build_lanes(vehicle):
+    origin = normalize_place(vehicle.location)
+    destinations = {normalize_place(place) for place in vehicle.to_location or []}
+    return [
+        VehicleLane(vehicle_id=vehicle.pk, origin=origin, destination=destination)
+        for destination in sorted(destinations)
+        if destination
+    ]
+
+
+def sync_vehicle_lanes(vehicles):
+    """Replace the lanes of the given vehicles, two queries for any number"""
+    vehicles = list(vehicles)
+    with transaction.atomic():
+        VehicleLane.objects.filter(vehicle__in=[vehicle.pk for vehicle in vehicles]).delete()
+        lanes = [lane for vehicle in vehicles for lane in build_lanes(vehicle)]
+        VehicleLane.objects.bulk_create(lanes)
+    return len(lanes)
+
+
+def rebuild_all_lanes(batch_size=1000):
+    """Recompute the whole lane table -> number of lanes"""
+    total = 0
+    vehicles = Vehicle.objects.only('id', 'location', 'to_location').order_by('id')
+    batch = []
+    for vehicle in vehicles.iterator(chunk_size=batch_size):
+        batch.append(vehicle)
+        if len(batch) >= batch_size:
+            total += sync_vehicle_lanes(batch)
+            batch = []
+    if batch:
+        total += sync_vehicle_lanes(batch)
+    return total
+
+
+def parse_weight(value):
+    """Leading number of Load.weight ('12.5 tons' -> 12.5), None if there is none"""
+    match = re.match(r'\s*(\d+(?:\.\d+)?)', str(value or ''))
+    if not match:
+        return None
+    try:
+        return Decimal(match.group(1))
+    except InvalidOperation:
+        return None
+
+
+def matching_vehicles(load):
+    """
+    Active vehicles that run the load's lane with a matching type and
+    enough capacity. Vehicles without a current location match any origin.
+    """
+    destination = normalize_place(load.drop_location)
+    if not destination:
+        return Vehicle.objects.none()
+
+    lanes = VehicleLane.objects.filter(
+        destination=destination,
+        origin__in=[normalize_place(load.pickup_location), '']
+    )
+    vehicles = Vehicle.objects.filter(
+        id__in=lanes.values('vehicle_id'),
+        status='active',
+        type__iexact=load.vehicle_type.name,
+    )
+
+    weight = parse_weight(load.weight)
+    if weight is not None:
+        vehicles = vehicles.filter(Q(load_capacity__isnull=True) | Q(load_capacity__gte=weight))
+    return vehicles
+
+
+def alert_vendors_for_load(load):
+    """
+    Notification + queued push for every vendor with a matching vehicle.
+    Returns the number of vendors alerted.
+    """
+    vendors = list(
+        CustomUser.objects.filter(
+            id__in=matching_vehicles(load).values('owner_id'),
+            role='vendor',
+            is_active=True,
+            is_blocked=False,
+        ).only('id', 'fcm_token')
+    )
+    if not vendors:
+        return 0
+
+    title = "🚚 New Load on Your Route"
+    body = f"Load #{load.load_id}: {load.pickup_location} → {load.drop_location} ({load.vehicle_type.name})"
+    data = {
+        "type": NEW_LOAD_NOTIFICATION_TYPE,
+        "load_id": str(load.id),
+        "load_number": load.load_id,
+        "click_action": "FLUTTER_NOTIFICATION_CLICK"
+    }
+
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                recipient=vendor,
+                notification_type=NEW_LOAD_NOTIFICATION_TYPE,
+                title=title,
+                message=body,
+                related_trip=load,
+                is_read=False
+            )
+            for vendor in vendors
+        ])
+        # bulk_create skips the post_save unread counter hook
+        kpis.record_notifications_created(notifications)
+        PushOutbox.objects.bulk_create([
+            PushOutbox(
+                notification=notification,
+                recipient=notification.recipient,
+                title=title,
+                body=body,
+                data=data,
+            )
+            for notification in notifications
+            if notification.recipient.fcm_token
+        ])
+        transaction.on_commit(kick_push_dispatcher)
+
+    return len(vendors)
+
+
+def alert_vendors_for_loads(load_ids):
+    """alert_vendors_for_load for each still-pending load -> total vendors alerted"""
+    loads = Load.objects.select_related('vehicle_type').filter(id__in=load_ids, status='pending')
+    return sum(alert_vendors_for_load(load) for load in loads)
+
+
+def queue_new_load_alerts(load_ids):
+    """Run the fan-out in Celery once the loads are committed"""
+    load_ids = list(load_ids)
+
+    def enqueue():
+        try:
+            from .tasks import alert_vendors_for_new_loads
+            alert_vendors_for_new_loads.delay(load_ids)
+        except Exception as e:
+            logger.warning(f"Could not queue new load alerts for {load_ids}: {e}")
+
+    if load_ids:
+        transaction.on_commit(enqueue)
@@ -0,0 +1,65 @@
+"""
+Load ID ("L-<n>") allocation backed by a PostgreSQL sequence.
+
+nextval() never hands out the same number twice, so concurrent add_load
+calls can't collide on the unique load_id, and bulk paths can reserve a
+whole block of ids in one round trip. The sequence is created by migration
+0083 and can be re-synced with existing rows by
+    python manage.py sync_load_id_sequence
+"""
+from django.db import connection
+
+LOAD_ID_PREFIX = 'L-'
+LOAD_ID_SEQUENCE = 'logistics_app_load_number_seq'
+
+# First number handed out on an empty table (matches the old default L-1001)
+FIRST_LOAD_NUMBER = 1001
+
+
+def format_load_id(number):
+    return f"{LOAD_ID_PREFIX}{number}"
+
+
+def reserve_load_numbers(count=1):
+    """Reserve `count` numbers from the sequence in one query"""
+    if count < 1:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT nextval('{LOAD_ID_SEQUENCE}') FROM generate_series(1, %s)",
+            [count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def next_load_id():
+    return format_load_id(reserve_load_numbers(1)[0])
+
+
+def assign_load_ids(loads):
+    """
+    Give every load in `loads` without a load_id a fresh one.
+    Use before Load.objects.bulk_create(), which skips Load.save().
+    """
+    missing = [load for load in loads if not load.load_id]
+    for load, number in zip(missing, reserve_load_numbers(len(missing))):
+        load.load_id = format_load_id(number)
+    return loads
+
+
+def sync_load_id_sequence():
+    """
+    Move the sequence past the highest existing L-<n>.
+    Returns (highest existing number or None, next number to be issued).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT MAX(CAST(SUBSTRING(load_id FROM %s) AS BIGINT)) "
+            "FROM logistics_app_load WHERE load_id ~ %s",
+            [len(LOAD_ID_PREFIX) + 1, f"^{LOAD_ID_PREFIX}[0-9]+$"]
+        )
+        highest = cursor.fetchone()[0]
+        next_number = max(highest + 1 if highest is not None else FIRST_LOAD_NUMBER, FIRST_LOAD_NUMBER)
+        # is_called=false: the next nextval() returns exactly next_number
+        cursor.execute(f"SELECT setval('{LOAD_ID_SEQUENCE}', %s, false)", [next_number])
+    return highest, next_number
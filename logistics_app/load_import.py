@@ -0,0 +1,306 @@
+"""
+Bulk load import from CSV / XLSX.
+
+Column names match the add_load form fields:
+    customer, vehicleType, pickupLocation, dropLocation, pickupDate,
+    dropDate, time, total_amount, customer_amount, contactPerson,
+    contactPersonName, contactPersonPhone, weight, material, notes,
+    apply_tds, assigned_traffic_person
+
+Rows are validated with the same rules as add_load (clean_load_fields is
+shared by both). Related objects are fetched with one in_bulk() per model,
+load IDs are reserved in one query and valid rows go in with bulk_create.
+"""
+import csv
+import io
+from datetime import datetime, date, time
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Load, Customer, CustomerContactPerson, VehicleType, CustomUser, TripStatusEvent
+from .load_ids import assign_load_ids
+from .canonical_locations import assign_load_places
+from .lanes import queue_new_load_alerts
+from . import kpis, filter_options
+
+MAX_IMPORT_ROWS = 5000
+DEFAULT_CHUNK_SIZE = 500
+
+# Spreadsheet line of each parsed row, for the error report
+ROW_NUMBER_KEY = '_row'
+
+
+class LoadImportError(Exception):
+    """The file itself can't be read (wrong type, missing dependency, too big)"""
+
+
+# =========================
+# Shared field validation
+# =========================
+
+def clean_load_fields(data):
+    """
+    Validate the scalar load fields from a form/row dict.
+    Returns (fields, None) or (None, error message). Same rules and
+    messages as the add_load form.
+    """
+    # Locations
+    pickup_location = (data.get('pickupLocation') or '').strip()
+    drop_location = (data.get('dropLocation') or '').strip()
+
+    if not pickup_location or not drop_location:
+        return None, 'Both pickup & drop locations are required'
+
+    # Dates
+    pickup_date_str = (data.get('pickupDate') or '').strip()
+    if not pickup_date_str:
+        return None, 'Pickup date is required'
+
+    try:
+        pickup_date = datetime.strptime(pickup_date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return None, 'Invalid pickup date format'
+
+    drop_date = None
+    drop_date_str = (data.get('dropDate') or '').strip()
+    if drop_date_str:
+        try:
+            drop_date = datetime.strptime(drop_date_str, '%Y-%m-%d').date()
+        except ValueError:
+            return None, 'Invalid drop date format'
+
+    # Time (Optional)
+    time_obj = None
+    time_str = (data.get('time') or '').strip()
+    if time_str:
+        try:
+            time_obj = datetime.strptime(time_str, '%I:%M %p').time()
+        except ValueError:
+            return None, 'Invalid time format. Use: 02:30 PM'
+
+    # Total Trip Amount
+    total_amount_str = (data.get('total_amount') or '').replace(',', '').strip()
+
+    if total_amount_str:
+        try:
+            total_amount = Decimal(total_amount_str)
+        except (InvalidOperation, ValueError):
+            return None, 'Invalid amount format'
+        if total_amount <= 0:
+            return None, 'Amount must be greater than 0'
+    else:
+        total_amount = Decimal('0.00')
+
+    # User Amount (Optional)
+    user_amount = Decimal('0.00')
+    user_amount_str = (data.get('customer_amount') or '').replace(',', '').strip()
+    if user_amount_str:
+        try:
+            user_amount = Decimal(user_amount_str).quantize(
+                Decimal('0.01'), rounding=ROUND_HALF_UP
+            )
+        except (InvalidOperation, ValueError):
+            user_amount = Decimal('0.00')
+
+    return {
+        'pickup_location': pickup_location,
+        'drop_location': drop_location,
+        'pickup_date': pickup_date,
+        'drop_date': drop_date,
+        'time': time_obj,
+        'price_per_unit': total_amount,
+        'user_amount': user_amount,
+        'contact_person_name': (data.get('contactPersonName') or '').strip() or None,
+        'contact_person_phone': (data.get('contactPersonPhone') or '').strip() or None,
+        'weight': (data.get('weight') or '').strip() or None,
+        'material': (data.get('material') or '').strip() or None,
+        'notes': (data.get('notes') or '').strip() or None,
+        'apply_tds': _is_checked(data.get('apply_tds')) and total_amount > 0,
+    }, None
+
+
+def _is_checked(value):
+    return str(value or '').strip().lower() in ('on', 'yes', 'true', '1', 'y')
+
+
+# =========================
+# File reading
+# =========================
+
+def _cell_to_str(value):
+    """Spreadsheet cell -> the string format the form would have sent"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        if value.time() == time(0, 0):
+            return value.strftime('%Y-%m-%d')
+        return value.strftime('%Y-%m-%d %I:%M %p')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, time):
+        return value.strftime('%I:%M %p')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def read_load_rows(file_obj, filename):
+    """Parse an uploaded CSV / XLSX file into a list of {column: str} dicts"""
+    name = (filename or '').lower()
+
+    if name.endswith('.csv'):
+        content = file_obj.read()
+        if isinstance(content, bytes):
+            try:
+                content = content.decode('utf-8-sig')
+            except UnicodeDecodeError:
+                raise LoadImportError('CSV file must be UTF-8 encoded')
+        reader = csv.DictReader(io.StringIO(content))
+        rows = []
+        for row in reader:
+            if not any((value or '').strip() for key, value in row.items() if key):
+                continue
+            cleaned = {key.strip(): _cell_to_str(value) for key, value in row.items() if key}
+            cleaned[ROW_NUMBER_KEY] = reader.line_num
+            rows.append(cleaned)
+    elif name.endswith('.xlsx'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise LoadImportError('XLSX import needs the openpyxl package, upload a CSV instead')
+
+        workbook = load_workbook(file_obj, read_only=True, data_only=True)
+        sheet_rows = workbook.active.iter_rows(values_only=True)
+        header = [_cell_to_str(cell) for cell in next(sheet_rows, [])]
+        rows = []
+        for line_number, values in enumerate(sheet_rows, start=2):
+            if not any(value not in (None, '') for value in values):
+                continue
+            cleaned = {key: _cell_to_str(value) for key, value in zip(header, values) if key}
+            cleaned[ROW_NUMBER_KEY] = line_number
+            rows.append(cleaned)
+        workbook.close()
+    else:
+        raise LoadImportError('Unsupported file type, upload a .csv or .xlsx file')
+
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise LoadImportError(f'Too many rows ({len(rows)}), the limit is {MAX_IMPORT_ROWS}')
+    return rows
+
+
+# =========================
+# Import
+# =========================
+
+def _int_or_none(value):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def import_loads(rows, user, dry_run=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Validate and insert load rows.
+
+    Returns {"created": [{"row", "id", "load_id"}], "errors": [{"row", "error"}]}.
+    Row numbers are spreadsheet lines (the header is line 1).
+    """
+    # One query per related model for the whole file
+    customers = Customer.objects.in_bulk(
+        {pk for pk in (_int_or_none(row.get('customer')) for row in rows) if pk}
+    )
+    vehicle_types = VehicleType.objects.in_bulk(
+        {pk for pk in (_int_or_none(row.get('vehicleType')) for row in rows) if pk}
+    )
+    contact_persons = CustomerContactPerson.objects.in_bulk(
+        {pk for pk in (_int_or_none(row.get('contactPerson')) for row in rows) if pk}
+    )
+    traffic_persons = CustomUser.objects.filter(role='traffic_person', is_active=True).in_bulk(
+        {pk for pk in (_int_or_none(row.get('assigned_traffic_person')) for row in rows) if pk}
+    )
+
+    now = timezone.now()
+    errors = []
+    valid = []
+
+    for index, row in enumerate(rows, start=2):
+        line_number = row.get(ROW_NUMBER_KEY, index)
+        if not row.get('customer'):
+            errors.append({'row': line_number, 'error': 'Customer is required'})
+            continue
+        customer = customers.get(_int_or_none(row.get('customer')))
+        if customer is None:
+            errors.append({'row': line_number, 'error': 'Invalid customer'})
+            continue
+
+        if not row.get('vehicleType'):
+            errors.append({'row': line_number, 'error': 'Vehicle type is required'})
+            continue
+        vehicle_type = vehicle_types.get(_int_or_none(row.get('vehicleType')))
+        if vehicle_type is None:
+            errors.append({'row': line_number, 'error': 'Invalid vehicle type'})
+            continue
+
+        fields, error = clean_load_fields(row)
+        if error:
+            errors.append({'row': line_number, 'error': error})
+            continue
+
+        # Contact person: explicit name/phone, else the chosen contact, else customer primary
+        contact_person_value = (row.get('contactPerson') or '').strip()
+        if contact_person_value and not fields['contact_person_name']:
+            contact = contact_persons.get(_int_or_none(contact_person_value))
+            if contact is not None and contact.customer_id == customer.id:
+                fields['contact_person_name'] = contact.name
+                fields['contact_person_phone'] = contact.phone_number
+            else:
+                fields['contact_person_name'] = customer.customer_name
+                fields['contact_person_phone'] = customer.phone_number
+
+        # Fall back to the importing user if the traffic person is invalid
+        created_by = traffic_persons.get(_int_or_none(row.get('assigned_traffic_person')), user)
+
+        fields['price_per_unit'] = fields['price_per_unit'].quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        valid.append((line_number, Load(
+            customer=customer,
+            vehicle_type=vehicle_type,
+            created_by=created_by,
+            status='pending',
+            trip_status='pending',
+            pending_at=now,
+            # bulk_create skips Load.save(), no charges or payments yet
+            balance_due=fields['price_per_unit'],
+            **fields
+        )))
+
+    if dry_run or not valid:
+        return {'created': [], 'errors': errors, 'valid_count': len(valid)}
+
+    loads = [load for _, load in valid]
+    with transaction.atomic():
+        # bulk_create skips Load.save(): IDs, counters and caches by hand
+        assign_load_ids(loads)
+        assign_load_places(loads)
+        for start in range(0, len(loads), chunk_size):
+            Load.objects.bulk_create(loads[start:start + chunk_size])
+
+        kpis.record_loads_created(loads)
+        filter_options.record_loads(loads)
+        TripStatusEvent.objects.bulk_create([
+            TripStatusEvent(load=load, to_status=load.trip_status, changed_by=user, occurred_at=now)
+            for load in loads
+        ])
+        transaction.on_commit(kpis.bump_vendor_dashboard_version)
+        queue_new_load_alerts([load.id for load in loads])
+
+    return {
+        'created': [
+            {'row': line_number, 'id': load.id, 'load_id': load.load_id}
+            for line_number, load in valid
+        ],
+        'errors': errors,
+        'valid_count': len(valid),
+    }
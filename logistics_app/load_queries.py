@@ -0,0 +1,59 @@
+"""
+Main Load (and Payment) queries of the hot web views and jobs.
+
+Kept in one place so the indexes in Load.Meta and the EXPLAIN checks in
+tests.py cover exactly what the views run. The partial indexes only
+match if the WHERE clause implies their condition, so change the filters
+here together with Load.Meta.indexes.
+"""
+from .models import Load, Payment
+
+POD_STATUSES = [
+    'unloading_completed',
+    'pod_pending',
+    'pod_received_at_office',
+    'trip_closed',
+]
+
+
+def _own_loads(user):
+    # Traffic person only sees loads they created, admin sees all
+    if user.role == 'traffic_person':
+        return Load.objects.filter(created_by=user)
+    return Load.objects.all()
+
+
+def pending_loads(user):
+    """load_list: loads still waiting for a vendor, newest first"""
+    return _own_loads(user).filter(status='pending').select_related(
+        'customer', 'vehicle_type', 'driver', 'vehicle'
+    ).order_by('-created_at')
+
+
+def open_trips(user):
+    """trip_management: assigned trips that aren't closed, last updated first"""
+    return _own_loads(user).exclude(status='pending').exclude(trip_status='trip_closed').select_related(
+        'driver', 'vehicle', 'vehicle_type', 'customer', 'created_by'
+    ).order_by('-updated_at')
+
+
+def pod_loads(user):
+    """pod_management: trips from unloading_completed onwards, newest first"""
+    return _own_loads(user).filter(trip_status__in=POD_STATUSES).select_related(
+        'customer', 'driver', 'vehicle', 'vehicle_type', 'created_by'
+    ).order_by('-created_at')
+
+
+def payments(user):
+    """payment_management: recorded payments, newest first"""
+    queryset = Payment.objects.all()
+    if user.role == 'traffic_person':
+        queryset = queryset.filter(load__created_by=user)
+    return queryset.select_related(
+        'load', 'load__customer', 'load__driver', 'load__vehicle', 'load__vehicle_type', 'recorded_by'
+    ).order_by('-payment_date')
+
+
+def unassigned_loads(created_before):
+    """delete_old_unassigned_loads: loads without a driver created before a cutoff"""
+    return Load.objects.filter(driver__isnull=True, created_at__lt=created_before)
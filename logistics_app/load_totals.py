@@ -0,0 +1,103 @@
+"""
+Maintained money totals on Load:
+
+    holding_charges   sum of the load's HoldingCharge amounts
+    total_paid        sum of the load's Payment amounts
+    balance_due       price_per_unit + holding_charges - total_paid
+
+They used to be summed when read (Load.total_trip_amount ran an
+aggregate, so did every Load.__str__). Now they are columns moved by
+every change, in the transaction of the change, with an
+UPDATE ... SET total = total + delta:
+
+    - HoldingCharge / Payment save(): by the change in amount (models.py)
+    - HoldingCharge / Payment delete: signals.py, queryset deletes too
+    - a price_per_unit edit: Load.save() recomputes balance_due
+
+Nothing reads, adds and writes back in Python, so concurrent payments
+add up, and Load.save() never writes the columns from a (possibly
+stale) instance. Changes that bypass all this, like raw SQL or a
+queryset .update() of amounts, leave drift: the verify_load_totals
+command finds it and --fix repairs it.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import HoldingCharge, Load, Payment
+
+MONEY_TOTAL_FIELDS = ['holding_charges', 'total_paid', 'balance_due']
+
+ZERO = Decimal('0.00')
+
+REPAIR_BATCH_SIZE = 1000
+
+
+def shift_totals(load_id, holding_charges=ZERO, total_paid=ZERO):
+    """Move a load's totals by the given deltas, in SQL"""
+    Load.objects.filter(pk=load_id).update(
+        holding_charges=F('holding_charges') + holding_charges,
+        total_paid=F('total_paid') + total_paid,
+        balance_due=F('balance_due') + (holding_charges - total_paid),
+        # The mobile sync picks up changed loads by updated_at
+        updated_at=timezone.now(),
+    )
+
+
+def recompute_balance(load_id):
+    """balance_due from the load's current price and totals, after a price edit"""
+    Load.objects.filter(pk=load_id).update(
+        balance_due=F('price_per_unit') + F('holding_charges') - F('total_paid')
+    )
+
+
+def _sum(model, field):
+    rows = model.objects.filter(load=OuterRef('pk')).order_by().values('load')
+    return Coalesce(
+        Subquery(rows.annotate(total=Sum(field)).values('total')),
+        Value(ZERO),
+        output_field=DecimalField(max_digits=14, decimal_places=2)
+    )
+
+
+def with_expected_totals(queryset):
+    """Annotate expected_<total> for each maintained total, summed from the rows"""
+    return queryset.annotate(
+        expected_holding_charges=_sum(HoldingCharge, 'amount'),
+        expected_total_paid=_sum(Payment, 'amount_paid'),
+    ).annotate(
+        expected_balance_due=(
+            F('price_per_unit') + F('expected_holding_charges') - F('expected_total_paid')
+        ),
+    )
+
+
+def drifted(queryset=None):
+    """Loads whose stored totals differ from their rows, expected_* annotated"""
+    if queryset is None:
+        queryset = Load.objects.all()
+    return with_expected_totals(queryset).exclude(
+        holding_charges=F('expected_holding_charges'),
+        total_paid=F('expected_total_paid'),
+        balance_due=F('expected_balance_due'),
+    )
+
+
+def repair(queryset=None):
+    """
+    Rewrite the totals of drifted loads from their rows.
+    Returns the number of loads repaired.
+    """
+    ids = list(drifted(queryset).order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), REPAIR_BATCH_SIZE):
+        with transaction.atomic():
+            loads = Load.objects.filter(pk__in=ids[start:start + REPAIR_BATCH_SIZE])
+            loads.update(
+                holding_charges=_sum(HoldingCharge, 'amount'),
+                total_paid=_sum(Payment, 'amount_paid'),
+            )
+            loads.update(balance_due=F('price_per_unit') + F('holding_charges') - F('total_paid'))
+    return len(ids)
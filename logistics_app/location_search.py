@@ -0,0 +1,98 @@
+"""
+Pickup / drop location search for the vendor load filters.
+
+Load.pickup_location and drop_location have pg_trgm GIN indexes on
+UPPER(column) (see Load.Meta, migration 0091). Both search modes use
+them:
+
+    contains   substring match, icontains compiles to
+               UPPER(column) LIKE UPPER('%term%')
+    fuzzy      trigram word similarity (UPPER(column) %> 'TERM'), so
+               'Mumbia' still finds 'Mumbai, Maharashtra'. Results are
+               ranked by how well the best term matched.
+
+On other databases (SQLite in tests) fuzzy falls back to contains,
+unranked.
+"""
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Coalesce, Greatest, Upper
+
+CONTAINS = 'contains'
+FUZZY = 'fuzzy'
+MODES = [CONTAINS, FUZZY]
+
+# pg_trgm default is 0.6, too strict for one typo in a short city name
+WORD_SIMILARITY_THRESHOLD = 0.4
+
+RANK_FIELD = 'location_rank'
+
+
+def is_fuzzy_supported():
+    return connection.vendor == 'postgresql'
+
+
+def _terms(values):
+    return [value.strip() for value in values if value and value.strip()]
+
+
+def _filter_field(queryset, field, terms, fuzzy):
+    """Filter on any of the terms -> (queryset, rank expression or None)"""
+    if not fuzzy:
+        q = Q()
+        for term in terms:
+            q |= Q(**{f'{field}__icontains': term})
+        return queryset.filter(q), None
+
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    # Same expression as the index, so the planner can use it
+    upper = f'{field}_upper'
+    queryset = queryset.alias(**{upper: Upper(field)})
+    q = Q()
+    for term in terms:
+        q |= Q(**{f'{upper}__trigram_word_similar': term.upper()})
+
+    similarities = [TrigramWordSimilarity(term.upper(), F(upper)) for term in terms]
+    rank = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+    return queryset.filter(q), rank
+
+
+def filter_locations(queryset, from_locations=(), to_locations=(), mode=CONTAINS):
+    """
+    Loads whose pickup matches any of from_locations and drop matches any
+    of to_locations. In fuzzy mode (PostgreSQL) rows are annotated with
+    location_rank and ordered best match first, then newest.
+    """
+    fuzzy = mode == FUZZY and is_fuzzy_supported()
+    ranks = []
+
+    for field, values in (('pickup_location', from_locations), ('drop_location', to_locations)):
+        terms = _terms(values)
+        if terms:
+            queryset, rank = _filter_field(queryset, field, terms, fuzzy)
+            if rank is not None:
+                ranks.append(Coalesce(rank, Value(0.0), output_field=FloatField()))
+
+    if not ranks:
+        return queryset.order_by('-created_at')
+
+    rank = ranks[0]
+    for other in ranks[1:]:
+        rank = rank + other
+    return queryset.annotate(**{RANK_FIELD: rank}).order_by(f'-{RANK_FIELD}', '-created_at')
+
+
+@contextmanager
+def search_transaction(mode):
+    """
+    Evaluate a fuzzy search in here: the %> operator reads its threshold
+    from a setting, SET LOCAL keeps it to this transaction.
+    """
+    with transaction.atomic():
+        if mode == FUZZY and is_fuzzy_supported():
+            with connection.cursor() as cursor:
+                cursor.execute(f'SET LOCAL pg_trgm.word_similarity_threshold = {WORD_SIMILARITY_THRESHOLD}')
+        yield
@@ -0,0 +1,203 @@
+"""
+Batched trip location ping ingestion.
+
+Pings are appended to TripLocationPing with one bulk insert, then the
+newest ping of each trip is copied to Load.current_location with a single
+UPDATE ... CASE statement and mirrored to VehicleLatestPosition with a
+single upsert. Load.save() is bypassed on purpose: it re-reads the row
+and would run once per ping.
+"""
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, When, Value, F, Q, CharField, DateTimeField
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Load, TripLocationPing, VehicleLatestPosition
+from . import realtime
+
+MAX_PINGS_PER_BATCH = 500
+
+# Device clocks drift, but a reading from the future is a bad timestamp
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+# Error of a ping whose trip doesn't exist or isn't the caller's, every
+# other error is a validation failure
+TRIP_NOT_FOUND = 'Trip not found'
+
+
+def _parse_ping(raw, now):
+    """Validate one raw ping -> (cleaned dict, None) or (None, error)"""
+    if not isinstance(raw, dict):
+        return None, 'Ping must be an object'
+
+    try:
+        trip_id = int(raw.get('trip_id'))
+    except (TypeError, ValueError):
+        return None, 'trip_id is required'
+
+    location = str(raw.get('location') or '').strip()
+    if not location:
+        return None, 'location is required'
+    if len(location) > 255:
+        return None, 'location is too long'
+
+    recorded_at = raw.get('recorded_at')
+    if recorded_at:
+        recorded_at = parse_datetime(str(recorded_at))
+        if recorded_at is None:
+            return None, 'Invalid recorded_at format, use ISO 8601'
+        if timezone.is_naive(recorded_at):
+            recorded_at = timezone.make_aware(recorded_at)
+        if recorded_at > now + MAX_CLOCK_SKEW:
+            return None, 'recorded_at is in the future'
+    else:
+        recorded_at = now
+
+    coordinates = {}
+    for field in ('latitude', 'longitude'):
+        value = raw.get(field)
+        if value in (None, ''):
+            coordinates[field] = None
+            continue
+        try:
+            coordinates[field] = Decimal(str(value)).quantize(Decimal('0.000001'))
+        except (InvalidOperation, ValueError):
+            return None, f'Invalid {field}'
+        limit = 90 if field == 'latitude' else 180
+        if abs(coordinates[field]) > limit:
+            return None, f'Invalid {field}'
+
+    return {
+        'trip_id': trip_id,
+        'location': location,
+        'recorded_at': recorded_at,
+        **coordinates,
+    }, None
+
+
+def ingest_location_pings(raw_pings, loads, reported_by=None):
+    """
+    Store a batch of pings.
+
+    raw_pings: list of {"trip_id", "location", "recorded_at", "latitude", "longitude"}
+    loads: Load queryset the caller may report for (permission scope)
+
+    Returns one {"index", "trip_id", "accepted", "error"} per ping, in order.
+    """
+    now = timezone.now()
+    results = []
+    parsed = []
+
+    for index, raw in enumerate(raw_pings):
+        ping, error = _parse_ping(raw, now)
+        results.append({
+            'index': index,
+            'trip_id': ping['trip_id'] if ping else (raw.get('trip_id') if isinstance(raw, dict) else None),
+            'accepted': False,
+            'error': error,
+        })
+        if ping:
+            parsed.append((index, ping))
+
+    # One query for every trip in the batch
+    trip_ids = {ping['trip_id'] for _, ping in parsed}
+    trips = {
+        trip['id']: trip
+        for trip in loads.filter(id__in=trip_ids).values(
+            'id', 'vehicle_id', 'current_location_updated_at', 'created_by_id', 'driver__owner_id'
+        )
+    }
+
+    to_insert = []
+    latest = {}
+    for index, ping in parsed:
+        trip = trips.get(ping['trip_id'])
+        if trip is None:
+            results[index]['error'] = TRIP_NOT_FOUND
+            continue
+
+        to_insert.append(TripLocationPing(
+            load_id=ping['trip_id'],
+            location=ping['location'],
+            latitude=ping['latitude'],
+            longitude=ping['longitude'],
+            recorded_at=ping['recorded_at'],
+            reported_by=reported_by,
+        ))
+        results[index]['accepted'] = True
+
+        # Only a newer reading moves the trip's current location
+        current = latest.get(ping['trip_id'])
+        last_known = trip['current_location_updated_at']
+        if (current is None or ping['recorded_at'] > current['recorded_at']) and \
+                (last_known is None or ping['recorded_at'] > last_known):
+            latest[ping['trip_id']] = ping
+
+    if not to_insert:
+        return results
+
+    with transaction.atomic():
+        # Retried pings hit the (load, recorded_at) constraint and are skipped
+        TripLocationPing.objects.bulk_create(to_insert, ignore_conflicts=True)
+
+        if latest:
+            # Re-check the timestamp in SQL so a concurrent newer write wins
+            newer = {
+                trip_id: Q(id=trip_id) & (
+                    Q(current_location_updated_at__isnull=True) |
+                    Q(current_location_updated_at__lt=ping['recorded_at'])
+                )
+                for trip_id, ping in latest.items()
+            }
+            Load.objects.filter(id__in=latest.keys()).update(
+                current_location=Case(
+                    *[When(newer[trip_id], then=Value(ping['location'])) for trip_id, ping in latest.items()],
+                    default=F('current_location'),
+                    output_field=CharField()
+                ),
+                current_location_updated_at=Case(
+                    *[When(newer[trip_id], then=Value(ping['recorded_at'])) for trip_id, ping in latest.items()],
+                    default=F('current_location_updated_at'),
+                    output_field=DateTimeField()
+                ),
+                updated_at=now,
+            )
+
+            # One row per vehicle, an upsert can't touch the same row twice
+            positions = {}
+            for trip_id, ping in latest.items():
+                vehicle_id = trips[trip_id]['vehicle_id']
+                if not vehicle_id:
+                    continue
+                existing = positions.get(vehicle_id)
+                if existing and existing.located_at >= ping['recorded_at']:
+                    continue
+                positions[vehicle_id] = VehicleLatestPosition(
+                    vehicle_id=vehicle_id,
+                    location=ping['location'],
+                    source='load',
+                    load_id=trip_id,
+                    located_at=ping['recorded_at'],
+                )
+            if positions:
+                VehicleLatestPosition.objects.bulk_create(
+                    list(positions.values()),
+                    update_conflicts=True,
+                    unique_fields=['vehicle'],
+                    update_fields=['location', 'source', 'load', 'located_at'],
+                )
+
+            # Live update for the trip board / vendor app, sent on commit
+            for trip_id, ping in latest.items():
+                realtime.publish_trip_location(
+                    trip_id,
+                    trips[trip_id]['created_by_id'],
+                    trips[trip_id]['driver__owner_id'],
+                    ping['location'],
+                    ping['recorded_at'],
+                )
+
+    return results
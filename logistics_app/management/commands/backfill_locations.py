@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from logistics_app.canonical_locations import backfill_loads, backfill_vehicles
+from logistics_app.filter_options import prune_options
+
+
+class Command(BaseCommand):
+    help = 'Map existing load and vehicle location text to canonical Location ids'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per batch')
+
+    def handle(self, *args, **options):
+        loads = backfill_loads(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Mapped {loads} load(s)'))
+
+        vehicles = backfill_vehicles(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Mapped {vehicles} vehicle(s)'))
+
+        # bulk_update skips the signals that keep the filter options current
+        added, removed = prune_options()
+        self.stdout.write(self.style.SUCCESS(f'✓ Filter options: {added} added, {removed} removed'))
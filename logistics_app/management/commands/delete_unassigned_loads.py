@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
-from logistics_app.models import Load
+from logistics_app import load_queries
 
 
 class Command(BaseCommand):
@@ -30,10 +30,7 @@ class Command(BaseCommand):
         # Find all loads with:
         # 1. No driver assigned (driver is NULL)
         # 2. Created before the cutoff date
-        unassigned_loads = Load.objects.filter(
-            driver__isnull=True,
-            created_at__lt=cutoff_date
-        ).select_related('customer')
+        unassigned_loads = load_queries.unassigned_loads(cutoff_date).select_related('customer')
         
         count = unassigned_loads.count()
         
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from logistics_app.models import CustomUser
+from logistics_app.load_import import read_load_rows, import_loads, LoadImportError, DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Bulk import loads from a CSV or XLSX file (columns as in the add load form)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the .csv or .xlsx file')
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Email or phone number of the user the loads are created by',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Rows per bulk insert (default: {DEFAULT_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without creating any loads',
+        )
+
+    def handle(self, *args, **options):
+        user = CustomUser.objects.filter(email=options['user']).first() or \
+            CustomUser.objects.filter(phone_number=options['user']).first()
+        if not user:
+            raise CommandError(f"User {options['user']} not found")
+
+        try:
+            with open(options['path'], 'rb') as file_obj:
+                rows = read_load_rows(file_obj, options['path'])
+        except FileNotFoundError:
+            raise CommandError(f"File {options['path']} not found")
+        except LoadImportError as e:
+            raise CommandError(str(e))
+
+        result = import_loads(
+            rows,
+            user,
+            dry_run=options['dry_run'],
+            chunk_size=options['chunk_size']
+        )
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"  ✗ Row {error['row']}: {error['error']}"))
+
+        if options['dry_run']:
+            self.stdout.write(
+                self.style.NOTICE(f"\n[DRY RUN] {result['valid_count']} of {len(rows)} row(s) are valid.")
+            )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(f"\n✓ Imported {len(result['created'])} of {len(rows)} load(s)!")
+        )
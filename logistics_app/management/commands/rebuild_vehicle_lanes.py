@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from logistics_app.lanes import rebuild_all_lanes
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the VehicleLane table used to match new loads to vendor vehicles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Vehicles per batch')
+
+    def handle(self, *args, **options):
+        total = rebuild_all_lanes(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {total} vehicle lane(s)'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from logistics_app.load_ids import sync_load_id_sequence, format_load_id
+
+
+class Command(BaseCommand):
+    help = 'Sync the load_id sequence with the highest existing L-<n> load ID'
+
+    def handle(self, *args, **options):
+        highest, next_number = sync_load_id_sequence()
+
+        if highest is None:
+            self.stdout.write('  • No existing L-<n> load IDs found.')
+        else:
+            self.stdout.write(f'  • Highest existing load ID: {format_load_id(highest)}')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Load ID sequence synced, next load ID will be {format_load_id(next_number)}')
+        )
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from logistics_app import trip_analytics
+
+
+def _hours(seconds):
+    return '-' if seconds is None else f'{seconds / 3600:.1f}h'
+
+
+def _date(value):
+    return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+
+
+class Command(BaseCommand):
+    help = 'Trip stage durations and SLA breaches from the trip status event log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group-by', default='all', choices=list(trip_analytics.GROUPINGS))
+        parser.add_argument('--from-stage', help='Report the time from this stage ...')
+        parser.add_argument('--to-stage', help='... to this one instead of per-stage dwell times')
+        parser.add_argument('--sla-hours', type=float, help='SLA for the --from-stage/--to-stage span')
+        parser.add_argument('--since', type=_date, help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--until', type=_date, help='YYYY-MM-DD, exclusive')
+        parser.add_argument('--last-quarter', action='store_true', help='Previous calendar quarter')
+
+    def handle(self, *args, **options):
+        start, end = options['since'], options['until']
+        if options['last_quarter']:
+            start, end = trip_analytics.last_quarter()
+
+        try:
+            if options['from_stage'] or options['to_stage']:
+                if not (options['from_stage'] and options['to_stage']):
+                    raise CommandError('--from-stage and --to-stage go together')
+                rows = trip_analytics.stage_to_stage(
+                    options['from_stage'], options['to_stage'],
+                    group_by=options['group_by'], start=start, end=end,
+                    sla_hours=options['sla_hours'],
+                )
+            else:
+                rows = trip_analytics.stage_dwell(group_by=options['group_by'], start=start, end=end)
+        except (ValueError, NotImplementedError) as e:
+            raise CommandError(str(e))
+
+        if not rows:
+            self.stdout.write(self.style.WARNING('No trip status events in this period'))
+            return
+
+        for row in rows:
+            stage = f" | {row['stage']}" if 'stage' in row else ''
+            self.stdout.write(
+                f"  • {row['group_label'] or '(none)'}{stage} | trips: {row['trips']} "
+                f"(completed {row['completed']}) | avg {_hours(row['avg_seconds'])} | "
+                f"p50 {_hours(row['p50_seconds'])} | p90 {_hours(row['p90_seconds'])} | "
+                f"p95 {_hours(row['p95_seconds'])} | SLA breaches: {row['breaches']}"
+            )
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(rows)} row(s)'))
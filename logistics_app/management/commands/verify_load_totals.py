@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from logistics_app import load_totals
+
+SHOW_LIMIT = 20
+
+
+class Command(BaseCommand):
+    help = 'Check the money totals kept on Load (holding charges, total paid, balance due) against their rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rewrite the drifted totals from the rows')
+
+    def handle(self, *args, **options):
+        drifted = load_totals.drifted()
+        count = drifted.count()
+
+        if not count:
+            self.stdout.write(self.style.SUCCESS('✓ All load money totals match their charges and payments'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'⚠ {count} load(s) with drifted money totals'))
+        for load in drifted.order_by('pk')[:SHOW_LIMIT]:
+            for field in load_totals.MONEY_TOTAL_FIELDS:
+                stored, expected = getattr(load, field), getattr(load, f'expected_{field}')
+                if stored != expected:
+                    self.stdout.write(f'  • {load.load_id} {field}: stored {stored}, expected {expected}')
+        if count > SHOW_LIMIT:
+            self.stdout.write(f'  • ... and {count - SHOW_LIMIT} more')
+
+        if options['fix']:
+            repaired = load_totals.repair()
+            self.stdout.write(self.style.SUCCESS(f'✓ Repaired the money totals of {repaired} load(s)'))
+        else:
+            self.stdout.write('  • Run with --fix to repair them')
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0077_vehicle_current_location_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(fields=['-created_at', '-id'], name='logistics_a_created_a07e2d_idx'),
+        ),
+    ]
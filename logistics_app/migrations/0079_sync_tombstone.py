@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0078_load_feed_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(choices=[('load', 'Load'), ('trip_comment', 'Trip Comment'), ('notification', 'Notification')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('recipient_user_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Sync Tombstone',
+                'verbose_name_plural': 'Sync Tombstones',
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(fields=['updated_at'], name='logistics_a_updated_2a5c98_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'created_at'], name='logistics_a_recipie_a5e177_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tripcomment',
+            index=models.Index(fields=['load', 'updated_at'], name='logistics_a_load_id_23b56e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['deleted_at'], name='logistics_a_deleted_8f9d33_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:02
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def seed_counters(apps, schema_editor):
+    """
+    Every counter from the existing rows, the same figures as
+    kpis.compute_counters (frozen here against the historical models).
+    Later saves only add deltas, so the table must start complete.
+    """
+    KPICounter = apps.get_model('logistics_app', 'KPICounter')
+    Load = apps.get_model('logistics_app', 'Load')
+    Driver = apps.get_model('logistics_app', 'Driver')
+    Vehicle = apps.get_model('logistics_app', 'Vehicle')
+    Notification = apps.get_model('logistics_app', 'Notification')
+
+    counts = Counter()
+    rows = Load.objects.values('created_by_id', 'trip_status').annotate(
+        total=Count('id'),
+        unassigned=Count('id', filter=Q(driver__isnull=True)),
+    ).order_by()
+    for row in rows:
+        scopes = ['global']
+        if row['created_by_id'] is not None:
+            scopes.append(f"user:{row['created_by_id']}")
+        for scope in scopes:
+            counts[(scope, 'total_loads')] += row['total']
+            counts[(scope, f"trip_status:{row['trip_status']}")] += row['total']
+            counts[(scope, 'unassigned_loads')] += row['unassigned']
+
+    unread = Notification.objects.filter(is_read=False).values('recipient_id').annotate(
+        total=Count('id')
+    ).order_by()
+    for row in unread:
+        counts[(f"user:{row['recipient_id']}", 'unread_notifications')] = row['total']
+
+    counts[('global', 'active_drivers')] = Driver.objects.filter(is_active=True).count()
+    counts[('global', 'active_vehicles')] = Vehicle.objects.filter(status='active').count()
+
+    KPICounter.objects.bulk_create(
+        [KPICounter(scope=scope, metric=metric, value=value) for (scope, metric), value in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0079_sync_tombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KPICounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50)),
+                ('metric', models.CharField(max_length=100)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'KPI Counter',
+                'verbose_name_plural': 'KPI Counters',
+                'constraints': [models.UniqueConstraint(fields=('scope', 'metric'), name='unique_kpi_counter')],
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
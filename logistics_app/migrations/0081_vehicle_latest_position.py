@@ -0,0 +1,69 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_positions(apps, schema_editor):
+    """Seed from the newest load location and the vehicle's own location"""
+    Load = apps.get_model('logistics_app', 'Load')
+    Vehicle = apps.get_model('logistics_app', 'Vehicle')
+    VehicleLatestPosition = apps.get_model('logistics_app', 'VehicleLatestPosition')
+
+    positions = {}
+
+    for vehicle in Vehicle.objects.filter(current_location_updated_at__isnull=False).only(
+        'id', 'location', 'current_location_updated_at'
+    ).iterator():
+        positions[vehicle.id] = VehicleLatestPosition(
+            vehicle_id=vehicle.id,
+            location=vehicle.location,
+            source='vehicle',
+            located_at=vehicle.current_location_updated_at,
+        )
+
+    latest_loads = Load.objects.filter(
+        vehicle__isnull=False,
+        current_location_updated_at__isnull=False
+    ).order_by('vehicle_id', '-current_location_updated_at').distinct('vehicle_id').only(
+        'id', 'vehicle_id', 'current_location', 'current_location_updated_at'
+    )
+    for load in latest_loads.iterator():
+        existing = positions.get(load.vehicle_id)
+        if existing and existing.located_at >= load.current_location_updated_at:
+            continue
+        positions[load.vehicle_id] = VehicleLatestPosition(
+            vehicle_id=load.vehicle_id,
+            location=load.current_location,
+            source='load',
+            load_id=load.id,
+            located_at=load.current_location_updated_at,
+        )
+
+    VehicleLatestPosition.objects.bulk_create(positions.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0080_kpi_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleLatestPosition',
+            fields=[
+                ('vehicle', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest_position', serialize=False, to='logistics_app.vehicle')),
+                ('location', models.CharField(blank=True, max_length=255, null=True)),
+                ('source', models.CharField(choices=[('load', 'Load'), ('vehicle', 'Vehicle')], max_length=10)),
+                ('located_at', models.DateTimeField()),
+                ('load', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='logistics_app.load')),
+            ],
+            options={
+                'verbose_name': 'Vehicle Latest Position',
+                'verbose_name_plural': 'Vehicle Latest Positions',
+                'indexes': [models.Index(fields=['located_at'], name='logistics_a_located_a5edb6_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_positions, migrations.RunPython.noop),
+    ]
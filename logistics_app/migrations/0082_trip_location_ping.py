@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0081_vehicle_latest_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripLocationPing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=255)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('recorded_at', models.DateTimeField(help_text='When the device took the reading')),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('load', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_pings', to='logistics_app.load')),
+                ('reported_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='location_pings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trip Location Ping',
+                'verbose_name_plural': 'Trip Location Pings',
+                'ordering': ['-recorded_at'],
+                'constraints': [models.UniqueConstraint(fields=('load', 'recorded_at'), name='unique_trip_location_ping')],
+            },
+        ),
+    ]
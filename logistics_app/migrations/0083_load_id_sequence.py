@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# Frozen copy of load_ids.sync_load_id_sequence, run on the migration's
+# own connection rather than the global default one
+LOAD_ID_SEQUENCE = 'logistics_app_load_number_seq'
+FIRST_LOAD_NUMBER = 1001
+
+
+def sync_sequence(apps, schema_editor):
+    """Move the new sequence past the highest existing L-<n>"""
+    Load = apps.get_model('logistics_app', 'Load')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT MAX(CAST(SUBSTRING(load_id FROM 3) AS BIGINT)) "
+            f"FROM {Load._meta.db_table} WHERE load_id ~ '^L-[0-9]+$'"
+        )
+        highest = cursor.fetchone()[0]
+        next_number = max(highest + 1 if highest is not None else FIRST_LOAD_NUMBER, FIRST_LOAD_NUMBER)
+        # is_called=false: the next nextval() returns exactly next_number
+        cursor.execute(f"SELECT setval('{LOAD_ID_SEQUENCE}', %s, false)", [next_number])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0082_trip_location_ping'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE SEQUENCE IF NOT EXISTS logistics_app_load_number_seq START 1001",
+            "DROP SEQUENCE IF EXISTS logistics_app_load_number_seq",
+        ),
+        migrations.RunPython(sync_sequence, migrations.RunPython.noop),
+    ]
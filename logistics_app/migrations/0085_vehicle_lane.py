@@ -0,0 +1,50 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:12
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _normalize_place(value):
+    # Frozen copy of lanes.normalize_place: 'Pune, Maharashtra' -> 'pune'
+    if not value:
+        return ''
+    return re.sub(r'\s+', ' ', str(value).split(',')[0]).strip().lower()
+
+
+def backfill_lanes(apps, schema_editor):
+    """One lane per (vehicle, to_location entry)"""
+    Vehicle = apps.get_model('logistics_app', 'Vehicle')
+    VehicleLane = apps.get_model('logistics_app', 'VehicleLane')
+
+    lanes = []
+    for vehicle in Vehicle.objects.only('id', 'location', 'to_location').iterator():
+        origin = _normalize_place(vehicle.location)
+        for destination in sorted({_normalize_place(place) for place in vehicle.to_location or []}):
+            if destination:
+                lanes.append(VehicleLane(vehicle_id=vehicle.id, origin=origin, destination=destination))
+
+    VehicleLane.objects.bulk_create(lanes, batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0084_push_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleLane',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin', models.CharField(blank=True, default='', max_length=255)),
+                ('destination', models.CharField(max_length=100)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lanes', to='logistics_app.vehicle')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['destination', 'origin'], name='logistics_a_destina_566126_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_lanes, migrations.RunPython.noop),
+    ]
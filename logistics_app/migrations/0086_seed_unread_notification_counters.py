@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:13
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def seed_unread_counters(apps, schema_editor):
+    """user:<id> / unread_notifications from the existing notifications"""
+    KPICounter = apps.get_model('logistics_app', 'KPICounter')
+    Notification = apps.get_model('logistics_app', 'Notification')
+
+    rows = Notification.objects.filter(is_read=False).values('recipient_id').annotate(
+        total=Count('id')
+    ).order_by()
+    KPICounter.objects.bulk_create(
+        [
+            KPICounter(scope=f"user:{row['recipient_id']}", metric='unread_notifications', value=row['total'])
+            for row in rows
+        ],
+        update_conflicts=True,
+        unique_fields=['scope', 'metric'],
+        update_fields=['value'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0085_vehicle_lane'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_unread_counters, migrations.RunPython.noop),
+    ]
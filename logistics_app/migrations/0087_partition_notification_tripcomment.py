@@ -0,0 +1,176 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:15
+
+from datetime import datetime, timezone as dt_timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copy of partitions.convert_to_partitioned / ensure_partitions as
+# they were when this migration was written, later edits to partitions.py
+# must not change what it does
+
+PARTITION_COLUMN = 'created_at'
+MONTHS_AHEAD = 3
+
+
+def _month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def _suffixed(name, suffix):
+    # PostgreSQL truncates identifiers at 63 bytes
+    return f'{name[:63 - len(suffix)]}{suffix}'
+
+
+def _literal(value):
+    return f"'{value.isoformat()}'"
+
+
+def _convert_to_partitioned(connection, table, column=PARTITION_COLUMN):
+    """
+    Turn a plain table into a monthly range-partitioned one, keeping the
+    existing rows in place as the first (<table>_legacy) partition, then
+    add MONTHS_AHEAD monthly partitions and a default one.
+    """
+    qn = connection.ops.quote_name
+    legacy = _suffixed(table, '_legacy')
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+        if cursor.fetchone() is not None:
+            return
+
+        cursor.execute(
+            "SELECT conrelid::regclass::text FROM pg_constraint WHERE confrelid = to_regclass(%s) AND contype = 'f'",
+            [table]
+        )
+        referencing = [row[0] for row in cursor.fetchall()]
+        if referencing:
+            raise ValueError(
+                f"Can't partition {table}: foreign keys from {', '.join(referencing)} point at it"
+            )
+
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'", [table]
+        )
+        pk_name = cursor.fetchone()[0]
+
+        cursor.execute("""
+            SELECT index_class.relname, pg_get_indexdef(pg_index.indexrelid), pg_index.indisunique
+            FROM pg_index
+            JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+            WHERE pg_index.indrelid = to_regclass(%s) AND NOT pg_index.indisprimary
+        """, [table])
+        indexes = cursor.fetchall()
+        unique = [name for name, _, is_unique in indexes if is_unique]
+        if unique:
+            raise ValueError(f"Can't partition {table}: unique indexes {unique} don't include {column}")
+
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [table]
+        )
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute(
+            "SELECT pg_get_serial_sequence(%s, 'id'), attidentity FROM pg_attribute "
+            "WHERE attrelid = to_regclass(%s) AND attname = 'id'",
+            [table, table]
+        )
+        sequence, identity = cursor.fetchone()
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {qn(table)}')
+        max_id = cursor.fetchone()[0]
+
+        # Everything up to the start of next month stays in the old table
+        boundary = _add_months(_month_start(timezone.now()), 1)
+
+        # 1. Move the old table (and its index names) out of the way
+        cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}')
+        for name, _, _ in indexes:
+            cursor.execute(f'ALTER INDEX {qn(name)} RENAME TO {qn(_suffixed(name, "_legacy"))}')
+        cursor.execute(f'ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(pk_name)}')
+        cursor.execute(f'ALTER TABLE {qn(legacy)} ADD PRIMARY KEY (id, {qn(column)})')
+        for name, _ in foreign_keys:
+            # Re-created on the parent and cloned back on attach
+            cursor.execute(f'ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(name)}')
+
+        # 2. Ids keep coming from one sequence, now owned by the parent
+        if identity:
+            cursor.execute(f'ALTER TABLE {qn(legacy)} ALTER COLUMN id DROP IDENTITY')
+            sequence = _suffixed(table, '_id_seq')
+            cursor.execute(f'CREATE SEQUENCE {qn(sequence)}')
+            cursor.execute('SELECT setval(%s::regclass, %s, false)', [sequence, max_id + 1])
+        else:
+            cursor.execute(f'ALTER TABLE {qn(legacy)} ALTER COLUMN id DROP DEFAULT')
+
+        # 3. The partitioned parent under the original name
+        cursor.execute(
+            f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ({qn(column)})'
+        )
+        cursor.execute(f'ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, {qn(column)})')
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}'::regclass)")
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {qn(table)}.id')
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}')
+
+        # 4. Attach the old rows; the CHECK lets ATTACH skip its own scan
+        check_name = _suffixed(legacy, '_bound')
+        cursor.execute(
+            f'ALTER TABLE {qn(legacy)} ADD CONSTRAINT {qn(check_name)} '
+            f'CHECK ({qn(column)} IS NOT NULL AND {qn(column)} < {_literal(boundary)})'
+        )
+        cursor.execute(
+            f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(legacy)} '
+            f'FOR VALUES FROM (MINVALUE) TO ({_literal(boundary)})'
+        )
+        cursor.execute(f'ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(check_name)}')
+
+        # 5. Same index names as before, on the parent. The renamed legacy
+        #    indexes match and get attached instead of rebuilt.
+        for _, definition, _ in indexes:
+            cursor.execute(definition)
+
+        # 6. Monthly partitions after the legacy one, and the default
+        start = boundary
+        target = _add_months(_month_start(timezone.now()), MONTHS_AHEAD + 1)
+        while start < target:
+            end = _add_months(start, 1)
+            cursor.execute(
+                f'CREATE TABLE {qn(_suffixed(table, f"_p{start:%Y%m}"))} PARTITION OF {qn(table)} '
+                f'FOR VALUES FROM ({_literal(start)}) TO ({_literal(end)})'
+            )
+            start = end
+        cursor.execute(f'CREATE TABLE {qn(_suffixed(table, "_default"))} PARTITION OF {qn(table)} DEFAULT')
+
+
+def partition_tables(apps, schema_editor):
+    """Monthly range partitions on created_at, PostgreSQL only"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model_name in ('Notification', 'TripComment'):
+        model = apps.get_model('logistics_app', model_name)
+        _convert_to_partitioned(schema_editor.connection, model._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0086_seed_unread_notification_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pushoutbox',
+            name='notification',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pushes', to='logistics_app.notification'),
+        ),
+        migrations.RunPython(partition_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_read_cursors(apps, schema_editor):
+    """
+    Carry the old shared is_read flag over for each trip's traffic person
+    and vendor, and for every admin / staff user (they read every trip's
+    chat): the cursor stops just before the first comment from someone
+    else that was still unread.
+    """
+    CustomUser = apps.get_model('logistics_app', 'CustomUser')
+    Load = apps.get_model('logistics_app', 'Load')
+    TripComment = apps.get_model('logistics_app', 'TripComment')
+    TripCommentReadCursor = apps.get_model('logistics_app', 'TripCommentReadCursor')
+
+    admin_ids = set(
+        CustomUser.objects.filter(models.Q(is_staff=True) | models.Q(role='admin')).values_list('id', flat=True)
+    )
+    participants = {
+        row['id']: admin_ids | {user_id for user_id in (row['created_by_id'], row['driver__owner_id']) if user_id}
+        for row in Load.objects.filter(comments__isnull=False).distinct().values(
+            'id', 'created_by_id', 'driver__owner_id'
+        )
+    }
+
+    cursors = {}
+    blocked = set()
+    comments = TripComment.objects.order_by('load_id', 'id').values_list('load_id', 'id', 'sender_id', 'is_read')
+    for load_id, comment_id, sender_id, is_read in comments.iterator():
+        for user_id in participants.get(load_id, ()):
+            key = (user_id, load_id)
+            if key in blocked:
+                continue
+            if sender_id != user_id and not is_read:
+                blocked.add(key)
+                continue
+            cursors[key] = comment_id
+
+    TripCommentReadCursor.objects.bulk_create(
+        [
+            TripCommentReadCursor(user_id=user_id, load_id=load_id, last_read_comment_id=comment_id)
+            for (user_id, load_id), comment_id in cursors.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0087_partition_notification_tripcomment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripCommentReadCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_comment_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tripcommentreadcursor',
+            name='load',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comment_read_cursors', to='logistics_app.load'),
+        ),
+        migrations.AddField(
+            model_name='tripcommentreadcursor',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='tripcommentreadcursor',
+            constraint=models.UniqueConstraint(fields=('user', 'load'), name='unique_trip_comment_read_cursor'),
+        ),
+        migrations.RunPython(seed_read_cursors, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='tripcomment',
+            name='is_read',
+        ),
+        migrations.AddIndex(
+            model_name='tripcomment',
+            index=models.Index(fields=['load', 'id'], name='logistics_a_load_id_f6e02a_idx'),
+        ),
+    ]
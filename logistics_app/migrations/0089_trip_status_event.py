@@ -0,0 +1,77 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+# Stage -> Load timestamp it was recorded in, in trip order. Only the first
+# entry into each stage was kept, so that is all the backfill can rebuild.
+STAGE_TIMESTAMPS = [
+    ('trip_requested', 'pending_at'),
+    ('reached_loading_point', 'loaded_at'),
+    ('upload_lr', 'lr_uploaded_at'),
+    ('in_transit', 'in_transit_at'),
+    ('reached_unloading_point', 'unloading_at'),
+    ('pod_received_at_office', 'pod_received_at'),
+    ('trip_closed', 'payment_completed_at'),
+]
+
+
+def backfill_status_events(apps, schema_editor):
+    Load = apps.get_model('logistics_app', 'Load')
+    TripStatusEvent = apps.get_model('logistics_app', 'TripStatusEvent')
+
+    fields = ['id', 'created_at'] + [field for _, field in STAGE_TIMESTAMPS]
+    events = []
+    for row in Load.objects.values(*fields).iterator(chunk_size=1000):
+        stamps = sorted(
+            (row[field] or (row['created_at'] if stage == 'trip_requested' else None), order, stage)
+            for order, (stage, field) in enumerate(STAGE_TIMESTAMPS)
+            if row[field] or stage == 'trip_requested'
+        )
+        previous = None
+        for occurred_at, _, stage in stamps:
+            events.append(TripStatusEvent(
+                load_id=row['id'],
+                from_status=previous,
+                to_status=stage,
+                occurred_at=occurred_at,
+                backfilled=True,
+            ))
+            previous = stage
+
+        if len(events) >= 1000:
+            TripStatusEvent.objects.bulk_create(events)
+            events = []
+
+    TripStatusEvent.objects.bulk_create(events)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0088_trip_comment_read_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, help_text='Empty for the first event of a load', max_length=30, null=True)),
+                ('to_status', models.CharField(max_length=30)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('backfilled', models.BooleanField(default=False, help_text='Rebuilt from the Load timestamps when the log was introduced')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('load', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='logistics_app.load')),
+            ],
+            options={
+                'verbose_name': 'Trip Status Event',
+                'verbose_name_plural': 'Trip Status Events',
+                'ordering': ['occurred_at', 'id'],
+                'indexes': [models.Index(fields=['load', 'occurred_at', 'id'], name='logistics_a_load_id_f87189_idx'), models.Index(fields=['to_status', 'occurred_at'], name='logistics_a_to_stat_ae5553_idx'), models.Index(fields=['occurred_at'], name='logistics_a_occurre_44d524_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_status_events, migrations.RunPython.noop),
+    ]
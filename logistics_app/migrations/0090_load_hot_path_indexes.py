@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0089_trip_status_event'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-created_at', '-id'], name='load_pending_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_by', '-created_at'], name='load_pending_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(condition=models.Q(models.Q(('status', 'pending'), _negated=True), models.Q(('trip_status', 'trip_closed'), _negated=True)), fields=['-updated_at'], name='load_open_trips_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(condition=models.Q(models.Q(('status', 'pending'), _negated=True), models.Q(('trip_status', 'trip_closed'), _negated=True)), fields=['created_by', '-updated_at'], name='load_open_trips_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(fields=['created_by', 'trip_status'], name='logistics_a_created_a596fc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(fields=['trip_status', '-created_at'], name='logistics_a_trip_st_3f1009_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(condition=models.Q(('driver__isnull', True)), fields=['created_at'], name='load_unassigned_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:26
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0090_load_hot_path_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='load',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('pickup_location'), name='gin_trgm_ops'), name='load_pickup_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('drop_location'), name='gin_trgm_ops'), name='load_drop_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:28
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+# Frozen copies of canonical_locations.alias_key / display_name and
+# lanes.normalize_place as they were when this migration was written
+def _alias_key(value):
+    if not value:
+        return ''
+    return re.sub(r'\s+', ' ', str(value)).strip().lower()[:255]
+
+
+def _city(value):
+    if not value:
+        return ''
+    return re.sub(r'\s+', ' ', str(value).split(',')[0]).strip().lower()
+
+
+def _display_name(value):
+    return re.sub(r'\s+', ' ', str(value).split(',')[0]).strip().title()[:255]
+
+
+def backfill_places(apps, schema_editor):
+    """Map the existing load and vehicle location text to Locations"""
+    Location = apps.get_model('logistics_app', 'Location')
+    LocationAlias = apps.get_model('logistics_app', 'LocationAlias')
+    Load = apps.get_model('logistics_app', 'Load')
+    Vehicle = apps.get_model('logistics_app', 'Vehicle')
+
+    resolved = {}
+
+    def resolve(value):
+        if value not in resolved:
+            key, city = _alias_key(value), _city(value)
+            location_id = None
+            if key and city:
+                location, _ = Location.objects.get_or_create(
+                    normalized_name=city, defaults={'name': _display_name(value)}
+                )
+                alias, _ = LocationAlias.objects.get_or_create(alias=key, defaults={'location': location})
+                location_id = alias.location_id
+            resolved[value] = location_id
+        return resolved[value]
+
+    targets = [
+        (Load, [('pickup_location', 'pickup_place'), ('drop_location', 'drop_place')]),
+        (Vehicle, [('location', 'place')]),
+    ]
+    for model, fields in targets:
+        last_id = 0
+        while True:
+            chunk = list(
+                model.objects.filter(id__gt=last_id).order_by('id')
+                .only('id', *[text_field for text_field, _ in fields])[:BACKFILL_CHUNK_SIZE]
+            )
+            if not chunk:
+                break
+            for row in chunk:
+                for text_field, place_field in fields:
+                    setattr(row, f'{place_field}_id', resolve(getattr(row, text_field)))
+            model.objects.bulk_update(chunk, [place_field for _, place_field in fields])
+            last_id = chunk[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0091_load_location_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('normalized_name', models.CharField(help_text='lanes.normalize_place of the name', max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='load',
+            name='drop_place',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='logistics_app.location'),
+        ),
+        migrations.AddField(
+            model_name='load',
+            name='pickup_place',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='logistics_app.location'),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='place',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='logistics_app.location'),
+        ),
+        migrations.CreateModel(
+            name='LocationAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=255, unique=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='logistics_app.location')),
+            ],
+            options={
+                'verbose_name_plural': 'Location aliases',
+            },
+        ),
+        migrations.RunPython(backfill_places, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:29
+
+from django.db import migrations, models
+
+
+def seed_filter_options(apps, schema_editor):
+    Load = apps.get_model('logistics_app', 'Load')
+    LoadFilterOption = apps.get_model('logistics_app', 'LoadFilterOption')
+
+    options = set()
+    for kind, field in (('pickup', 'pickup_place_id'), ('drop', 'drop_place_id'), ('capacity', 'weight')):
+        values = Load.objects.exclude(**{f'{field}__isnull': True}).values_list(field, flat=True).distinct().order_by()
+        options.update((kind, str(value)) for value in values if value != '')
+
+    LoadFilterOption.objects.bulk_create(
+        [LoadFilterOption(kind=kind, value=value) for kind, value in options],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0092_canonical_locations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoadFilterOption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('pickup', 'Pickup location'), ('drop', 'Drop location'), ('capacity', 'Load capacity')], max_length=10)),
+                ('value', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'value'), name='unique_load_filter_option')],
+            },
+        ),
+        migrations.RunPython(seed_filter_options, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0093_load_filter_options'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='load',
+            name='load_pending_owner_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='load',
+            name='load_open_trips_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='load',
+            name='load_open_trips_owner_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='load',
+            name='logistics_a_trip_st_3f1009_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='logistics_a_payment_ad0cd5_idx',
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_by', '-created_at', '-id'], name='load_pending_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(condition=models.Q(models.Q(('status', 'pending'), _negated=True), models.Q(('trip_status', 'trip_closed'), _negated=True)), fields=['-updated_at', '-id'], name='load_open_trips_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(condition=models.Q(models.Q(('status', 'pending'), _negated=True), models.Q(('trip_status', 'trip_closed'), _negated=True)), fields=['created_by', '-updated_at', '-id'], name='load_open_trips_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(fields=['trip_status', '-created_at', '-id'], name='logistics_a_trip_st_d01bb5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['-payment_date', '-id'], name='logistics_a_payment_9d9931_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:43
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def _sum(model, field):
+    rows = model.objects.filter(load=OuterRef('pk')).order_by().values('load')
+    return Coalesce(
+        Subquery(rows.annotate(total=Sum(field)).values('total')),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=14, decimal_places=2)
+    )
+
+
+def backfill_money_totals(apps, schema_editor):
+    # holding_charges was never lowered on charge deletes, recompute it too
+    Load = apps.get_model('logistics_app', 'Load')
+    HoldingCharge = apps.get_model('logistics_app', 'HoldingCharge')
+    Payment = apps.get_model('logistics_app', 'Payment')
+
+    Load.objects.update(
+        holding_charges=_sum(HoldingCharge, 'amount'),
+        total_paid=_sum(Payment, 'amount_paid'),
+    )
+    Load.objects.update(balance_due=F('price_per_unit') + F('holding_charges') - F('total_paid'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0094_grid_page_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='load',
+            name='balance_due',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Price plus holding charges minus total paid (auto-calculated)', max_digits=14, verbose_name='Balance Due'),
+        ),
+        migrations.AddField(
+            model_name='load',
+            name='total_paid',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Sum of the payments recorded for this trip (auto-calculated)', max_digits=14, verbose_name='Total Paid'),
+        ),
+        migrations.RunPython(backfill_money_totals, migrations.RunPython.noop),
+    ]
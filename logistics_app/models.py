@@ -1,6 +1,6 @@
 # models.py
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.db import models
+from django.db import models, transaction
 import re
 from decimal import Decimal, InvalidOperation
 from django.utils import timezone
@@ -8,6 +8,8 @@ from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from django.conf import settings
 from datetime import timedelta
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 
 
 class CustomUserManager(BaseUserManager):
@@ -299,6 +301,36 @@ class VehicleType(models.Model):
         return self.name
     
 
+class Location(models.Model):
+    """
+    Canonical place ('Pune') that free-text locations resolve to through
+    LocationAlias, see canonical_locations.py.
+    """
+    name = models.CharField(max_length=255)
+    normalized_name = models.CharField(
+        max_length=255, unique=True, help_text='lanes.normalize_place of the name'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class LocationAlias(models.Model):
+    """A spelling seen in the data ('pune, mh'), lowercased with whitespace collapsed"""
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='aliases')
+    alias = models.CharField(max_length=255, unique=True)
+
+    class Meta:
+        verbose_name_plural = 'Location aliases'
+
+    def __str__(self):
+        return f"{self.alias} -> {self.location_id}"
+
+
 class Vehicle(models.Model):
 
     STATUS_CHOICES = [
@@ -320,6 +352,8 @@ class Vehicle(models.Model):
     rc_doc = models.FileField(upload_to='vehicles/rc/', null=True, blank=True)
 
     location = models.CharField(max_length=255, null=True, blank=True)
+    # Canonical id of location, set on save
+    place = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     to_location = ArrayField(
         models.CharField(max_length=100),
         blank=True,
@@ -332,8 +366,50 @@ class Vehicle(models.Model):
 
     def __str__(self):
         return self.reg_no
-    
-    
+
+    def save(self, *args, **kwargs):
+        # Stamp location changes. Previous value is the post_init snapshot (signals.py)
+        location_changed = bool(self.location) and self.location != getattr(self, '_initial_location', None)
+
+        # Canonical place id (see canonical_locations.py)
+        if self.location != getattr(self, '_initial_location', None) or (self.location and not self.place_id):
+            from .canonical_locations import assign_vehicle_places
+            assign_vehicle_places([self])
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'place' not in update_fields:
+                kwargs['update_fields'] = list(update_fields) + ['place']
+
+        if location_changed:
+            self.current_location_updated_at = timezone.now()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'current_location_updated_at' not in update_fields:
+                kwargs['update_fields'] = list(update_fields) + ['current_location_updated_at']
+
+        super().save(*args, **kwargs)
+
+        if location_changed:
+            VehicleLatestPosition.record(self.pk, self.location, self.current_location_updated_at)
+        self._initial_location = self.location
+
+
+class VehicleLane(models.Model):
+    """
+    One row per (vehicle, destination) in Vehicle.to_location, with the
+    vehicle's current location as origin. Places are normalized by
+    lanes.normalize_place. Rebuilt from the Vehicle post_save signal.
+    """
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='lanes')
+    origin = models.CharField(max_length=255, blank=True, default='')
+    destination = models.CharField(max_length=100)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['destination', 'origin']),
+        ]
+
+    def __str__(self):
+        return f"{self.vehicle_id}: {self.origin or '*'} -> {self.destination}"
+
 
 class Load(models.Model):
     STATUS_CHOICES = [
@@ -405,6 +481,9 @@ class Load(models.Model):
     # Route & Schedule
     pickup_location = models.CharField(max_length=255)
     drop_location = models.CharField(max_length=255)
+    # Canonical ids of the two locations, set on save (see canonical_locations.py)
+    pickup_place = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    drop_place = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     pickup_date = models.DateField()
     drop_date = models.DateField(null=True, blank=True)
     time = models.TimeField(null=True, blank=True)
@@ -489,7 +568,7 @@ class Load(models.Model):
         help_text="Reason for putting the trip on hold"
     )
 
-    # Holding charges (kept for backward compatibility - now calculated from HoldingCharge model)
+    # Money totals, maintained from HoldingCharge / Payment rows (load_totals.py)
     holding_charges = models.DecimalField(
         max_digits=14,
         decimal_places=2,
@@ -497,7 +576,23 @@ class Load(models.Model):
         verbose_name="Total Holding Charges",
         help_text="Total additional charges for holding the shipment (auto-calculated)"
     )
-    
+
+    total_paid = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Total Paid",
+        help_text="Sum of the payments recorded for this trip (auto-calculated)"
+    )
+
+    balance_due = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Balance Due",
+        help_text="Price plus holding charges minus total paid (auto-calculated)"
+    )
+
     holding_charges_added_at = models.DateTimeField(
         null=True,
         blank=True,
@@ -520,50 +615,146 @@ class Load(models.Model):
     )
 
     def save(self, *args, **kwargs):
-        # Generate Load ID
+        # Generate Load ID from the database sequence (see load_ids.py)
         if not self.load_id:
-            last = Load.objects.order_by('-id').first()
-            if last and last.load_id and '-' in last.load_id:
-                try:
-                    num = int(last.load_id.split('-')[1]) + 1
-                except (ValueError, IndexError):
-                    num = 1001
-            else:
-                num = 1001
-            self.load_id = f"L-{num}"
+            from .load_ids import next_load_id
+            self.load_id = next_load_id()
 
         # Initial timestamp
         if not self.pk and not self.pending_at:
             self.pending_at = timezone.now()
 
         # Auto-update current_location_updated_at when current_location changes
-        if self.pk:
-            # This is an existing record, check if current_location changed
-            try:
-                old_instance = Load.objects.get(pk=self.pk)
-                if old_instance.current_location != self.current_location and self.current_location:
-                    # Current location has changed, update the timestamp
-                    self.current_location_updated_at = timezone.now()
-                    print(f"✓ Updated current_location_updated_at for Load {self.load_id}: {self.current_location_updated_at}")
-            except Load.DoesNotExist:
-                pass
+        # (old value comes from the snapshot taken in from_db, no extra SELECT)
+        if self.pk and not self._state.adding:
+            dirty_fields = self.get_dirty_fields()
+            location_changed = bool(self.current_location) and (
+                dirty_fields is None or 'current_location' in dirty_fields
+            )
         else:
-            # This is a new record
-            if self.current_location:
-                # Set timestamp if current_location is provided
-                self.current_location_updated_at = timezone.now()
-                print(f"✓ Set current_location_updated_at for NEW Load {self.load_id}: {self.current_location_updated_at}")
+            # New record, set timestamp if current_location is provided
+            location_changed = bool(self.current_location)
+        if location_changed:
+            self.current_location_updated_at = timezone.now()
+
+        # Canonical location ids when a location is new or edited
+        # (no snapshot: assume they changed, an empty dirty list means nothing did)
+        place_fields = {'pickup_location', 'drop_location'}
+        dirty_fields = self.get_dirty_fields()
+        if self._state.adding or dirty_fields is None or not place_fields.isdisjoint(dirty_fields):
+            from .canonical_locations import assign_load_places
+            assign_load_places([self])
 
         # Round price_per_unit
         if self.price_per_unit is not None:
             self.price_per_unit = self.price_per_unit.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
-        super().save(*args, **kwargs)
+        # Existing row with a snapshot: only write what changed
+        if kwargs.get('update_fields') is None and not kwargs.get('force_insert') and not self._state.adding:
+            dirty_fields = self.get_dirty_fields()
+            if dirty_fields is not None:
+                kwargs['update_fields'] = dirty_fields
+
+        # The money totals only move in SQL (load_totals.py), never write
+        # them from this possibly stale instance
+        from .load_totals import MONEY_TOTAL_FIELDS, recompute_balance
+        if self._state.adding:
+            self.balance_due = self.price_per_unit + self.holding_charges - self.total_paid
+            balance_stale = False
+        elif not kwargs.get('force_insert'):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            kwargs['update_fields'] = [field for field in update_fields if field not in MONEY_TOTAL_FIELDS]
+            balance_stale = 'price_per_unit' in kwargs['update_fields']
+        else:
+            balance_stale = False
+
+        # Partial saves must still bump updated_at, the mobile sync relies on it
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            extra_fields = ['updated_at']
+            if location_changed:
+                extra_fields.append('current_location_updated_at')
+            kwargs['update_fields'] = list(update_fields) + [f for f in extra_fields if f not in update_fields]
+
+        # Atomic so the dashboard KPI counters (post_save, see signals.py)
+        # move together with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # Keep the vehicle inventory's latest position in step
+            if location_changed and self.vehicle_id:
+                VehicleLatestPosition.record(
+                    self.vehicle_id,
+                    self.current_location,
+                    self.current_location_updated_at,
+                    load_id=self.pk
+                )
+
+            if balance_stale:
+                recompute_balance(self.pk)
+                self.refresh_from_db(fields=['balance_due'])
+
+        self._take_snapshot()
+
+    # =========================
+    # Dirty-field tracking
+    # =========================
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._take_snapshot()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Also called when a deferred field is first accessed, only
+        # re-snapshot what was actually read so pending edits stay dirty
+        self._take_snapshot(fields)
+
+    def _take_snapshot(self, fields=None):
+        """Remember the column values as they are in the database"""
+        if fields is None or getattr(self, '_loaded_values', None) is None:
+            self._loaded_values = {}
+        for field in self._meta.concrete_fields:
+            if fields is not None and field.name not in fields and field.attname not in fields:
+                continue
+            if field.attname in self.__dict__:
+                self._loaded_values[field.attname] = self.__dict__[field.attname]
+
+    def get_dirty_fields(self):
+        """
+        Names of fields changed since the instance was loaded or saved,
+        or None if there is no snapshot (unsaved or built by hand).
+        """
+        loaded_values = getattr(self, '_loaded_values', None)
+        if loaded_values is None:
+            return None
+
+        dirty = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            current = self.__dict__[field.attname]
+            if field.attname not in loaded_values:
+                # Not read from the database (e.g. set on a deferred field), write it
+                dirty.append(field.name)
+            elif isinstance(field, models.FileField):
+                # A new upload isn't committed to storage yet
+                if not getattr(current, '_committed', True) or current != loaded_values[field.attname]:
+                    dirty.append(field.name)
+            elif current != loaded_values[field.attname]:
+                dirty.append(field.name)
+        return dirty
 
     def update_trip_status(self, new_status, user=None, lr_number=None, tracking_details=None, send_notification=True):
         """Update trip status and send notifications"""
         previous_status = self.trip_status
         self.trip_status = new_status
+        # Picked up by the status event log (signals.py)
+        self._status_changed_by = user
 
         timestamp_fields = {
             'trip_requested': 'pending_at',
@@ -611,39 +802,42 @@ class Load(models.Model):
         elif new_status == 'trip_closed':
             self.status = 'delivered'
 
-        # Save the model
-        self.save()
+        # Status change, Notification and pending push commit together,
+        # the push itself is sent by the outbox worker
+        with transaction.atomic():
+            # Save the model
+            self.save()
 
-        # Send notification to vendor if requested and vendor exists
-        if send_notification and self.driver and hasattr(self.driver, 'owner') and self.driver.owner:
-            try:
-                # Import here to avoid circular imports
-                from .notifications import send_trip_status_update_notification
+            # Send notification to vendor if requested and vendor exists
+            if send_notification and self.driver and hasattr(self.driver, 'owner') and self.driver.owner:
+                try:
+                    # Import here to avoid circular imports
+                    from .notifications import send_trip_status_update_notification
                 
-                # Determine if triggered by admin
-                triggered_by_admin = bool(user and (user.is_staff or user.role in ['admin', 'traffic_person']))
+                    # Determine if triggered by admin
+                    triggered_by_admin = bool(user and (user.is_staff or user.role in ['admin', 'traffic_person']))
                 
-                # Send notification
-                notification, success = send_trip_status_update_notification(
-                    vendor=self.driver.owner,
-                    load=self,
-                    previous_status=previous_status,
-                    new_status=new_status,
-                    triggered_by_admin=triggered_by_admin
-                )
+                    # Send notification
+                    notification, success = send_trip_status_update_notification(
+                        vendor=self.driver.owner,
+                        load=self,
+                        previous_status=previous_status,
+                        new_status=new_status,
+                        triggered_by_admin=triggered_by_admin
+                    )
                 
-                # Log the result
-                import logging
-                logger = logging.getLogger(__name__)
-                if success:
-                    logger.info(f"✅ Notification sent for load {self.load_id}: {previous_status} -> {new_status}")
-                else:
-                    logger.warning(f"⚠️ Notification failed for load {self.load_id}: {previous_status} -> {new_status}")
+                    # Log the result
+                    import logging
+                    logger = logging.getLogger(__name__)
+                    if success:
+                        logger.info(f"✅ Notification sent for load {self.load_id}: {previous_status} -> {new_status}")
+                    else:
+                        logger.warning(f"⚠️ Notification failed for load {self.load_id}: {previous_status} -> {new_status}")
                     
-            except ImportError as e:
-                print(f"❌ Cannot import notifications module: {e}")
-            except Exception as e:
-                print(f"❌ Error sending status update notification for load {self.load_id}: {e}")
+                except ImportError as e:
+                    print(f"❌ Cannot import notifications module: {e}")
+                except Exception as e:
+                    print(f"❌ Error sending status update notification for load {self.load_id}: {e}")
 
         return True
 
@@ -654,31 +848,32 @@ class Load(models.Model):
         self.assigned_at = timezone.now()
         self.status = 'assigned'
         
-        # Save the model first
-        self.save()
+        with transaction.atomic():
+            # Save the model first
+            self.save()
         
-        # Update trip status to 'pending' (first status after assignment) WITHOUT notification
-        # Send assignment notification separately
-        try:
-            from .notifications import send_trip_assigned_notification
-            notification, success = send_trip_assigned_notification(
-                vendor=vendor,
-                load=self,
-                vehicle=vehicle,
-                driver=driver
-            )
+            # Update trip status to 'pending' (first status after assignment) WITHOUT notification
+            # Send assignment notification separately
+            try:
+                from .notifications import send_trip_assigned_notification
+                notification, success = send_trip_assigned_notification(
+                    vendor=vendor,
+                    load=self,
+                    vehicle=vehicle,
+                    driver=driver
+                )
             
-            import logging
-            logger = logging.getLogger(__name__)
-            if success:
-                logger.info(f"✅ Assignment notification sent for load {self.load_id}")
-            else:
-                logger.warning(f"⚠️ Assignment notification failed for load {self.load_id}")
+                import logging
+                logger = logging.getLogger(__name__)
+                if success:
+                    logger.info(f"✅ Assignment notification sent for load {self.load_id}")
+                else:
+                    logger.warning(f"⚠️ Assignment notification failed for load {self.load_id}")
                 
-        except ImportError as e:
-            print(f"❌ Cannot import notifications module: {e}")
-        except Exception as e:
-            print(f"❌ Error sending assignment notification: {e}")
+            except ImportError as e:
+                print(f"❌ Cannot import notifications module: {e}")
+            except Exception as e:
+                print(f"❌ Error sending assignment notification: {e}")
             
         return self
 
@@ -693,16 +888,13 @@ class Load(models.Model):
         return f"₹{self.total_trip_amount:,.2f}"
     
     def get_total_holding_charges(self):
-        """Calculate total holding charges from all HoldingCharge entries"""
-        total = self.holding_charge_entries.aggregate(
-            total=models.Sum('amount')
-        )['total'] or Decimal('0.00')
-        return Decimal(str(total)).quantize(Decimal('0.01'))
+        """Total of all HoldingCharge entries (the maintained holding_charges column)"""
+        return Decimal(str(self.holding_charges or 0)).quantize(Decimal('0.01'))
     
-    def update_holding_charges_total(self):
-        """Update the holding_charges field based on HoldingCharge entries"""
-        self.holding_charges = self.get_total_holding_charges()
-        self.save(update_fields=['holding_charges'])
+    def refresh_money_totals(self):
+        """Re-read holding_charges, total_paid and balance_due after charges / payments changed"""
+        from .load_totals import MONEY_TOTAL_FIELDS
+        self.refresh_from_db(fields=MONEY_TOTAL_FIELDS + ['updated_at'])
 
     def get_vendor(self):
         """Get the vendor assigned to this load"""
@@ -733,13 +925,98 @@ class Load(models.Model):
         ordering = ['-created_at']
         verbose_name = "Load"
         verbose_name_plural = "Loads"
+        indexes = [
+            # Keyset pagination of the vendor load feed
+            models.Index(fields=['-created_at', '-id']),
+            # Range scans from the mobile sync endpoint
+            models.Index(fields=['updated_at']),
+            # The partial indexes below match the filters in load_queries.py,
+            # EXPLAIN checks in tests.py
+            # load_list: pending loads, newest first
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(status='pending'),
+                name='load_pending_created_idx',
+            ),
+            models.Index(
+                fields=['created_by', '-created_at', '-id'],
+                condition=models.Q(status='pending'),
+                name='load_pending_owner_idx',
+            ),
+            # trip_management: assigned, not closed, last updated first.
+            # id is the tie-breaker of the grid pages (grids.py)
+            models.Index(
+                fields=['-updated_at', '-id'],
+                condition=~models.Q(status='pending') & ~models.Q(trip_status='trip_closed'),
+                name='load_open_trips_idx',
+            ),
+            models.Index(
+                fields=['created_by', '-updated_at', '-id'],
+                condition=~models.Q(status='pending') & ~models.Q(trip_status='trip_closed'),
+                name='load_open_trips_owner_idx',
+            ),
+            # pod_management and the by-status APIs
+            models.Index(fields=['created_by', 'trip_status']),
+            models.Index(fields=['trip_status', '-created_at', '-id']),
+            # delete_old_unassigned_loads
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(driver__isnull=True),
+                name='load_unassigned_idx',
+            ),
+            # Location search (icontains and trigram similarity, see
+            # location_search.py), needs the pg_trgm extension
+            GinIndex(OpClass(Upper('pickup_location'), name='gin_trgm_ops'), name='load_pickup_trgm_idx'),
+            GinIndex(OpClass(Upper('drop_location'), name='gin_trgm_ops'), name='load_drop_trgm_idx'),
+        ]
 
 
-class HoldingCharge(models.Model):
+class LoadTotalEntry:
+    """
+    Mixin for rows summed into one of the maintained Load money totals
+    (see load_totals.py). save() moves the load's total by the change in
+    amount, in the same transaction. Deletes are handled in signals.py.
+    """
+    amount_field = None
+    total_field = None
+
+    def save(self, *args, **kwargs):
+        from .load_totals import shift_totals
+
+        field = self._meta.get_field(self.amount_field)
+        amount = field.to_python(getattr(self, self.amount_field))
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                # Locked so concurrent edits of this row shift the total in turn
+                previous = type(self).objects.select_for_update().filter(pk=self.pk).values_list(
+                    'load_id', self.amount_field
+                ).first()
+
+            super().save(*args, **kwargs)
+
+            if previous is None:
+                shift_totals(self.load_id, **{self.total_field: amount})
+            elif previous[0] != self.load_id:
+                shift_totals(previous[0], **{self.total_field: -previous[1]})
+                shift_totals(self.load_id, **{self.total_field: amount})
+            elif amount != previous[1]:
+                shift_totals(self.load_id, **{self.total_field: amount - previous[1]})
+
+        # Callers read the totals off the load they passed in
+        load = self._state.fields_cache.get('load')
+        if load is not None:
+            load.refresh_money_totals()
+
+
+class HoldingCharge(LoadTotalEntry, models.Model):
     """
     Model to track individual holding charges applied to a load/trip.
     Each charge includes the amount, stage it was applied, and the reason.
     """
+    amount_field = 'amount'
+    total_field = 'holding_charges'
+
     load = models.ForeignKey(
         Load,
         on_delete=models.CASCADE,
@@ -793,12 +1070,47 @@ class HoldingCharge(models.Model):
     
     def __str__(self):
         return f"₹{self.amount} - {self.load.load_id} - {self.trip_stage} - {self.created_at.strftime('%Y-%m-%d')}"
-    
+
+
+class TripStatusEvent(models.Model):
+    """
+    Append-only log of Load.trip_status transitions, one row per change,
+    written by the Load post_save signal (see signals.py). Unlike the
+    *_at timestamps on Load it keeps holds, re-entries and skipped
+    stages. Stage durations are computed from it in trip_analytics.py.
+    """
+    load = models.ForeignKey(Load, on_delete=models.CASCADE, related_name='status_events')
+    from_status = models.CharField(max_length=30, blank=True, null=True, help_text='Empty for the first event of a load')
+    to_status = models.CharField(max_length=30)
+    changed_by = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    occurred_at = models.DateTimeField(default=timezone.now)
+    backfilled = models.BooleanField(
+        default=False,
+        help_text='Rebuilt from the Load timestamps when the log was introduced'
+    )
+
+    class Meta:
+        ordering = ['occurred_at', 'id']
+        verbose_name = 'Trip Status Event'
+        verbose_name_plural = 'Trip Status Events'
+        indexes = [
+            # Per-trip timeline, the window functions partition on load
+            models.Index(fields=['load', 'occurred_at', 'id']),
+            # Entries into one stage over a period
+            models.Index(fields=['to_status', 'occurred_at']),
+            models.Index(fields=['occurred_at']),
+        ]
+
     def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Trip status events are append-only")
         super().save(*args, **kwargs)
-        # Update the load's total holding charges whenever a charge is added/updated
-        if self.load:
-            self.load.update_holding_charges_total()
+
+    def __str__(self):
+        return f"{self.load_id}: {self.from_status or '-'} -> {self.to_status} at {self.occurred_at}"
+
 
 class TDSRate(models.Model):
     rate = models.DecimalField(
@@ -884,11 +1196,6 @@ class TripComment(models.Model):
         help_text='When the comment was last updated'
     )
     
-    is_read = models.BooleanField(
-        default=False,
-        help_text='Whether the comment has been read by the recipient'
-    )
-    
     class Meta:
         ordering = ['created_at']
         verbose_name = 'Trip Comment'
@@ -896,6 +1203,8 @@ class TripComment(models.Model):
         indexes = [
             models.Index(fields=['load', 'created_at']),
             models.Index(fields=['sender', 'created_at']),
+            models.Index(fields=['load', 'updated_at']),
+            models.Index(fields=['load', 'id']),
         ]
     
     def __str__(self):
@@ -911,6 +1220,35 @@ class TripComment(models.Model):
         super().save(*args, **kwargs)
 
 
+class TripCommentReadCursor(models.Model):
+    """
+    How far a user has read a trip's chat: every comment with
+    id <= last_read_comment_id counts as read for them. Written with a
+    single upsert, see comment_reads.py.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    load = models.ForeignKey(
+        'Load',
+        on_delete=models.CASCADE,
+        related_name='comment_read_cursors'
+    )
+    # Plain id, TripComment is partitioned and can't be a FK target
+    last_read_comment_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'load'], name='unique_trip_comment_read_cursor'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} read {self.load_id} up to {self.last_read_comment_id}"
+
+
 class Notification(models.Model):
     NOTIFICATION_TYPES = [
         ('trip_reassigned', 'Trip Reassigned'),
@@ -939,20 +1277,73 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.recipient.full_name}"
 
     def mark_as_read(self):
+        # Conditional UPDATE keeps the unread counter exact under concurrency
+        from .notifications import mark_notifications_read
+        mark_notifications_read(self.recipient_id, [self.pk])
         self.is_read = True
-        self.save()
+        self._kpi_unread = False
 
 
-class Payment(models.Model):
+class PushOutbox(models.Model):
+    """
+    Pending FCM push, written in the same transaction as its Notification
+    and sent later by the dispatch_push_notifications Celery task.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    # No DB constraint: Notification is partitioned (see partitions.py)
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='pushes',
+        db_constraint=False
+    )
+    recipient = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    title = models.CharField(max_length=255)
+    body = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"Push to {self.recipient_id} ({self.status})"
+
+
+class Payment(LoadTotalEntry, models.Model):
     """
     Model to track individual payments made for a load/trip.
     Each payment record stores amount paid, date/time, and description.
     """
+    amount_field = 'amount_paid'
+    total_field = 'total_paid'
+
     load = models.ForeignKey(
         Load,
         on_delete=models.CASCADE,
@@ -1002,9 +1393,183 @@ class Payment(models.Model):
         verbose_name_plural = 'Payments'
         indexes = [
             models.Index(fields=['load', 'payment_date']),
-            models.Index(fields=['payment_date']),
+            # payment_management grid pages (grids.py)
+            models.Index(fields=['-payment_date', '-id']),
         ]
     
     def __str__(self):
         return f"₹{self.amount_paid} - {self.load.load_id} - {self.payment_date.strftime('%Y-%m-%d')}"
 
+
+
+class SyncTombstone(models.Model):
+    """
+    Record of a deleted row so the mobile sync endpoint can tell clients
+    to drop it. Written by post_delete signals (see signals.py), which
+    also fire for queryset deletes like delete_old_unassigned_loads.
+    """
+    OBJECT_TYPE_CHOICES = [
+        ('load', 'Load'),
+        ('trip_comment', 'Trip Comment'),
+        ('notification', 'Notification'),
+    ]
+
+    object_type = models.CharField(max_length=20, choices=OBJECT_TYPE_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    # Only set for rows that belong to one user (notifications).
+    # Plain id, not a FK: the user may be deleted in the same transaction
+    recipient_user_id = models.PositiveBigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['deleted_at']
+        verbose_name = 'Sync Tombstone'
+        verbose_name_plural = 'Sync Tombstones'
+        indexes = [
+            models.Index(fields=['deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.object_type} #{self.object_id} deleted {self.deleted_at.strftime('%Y-%m-%d %H:%M')}"
+
+
+class KPICounter(models.Model):
+    """
+    Precomputed dashboard counter, one row per (scope, metric).
+    scope is 'global' or 'user:<id>' (loads created by that user).
+    Kept up to date by logistics_app.kpis and corrected by the
+    reconcile_kpi_counters task.
+    """
+    scope = models.CharField(max_length=50)
+    metric = models.CharField(max_length=100)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'KPI Counter'
+        verbose_name_plural = 'KPI Counters'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'metric'], name='unique_kpi_counter'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} / {self.metric} = {self.value}"
+
+
+class LoadFilterOption(models.Model):
+    """
+    One value offered by the vendor app load filters: a pickup / drop
+    Location id or a load capacity (Load.weight). Added as loads are
+    saved, pruned by the prune_load_filter_options task, served from
+    the cache by logistics_app.filter_options.
+    """
+    KIND_CHOICES = [
+        ('pickup', 'Pickup location'),
+        ('drop', 'Drop location'),
+        ('capacity', 'Load capacity'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    value = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'value'], name='unique_load_filter_option'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.value}"
+
+
+class VehicleLatestPosition(models.Model):
+    """
+    Latest known position of a vehicle, from either its trip's
+    Load.current_location or Vehicle.location, whichever changed last.
+    One row per vehicle so vehicle_inventory reads it with one range
+    query on located_at instead of a Load lookup per vehicle.
+    """
+    SOURCE_CHOICES = [
+        ('load', 'Load'),
+        ('vehicle', 'Vehicle'),
+    ]
+
+    vehicle = models.OneToOneField(
+        Vehicle,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='latest_position'
+    )
+    location = models.CharField(max_length=255, null=True, blank=True)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    load = models.ForeignKey(
+        Load,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    located_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Vehicle Latest Position'
+        verbose_name_plural = 'Vehicle Latest Positions'
+        indexes = [
+            models.Index(fields=['located_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.vehicle_id} @ {self.location} ({self.located_at.strftime('%Y-%m-%d %H:%M')})"
+
+    @classmethod
+    def record(cls, vehicle_id, location, located_at, load_id=None):
+        """Upsert the vehicle's position in one query"""
+        cls.objects.bulk_create(
+            [cls(
+                vehicle_id=vehicle_id,
+                location=location,
+                source='load' if load_id else 'vehicle',
+                load_id=load_id,
+                located_at=located_at or timezone.now(),
+            )],
+            update_conflicts=True,
+            unique_fields=['vehicle'],
+            update_fields=['location', 'source', 'load', 'located_at'],
+        )
+
+
+class TripLocationPing(models.Model):
+    """
+    Append-only history of location pings reported for a trip.
+    Rows are only ever inserted (see logistics_app.locations); the latest
+    one is mirrored onto Load.current_location.
+    """
+    load = models.ForeignKey(
+        Load,
+        on_delete=models.CASCADE,
+        related_name='location_pings'
+    )
+    location = models.CharField(max_length=255)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    recorded_at = models.DateTimeField(help_text='When the device took the reading')
+    received_at = models.DateTimeField(auto_now_add=True)
+    reported_by = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='location_pings'
+    )
+
+    class Meta:
+        ordering = ['-recorded_at']
+        verbose_name = 'Trip Location Ping'
+        verbose_name_plural = 'Trip Location Pings'
+        constraints = [
+            # Also makes client retries idempotent
+            models.UniqueConstraint(fields=['load', 'recorded_at'], name='unique_trip_location_ping'),
+        ]
+
+    def __str__(self):
+        return f"Load #{self.load_id} @ {self.location} ({self.recorded_at.strftime('%Y-%m-%d %H:%M')})"
@@ -1,18 +1,179 @@
 # notifications.py
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
 from .firebase_service import FirebaseService
-from .models import Notification
+from .models import Notification, PushOutbox
+from . import kpis
 import logging
 
 logger = logging.getLogger(__name__)
 
-def _send_notification(fcm_token, title, body, data):
-    """Helper function to send notification"""
-    success = False
-    if fcm_token:
-        success = FirebaseService.send_push_notification(fcm_token, title, body, data)
-    else:
-        logger.warning(f"No FCM token stored")
-    return success
+# Retry schedule for failed pushes: 30s, 1m, 2m, 4m ... capped at 1h
+PUSH_RETRY_BASE = timedelta(seconds=30)
+PUSH_RETRY_MAX = timedelta(hours=1)
+MAX_PUSH_ATTEMPTS = 8
+
+# How long a claimed push is left alone while its batch is being sent,
+# well above an FCM request (firebase_admin times out after 120s)
+PUSH_LEASE = timedelta(minutes=5)
+
+
+def kick_push_dispatcher():
+    """Wake the dispatcher now instead of waiting for the next beat run"""
+    try:
+        from .tasks import dispatch_push_notifications
+        dispatch_push_notifications.delay()
+    except Exception as e:
+        # The periodic run will pick the push up
+        logger.warning(f"Could not queue push dispatcher: {e}")
+
+
+def _create_notification(recipient, notification_type, title, body, load, data):
+    """
+    Create the Notification row and, if the recipient has a device, its
+    pending push in the same transaction. Nothing is sent here, FCM is
+    called by the dispatch_push_notifications worker after commit.
+
+    Returns (notification, queued)
+    """
+    with transaction.atomic():
+        notification = Notification.objects.create(
+            recipient=recipient,
+            notification_type=notification_type,
+            title=title,
+            message=body,
+            related_trip=load,
+            is_read=False
+        )
+
+        if not recipient.fcm_token:
+            logger.warning(f"No FCM token stored")
+            return notification, False
+
+        PushOutbox.objects.create(
+            notification=notification,
+            recipient=recipient,
+            title=title,
+            body=body,
+            data=data,
+        )
+        transaction.on_commit(kick_push_dispatcher)
+
+    return notification, True
+
+
+def mark_notifications_read(recipient_id, notification_ids=None):
+    """
+    Mark a user's unread notifications (all, or just notification_ids) as
+    read. Only rows that were actually unread are counted, so concurrent
+    calls can't decrement the unread counter twice.
+
+    Returns the number of notifications marked.
+    """
+    with transaction.atomic():
+        notifications = Notification.objects.filter(recipient_id=recipient_id, is_read=False)
+        if notification_ids is not None:
+            notifications = notifications.filter(id__in=notification_ids)
+        updated_count = notifications.update(is_read=True)
+        if updated_count:
+            kpis.apply_deltas({
+                (kpis.user_scope(recipient_id), kpis.UNREAD_NOTIFICATIONS): -updated_count
+            })
+    return updated_count
+
+
+def _retry_at(attempts, now):
+    return now + min(PUSH_RETRY_BASE * (2 ** (attempts - 1)), PUSH_RETRY_MAX)
+
+
+def _claim_pushes(batch_size):
+    """
+    Lock a batch of due pushes, count the attempt and push next_attempt_at
+    out by PUSH_LEASE so other workers leave them alone while we send.
+    Pushes whose recipient has no token are failed right here.
+
+    Returns (sendable, failed)
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        pushes = list(
+            PushOutbox.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('recipient')
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+
+        sendable, failed = [], []
+        for push in pushes:
+            push.attempts += 1
+            if push.recipient.fcm_token:
+                # A worker dying mid-send leaves the lease to expire, the
+                # push is retried then
+                push.next_attempt_at = now + PUSH_LEASE
+                sendable.append(push)
+            else:
+                # Logged out since the push was queued
+                push.status = 'failed'
+                push.last_error = 'No FCM token stored'
+                failed.append(push)
+
+        PushOutbox.objects.bulk_update(pushes, ['status', 'attempts', 'next_attempt_at', 'last_error'])
+    return sendable, failed
+
+
+def dispatch_pending_pushes(batch_size=FirebaseService.MAX_BATCH_SIZE, send_batch=None):
+    """
+    Send one batch of due pushes with a single FCM request.
+
+    The batch is claimed in a short transaction (SKIP LOCKED, so several
+    workers can drain the outbox in parallel), sent with no transaction
+    or row locks held, and the results are written in a second short
+    transaction. send_batch defaults to FirebaseService.send_batch and
+    can be swapped for a stub.
+
+    Returns {"sent", "failed", "retried"} counts for the batch.
+    """
+    send_batch = send_batch or FirebaseService.send_batch
+    batch_size = min(batch_size, FirebaseService.MAX_BATCH_SIZE)
+
+    sendable, failed = _claim_pushes(batch_size)
+    counts = {'sent': 0, 'failed': len(failed), 'retried': 0}
+    if not sendable:
+        return counts
+
+    results = send_batch([
+        FirebaseService.build_message(push.recipient.fcm_token, push.title, push.body, push.data)
+        for push in sendable
+    ])
+    if results is None:
+        # Firebase unavailable, retry the whole batch
+        results = [(False, 'Firebase unavailable', True)] * len(sendable)
+
+    now = timezone.now()
+    for push, (success, error, retryable) in zip(sendable, results):
+        if success:
+            push.status = 'sent'
+            push.sent_at = now
+            push.last_error = None
+            counts['sent'] += 1
+        elif retryable and push.attempts < MAX_PUSH_ATTEMPTS:
+            push.next_attempt_at = _retry_at(push.attempts, now)
+            push.last_error = error
+            counts['retried'] += 1
+        else:
+            push.status = 'failed'
+            push.last_error = error
+            counts['failed'] += 1
+
+    with transaction.atomic():
+        PushOutbox.objects.bulk_update(
+            sendable, ['status', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+
+    return counts
 
 def send_trip_assigned_notification(vendor, load, vehicle, driver):
     """Send push notification when a trip is assigned to a vendor"""
@@ -29,16 +190,8 @@ def send_trip_assigned_notification(vendor, load, vehicle, driver):
         "click_action": "FLUTTER_NOTIFICATION_CLICK"
     }
     
-    success = _send_notification(vendor.fcm_token, title, body, data)
-    
-    # Also create a database notification
-    notification = Notification.objects.create(
-        recipient=vendor,
-        notification_type='trip_assigned',
-        title=title,
-        message=body,
-        related_trip=load,
-        is_read=False
+    notification, success = _create_notification(
+        vendor, 'trip_assigned', title, body, load, data
     )
     
     return notification, success
@@ -55,15 +208,8 @@ def send_trip_rejected_notification(vendor, load):
         "click_action": "FLUTTER_NOTIFICATION_CLICK"
     }
     
-    success = _send_notification(vendor.fcm_token, title, body, data)
-    
-    notification = Notification.objects.create(
-        recipient=vendor,
-        notification_type='trip_rejected',
-        title=title,
-        message=body,
-        related_trip=load,
-        is_read=False
+    notification, success = _create_notification(
+        vendor, 'trip_rejected', title, body, load, data
     )
     
     return notification, success
@@ -134,16 +280,8 @@ def send_trip_status_update_notification(vendor, load, previous_status, new_stat
         "click_action": "FLUTTER_NOTIFICATION_CLICK"
     }
     
-    success = _send_notification(vendor.fcm_token, title, body_with_trigger, data)
-    
-    # Create database notification
-    notification = Notification.objects.create(
-        recipient=vendor,
-        notification_type='trip_status_update',
-        title=title,
-        message=body_with_trigger,
-        related_trip=load,
-        is_read=False
+    notification, success = _create_notification(
+        vendor, 'trip_status_update', title, body_with_trigger, load, data
     )
     
     return notification, success
@@ -161,15 +299,8 @@ def send_trip_comment_notification(vendor, load, comment, commenter_name):
         "click_action": "FLUTTER_NOTIFICATION_CLICK"
     }
     
-    success = _send_notification(vendor.fcm_token, title, body, data)
-    
-    notification = Notification.objects.create(
-        recipient=vendor,
-        notification_type='trip_comment',
-        title=title,
-        message=body,
-        related_trip=load,
-        is_read=False
+    notification, success = _create_notification(
+        vendor, 'trip_comment', title, body, load, data
     )
     
     return notification, success
\ No newline at end of file
@@ -0,0 +1,291 @@
+"""
+Monthly range partitioning for append-only tables (PostgreSQL only).
+
+Notification and TripComment are partitioned on created_at:
+
+    <table>_legacy     every row from before the conversion, up to the
+                       start of the month after the migration ran
+    <table>_pYYYYMM    one partition per month after that
+    <table>_default    catches rows outside every range (should stay empty)
+
+The conversion (convert_to_partitioned, a frozen copy runs in migration
+0087) renames the
+existing table to <table>_legacy and attaches it as the first partition,
+so no rows are copied. Partitioned tables need the partition column in
+the primary key, so it becomes (id, created_at); ids still come from the
+same sequence. Foreign keys *to* these tables aren't possible any more,
+PushOutbox.notification is db_constraint=False for that reason.
+
+maintain_partitions (Celery beat, tasks.py) keeps a few months of
+partitions ahead and detaches (or drops) the ones older than the
+configured retention, so old rows leave without DELETE / VACUUM churn.
+The removed rows get SyncTombstones like deleted ones, so devices that
+sync through /api/sync/ drop them too.
+On other databases every function here is a no-op.
+"""
+import logging
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import SyncTombstone
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLUMN = 'created_at'
+
+# Future monthly partitions kept ready
+MONTHS_AHEAD = 3
+
+_BOUND_RE = re.compile(r"FROM \((?:'([^']+)'|MINVALUE)\) TO \('([^']+)'\)")
+
+
+def is_supported(connection=None):
+    return (connection or default_connection).vendor == 'postgresql'
+
+
+def month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def _suffixed(name, suffix):
+    # PostgreSQL truncates identifiers at 63 bytes
+    return f'{name[:63 - len(suffix)]}{suffix}'
+
+
+def _literal(value):
+    return f"'{value.isoformat()}'"
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table]
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor, table):
+    """[(name, lower, upper)] of a partitioned table, None for MINVALUE / DEFAULT"""
+    cursor.execute("""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(%s)
+        ORDER BY child.relname
+    """, [table])
+
+    partitions = []
+    for name, bound in cursor.fetchall():
+        match = _BOUND_RE.search(bound or '')
+        if match:
+            lower = parse_datetime(match.group(1)) if match.group(1) else None
+            partitions.append((name, lower, parse_datetime(match.group(2))))
+        else:
+            partitions.append((name, None, None))
+    return partitions
+
+
+def convert_to_partitioned(connection, table, column=PARTITION_COLUMN):
+    """
+    Turn a plain table into a monthly range-partitioned one, keeping the
+    existing rows in place as the first partition. Returns False if the
+    table is already partitioned (or the database isn't PostgreSQL).
+    """
+    if not is_supported(connection):
+        return False
+
+    qn = connection.ops.quote_name
+    legacy = _suffixed(table, '_legacy')
+
+    with connection.cursor() as cursor:
+        if is_partitioned(cursor, table):
+            return False
+
+        cursor.execute(
+            "SELECT conrelid::regclass::text FROM pg_constraint WHERE confrelid = to_regclass(%s) AND contype = 'f'",
+            [table]
+        )
+        referencing = [row[0] for row in cursor.fetchall()]
+        if referencing:
+            raise ValueError(
+                f"Can't partition {table}: foreign keys from {', '.join(referencing)} point at it"
+            )
+
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'", [table]
+        )
+        pk_name = cursor.fetchone()[0]
+
+        cursor.execute("""
+            SELECT index_class.relname, pg_get_indexdef(pg_index.indexrelid), pg_index.indisunique
+            FROM pg_index
+            JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+            WHERE pg_index.indrelid = to_regclass(%s) AND NOT pg_index.indisprimary
+        """, [table])
+        indexes = cursor.fetchall()
+        unique = [name for name, _, is_unique in indexes if is_unique]
+        if unique:
+            raise ValueError(f"Can't partition {table}: unique indexes {unique} don't include {column}")
+
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [table]
+        )
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute(
+            "SELECT pg_get_serial_sequence(%s, 'id'), attidentity FROM pg_attribute "
+            "WHERE attrelid = to_regclass(%s) AND attname = 'id'",
+            [table, table]
+        )
+        sequence, identity = cursor.fetchone()
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {qn(table)}')
+        max_id = cursor.fetchone()[0]
+
+        # Everything up to the start of next month stays in the old table
+        boundary = add_months(month_start(timezone.now()), 1)
+
+        # 1. Move the old table (and its index names) out of the way
+        cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}')
+        for name, _, _ in indexes:
+            cursor.execute(f'ALTER INDEX {qn(name)} RENAME TO {qn(_suffixed(name, "_legacy"))}')
+        cursor.execute(f'ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(pk_name)}')
+        cursor.execute(f'ALTER TABLE {qn(legacy)} ADD PRIMARY KEY (id, {qn(column)})')
+        for name, _ in foreign_keys:
+            # Re-created on the parent and cloned back on attach
+            cursor.execute(f'ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(name)}')
+
+        # 2. Ids keep coming from one sequence, now owned by the parent
+        if identity:
+            cursor.execute(f'ALTER TABLE {qn(legacy)} ALTER COLUMN id DROP IDENTITY')
+            sequence = _suffixed(table, '_id_seq')
+            cursor.execute(f'CREATE SEQUENCE {qn(sequence)}')
+            cursor.execute('SELECT setval(%s::regclass, %s, false)', [sequence, max_id + 1])
+        else:
+            cursor.execute(f'ALTER TABLE {qn(legacy)} ALTER COLUMN id DROP DEFAULT')
+
+        # 3. The partitioned parent under the original name
+        cursor.execute(
+            f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ({qn(column)})'
+        )
+        cursor.execute(f'ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, {qn(column)})')
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}'::regclass)")
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {qn(table)}.id')
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}')
+
+        # 4. Attach the old rows; the CHECK lets ATTACH skip its own scan
+        check_name = _suffixed(legacy, '_bound')
+        cursor.execute(
+            f'ALTER TABLE {qn(legacy)} ADD CONSTRAINT {qn(check_name)} '
+            f'CHECK ({qn(column)} IS NOT NULL AND {qn(column)} < {_literal(boundary)})'
+        )
+        cursor.execute(
+            f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(legacy)} '
+            f'FOR VALUES FROM (MINVALUE) TO ({_literal(boundary)})'
+        )
+        cursor.execute(f'ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(check_name)}')
+
+        # 5. Same index names as before, on the parent. The renamed legacy
+        #    indexes match and get attached instead of rebuilt.
+        for _, definition, _ in indexes:
+            cursor.execute(definition)
+
+    ensure_partitions(table, connection=connection)
+    return True
+
+
+def ensure_partitions(table, months_ahead=MONTHS_AHEAD, connection=None):
+    """
+    Create the monthly partitions up to months_ahead and the default
+    partition. Returns the names of the partitions created.
+    """
+    connection = connection or default_connection
+    if not is_supported(connection):
+        return []
+
+    qn = connection.ops.quote_name
+    created = []
+    target = add_months(month_start(timezone.now()), months_ahead + 1)
+
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            return []
+
+        partitions = list_partitions(cursor, table)
+        uppers = [upper for _, _, upper in partitions if upper]
+        start = max(uppers) if uppers else month_start(timezone.now())
+
+        while start < target:
+            end = add_months(start, 1)
+            name = _suffixed(table, f'_p{start:%Y%m}')
+            cursor.execute(
+                f'CREATE TABLE {qn(name)} PARTITION OF {qn(table)} '
+                f'FOR VALUES FROM ({_literal(start)}) TO ({_literal(end)})'
+            )
+            created.append(name)
+            start = end
+
+        if not any(lower is None and upper is None for _, lower, upper in partitions):
+            name = _suffixed(table, '_default')
+            cursor.execute(f'CREATE TABLE {qn(name)} PARTITION OF {qn(table)} DEFAULT')
+            created.append(name)
+
+    return created
+
+
+def _write_tombstones(cursor, qn, partition, tombstones):
+    """One SyncTombstone per row of the partition, so synced devices drop them too"""
+    object_type, recipient_column = tombstones
+    recipient = qn(recipient_column) if recipient_column else 'NULL'
+    cursor.execute(
+        f'INSERT INTO {qn(SyncTombstone._meta.db_table)} (object_type, object_id, recipient_user_id, deleted_at) '
+        f'SELECT %s, id, {recipient}, NOW() FROM {qn(partition)}',
+        [object_type]
+    )
+
+
+def detach_old_partitions(table, keep_months, drop=False, connection=None, tombstones=None):
+    """
+    Detach (or drop) every partition whose whole range is older than
+    keep_months full months. Detached tables keep their name and can be
+    dumped / archived. Returns the names of the partitions removed.
+
+    tombstones = (SyncTombstone object_type, recipient column or None)
+    writes a tombstone for every removed row in the same transaction, so
+    /api/sync/ clients drop them like deleted rows.
+    """
+    connection = connection or default_connection
+    if not is_supported(connection):
+        return []
+
+    qn = connection.ops.quote_name
+    cutoff = add_months(month_start(timezone.now()), -keep_months)
+    removed = []
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            return []
+
+        for name, _, upper in list_partitions(cursor, table):
+            if upper is None or upper > cutoff:
+                continue
+            if tombstones:
+                _write_tombstones(cursor, qn, name, tombstones)
+            cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+            if drop:
+                cursor.execute(f'DROP TABLE {qn(name)}')
+            logger.info(f"{'Dropped' if drop else 'Detached'} partition {name} of {table}")
+            removed.append(name)
+
+    return removed
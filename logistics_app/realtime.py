@@ -0,0 +1,137 @@
+"""
+Real-time trip events over WebSockets (Django Channels).
+
+Events are fanned out to channel-layer groups that mirror the trip
+permission rules of the HTTP views:
+
+    trips.admin             admins / staff, every trip
+    trips.user.<id>         traffic person, trips they created
+    trips.vendor.<id>       vendor, trips assigned to one of their drivers
+
+Each event is a JSON object with "event" set to trip.status,
+trip.comment or trip.location plus "trip_id" and event fields. The
+consumer is in consumers.py, routing in routing.py / rotra_logistics/asgi.py.
+
+Publishing happens after the surrounding transaction commits and never
+raises: if Channels isn't installed or the layer is down, clients just
+miss the live update and see it on their next page load.
+"""
+import logging
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+ADMIN_GROUP = 'trips.admin'
+
+TRIP_STATUS = 'trip.status'
+TRIP_COMMENT = 'trip.comment'
+TRIP_LOCATION = 'trip.location'
+
+
+def user_group(user_id):
+    return f'trips.user.{user_id}'
+
+
+def vendor_group(vendor_id):
+    return f'trips.vendor.{vendor_id}'
+
+
+def groups_for_user(user):
+    """Groups a connected user listens on, same rules as get_trip_details_api"""
+    if user.is_staff or user.role == 'admin':
+        return [ADMIN_GROUP]
+    if user.role == 'traffic_person':
+        return [user_group(user.id)]
+    if user.role == 'vendor':
+        return [vendor_group(user.id)]
+    return []
+
+
+def trip_groups(created_by_id, vendor_id=None):
+    """Groups an event about one trip goes to"""
+    groups = [ADMIN_GROUP]
+    if created_by_id:
+        groups.append(user_group(created_by_id))
+    if vendor_id:
+        groups.append(vendor_group(vendor_id))
+    return groups
+
+
+def vendor_id_for(load):
+    """Owner of the load's driver, without a query if driver is already loaded"""
+    if not load.driver_id:
+        return None
+    if 'driver' in load._state.fields_cache:
+        return load.driver.owner_id if load.driver else None
+    from .models import Driver
+    return Driver.objects.filter(pk=load.driver_id).values_list('owner_id', flat=True).first()
+
+
+def _send(groups, message):
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+    except ImportError:
+        return
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    for group in groups:
+        try:
+            async_to_sync(channel_layer.group_send)(group, message)
+        except Exception as e:
+            logger.warning(f"Could not publish {message.get('event')} to {group}: {e}")
+
+
+def publish(event, trip_id, groups, **data):
+    """Send an event to the given groups once the current transaction commits"""
+    message = {
+        'type': 'trip.event',  # -> TripEventsConsumer.trip_event
+        'event': event,
+        'trip_id': trip_id,
+        **data,
+    }
+    transaction.on_commit(lambda: _send(groups, message))
+
+
+def publish_trip_status(load, previous_status):
+    publish(
+        TRIP_STATUS,
+        load.id,
+        trip_groups(load.created_by_id, vendor_id_for(load)),
+        load_id=load.load_id,
+        previous_status=previous_status,
+        trip_status=load.trip_status,
+        trip_status_display=load.get_trip_status_display(),
+        status=load.status,
+    )
+
+
+def publish_trip_comment(comment, load):
+    publish(
+        TRIP_COMMENT,
+        load.id,
+        trip_groups(load.created_by_id, vendor_id_for(load)),
+        comment={
+            'id': comment.id,
+            'comment': comment.comment,
+            'sender_id': comment.sender_id,
+            'sender_name': comment.sender.full_name,
+            'sender_type': comment.sender_type,
+            'created_at': comment.created_at.isoformat(),
+            'timestamp': comment.created_at.strftime('%b %d, %I:%M %p'),
+        },
+    )
+
+
+def publish_trip_location(trip_id, created_by_id, vendor_id, location, located_at):
+    publish(
+        TRIP_LOCATION,
+        trip_id,
+        trip_groups(created_by_id, vendor_id),
+        current_location=location,
+        current_location_updated_at=located_at.isoformat() if located_at else None,
+    )
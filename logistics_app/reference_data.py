@@ -0,0 +1,111 @@
+"""
+Process-wide cache of rarely changing reference data: the TDS rate,
+vehicle types, active customers (with their contact persons), active
+vendors and active traffic persons.
+
+Each group is kept in this process's memory together with the version
+it was loaded at. The current version of a group lives in the shared
+cache (Redis when CACHE_REDIS_URL is set), so a lookup costs one cache
+read and no query while nothing changed. Saving or deleting a TDSRate,
+VehicleType, Customer, CustomerContactPerson or CustomUser bumps the
+version of the groups it affects (signals.py) and every process reloads
+them on its next lookup.
+
+Without a shared cache (no CACHE_REDIS_URL, LocMemCache) a bump only
+reaches the process that made it. So a local copy is also reloaded once
+it is older than LOCAL_MAX_AGE: other gunicorn workers and Celery pick
+up a change within that time at worst.
+
+The values are shared between requests, treat them as read-only.
+"""
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.cache import cache
+
+from .models import CustomUser, Customer, TDSRate, VehicleType
+
+DEFAULT_TDS_RATE = Decimal('2.00')
+
+TDS_RATE = 'tds_rate'
+VEHICLE_TYPES = 'vehicle_types'
+CUSTOMERS = 'customers'
+VENDORS = 'vendors'
+TRAFFIC_PERSONS = 'traffic_persons'
+
+VERSION_KEY = 'reference_data:version:{}'
+
+# Seconds a process keeps its copy of a group, even at the current version
+LOCAL_MAX_AGE = 60
+
+# group -> (version, loaded at (time.monotonic()), value)
+_local = {}
+
+
+def version(group):
+    """Current version of a group, changes whenever it is invalidated"""
+    key = VERSION_KEY.format(group)
+    current = cache.get(key)
+    if current is None:
+        # add: another process may have set one in the meantime, theirs wins
+        current = uuid.uuid4().hex
+        if not cache.add(key, current, None):
+            current = cache.get(key, current)
+    return current
+
+
+def _get(group, load):
+    # The version is read before loading: a change committed while
+    # loading bumps it again, so the stale value is reloaded next time
+    current = version(group)
+    now = time.monotonic()
+    entry = _local.get(group)
+    if entry is not None and entry[0] == current and now - entry[1] < LOCAL_MAX_AGE:
+        return entry[2]
+    value = load()
+    _local[group] = (current, now, value)
+    return value
+
+
+def invalidate(*groups):
+    """Drop the groups in every process"""
+    for group in groups:
+        cache.set(VERSION_KEY.format(group), uuid.uuid4().hex, None)
+        _local.pop(group, None)
+
+
+def _load_tds_rate():
+    tds_rate = TDSRate.objects.first()
+    return tds_rate.rate if tds_rate else DEFAULT_TDS_RATE
+
+
+def tds_rate():
+    """The configured TDS rate (percent), DEFAULT_TDS_RATE if none is set"""
+    return _get(TDS_RATE, _load_tds_rate)
+
+
+def vehicle_types():
+    """All vehicle types by name"""
+    return _get(VEHICLE_TYPES, lambda: list(VehicleType.objects.order_by('name')))
+
+
+def active_customers():
+    """Active customers by name, contacts prefetched (customer.contacts.all())"""
+    return _get(CUSTOMERS, lambda: list(
+        Customer.objects.filter(is_active=True).prefetch_related('contacts').order_by('customer_name')
+    ))
+
+
+def active_vendors():
+    """Active vendors by name"""
+    return _get(VENDORS, lambda: list(
+        CustomUser.objects.filter(role='vendor', is_active=True).order_by('full_name')
+    ))
+
+
+def active_traffic_persons():
+    """Active traffic persons (employees) by name"""
+    return _get(TRAFFIC_PERSONS, lambda: list(
+        CustomUser.objects.filter(role='traffic_person', is_active=True).order_by('full_name')
+    ))
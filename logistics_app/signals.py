@@ -0,0 +1,315 @@
+"""
+Model signal handlers for logistics_app
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import (
+    Load, TripComment, Notification, SyncTombstone, Driver, Vehicle, LoadRequest, TripStatusEvent,
+    VehicleType, Location, TDSRate, Customer, CustomerContactPerson, CustomUser, Payment,
+    HoldingCharge,
+)
+from . import kpis, lanes, realtime, filter_options, reference_data, trip_history, load_totals
+
+
+# =========================
+# Sync tombstones
+# =========================
+
+@receiver(post_delete, sender=Load)
+def load_deleted(sender, instance, **kwargs):
+    SyncTombstone.objects.create(object_type='load', object_id=instance.pk)
+
+
+@receiver(post_delete, sender=TripComment)
+def trip_comment_deleted(sender, instance, **kwargs):
+    SyncTombstone.objects.create(object_type='trip_comment', object_id=instance.pk)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    SyncTombstone.objects.create(
+        object_type='notification',
+        object_id=instance.pk,
+        recipient_user_id=instance.recipient_id
+    )
+
+
+# =========================
+# Dashboard KPI counters
+# =========================
+
+@receiver(post_init, sender=Load)
+def load_kpi_init(sender, instance, **kwargs):
+    instance._kpi_snapshot = kpis.load_kpi_snapshot(instance)
+    instance._kpi_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Load)
+def load_kpi_saved(sender, instance, created, **kwargs):
+    # Runs inside the atomic block of Load.save
+    new_snapshot = kpis.load_kpi_snapshot(instance)
+    kpis.record_load_change(instance._kpi_snapshot, new_snapshot)
+    instance._kpi_snapshot = new_snapshot
+
+    # Vendor app new_loads count depends on Load.status
+    if created or instance.__dict__.get('status') != instance._kpi_status:
+        transaction.on_commit(kpis.bump_vendor_dashboard_version)
+    instance._kpi_status = instance.__dict__.get('status')
+
+
+@receiver(post_delete, sender=Load)
+def load_kpi_deleted(sender, instance, **kwargs):
+    kpis.record_load_change(instance._kpi_snapshot or kpis.load_kpi_snapshot(instance), None)
+    transaction.on_commit(kpis.bump_vendor_dashboard_version)
+
+
+@receiver(post_save, sender=LoadRequest)
+@receiver(post_delete, sender=LoadRequest)
+def load_request_changed(sender, instance, **kwargs):
+    vendor_id = instance.vendor_id
+    transaction.on_commit(lambda: kpis.bump_vendor_dashboard_version(vendor_id))
+
+
+@receiver(post_init, sender=Driver)
+def driver_kpi_init(sender, instance, **kwargs):
+    instance._kpi_active = kpis.flag_snapshot(instance, 'is_active', True)
+
+
+@receiver(post_save, sender=Driver)
+def driver_kpi_saved(sender, instance, **kwargs):
+    is_active = kpis.flag_snapshot(instance, 'is_active', True)
+    kpis.record_flag_change(kpis.ACTIVE_DRIVERS, instance._kpi_active, is_active)
+    instance._kpi_active = is_active
+
+
+@receiver(post_delete, sender=Driver)
+def driver_kpi_deleted(sender, instance, **kwargs):
+    kpis.record_flag_change(kpis.ACTIVE_DRIVERS, instance._kpi_active, False)
+
+
+@receiver(post_init, sender=Vehicle)
+def vehicle_kpi_init(sender, instance, **kwargs):
+    instance._kpi_active = kpis.flag_snapshot(instance, 'status', 'active')
+    # Used by Vehicle.save to detect location changes
+    instance._initial_location = instance.__dict__.get('location') if instance.pk else None
+
+
+@receiver(post_save, sender=Vehicle)
+def vehicle_kpi_saved(sender, instance, **kwargs):
+    is_active = kpis.flag_snapshot(instance, 'status', 'active')
+    kpis.record_flag_change(kpis.ACTIVE_VEHICLES, instance._kpi_active, is_active)
+    instance._kpi_active = is_active
+
+
+@receiver(post_delete, sender=Vehicle)
+def vehicle_kpi_deleted(sender, instance, **kwargs):
+    kpis.record_flag_change(kpis.ACTIVE_VEHICLES, instance._kpi_active, False)
+
+
+# =========================
+# Vehicle lanes
+# =========================
+
+@receiver(post_init, sender=Vehicle)
+def vehicle_lanes_init(sender, instance, **kwargs):
+    instance._lane_snapshot = lanes.lane_snapshot(instance)
+
+
+@receiver(post_save, sender=Vehicle)
+def vehicle_lanes_saved(sender, instance, created, **kwargs):
+    snapshot = lanes.lane_snapshot(instance)
+    if created or snapshot != instance._lane_snapshot:
+        lanes.sync_vehicle_lanes([instance])
+    instance._lane_snapshot = snapshot
+
+
+# =========================
+# Unread notification counters
+# =========================
+
+@receiver(post_init, sender=Notification)
+def notification_unread_init(sender, instance, **kwargs):
+    instance._kpi_unread = kpis.flag_snapshot(instance, 'is_read', False)
+
+
+@receiver(post_save, sender=Notification)
+def notification_unread_saved(sender, instance, created, **kwargs):
+    is_unread = kpis.flag_snapshot(instance, 'is_read', False)
+    kpis.record_unread_change(instance.recipient_id, None if created else instance._kpi_unread, is_unread)
+    instance._kpi_unread = is_unread
+
+
+@receiver(post_delete, sender=Notification)
+def notification_unread_deleted(sender, instance, **kwargs):
+    kpis.record_unread_change(instance.recipient_id, instance._kpi_unread, False)
+
+
+# =========================
+# Trip status event log
+# =========================
+
+@receiver(post_save, sender=Load)
+def load_status_event_saved(sender, instance, created, **kwargs):
+    # Runs inside the atomic block of Load.save, the event commits with the row
+    loaded_values = getattr(instance, '_loaded_values', None) or {}
+    if created:
+        previous_status = None
+    elif 'trip_status' in loaded_values and loaded_values['trip_status'] != instance.trip_status:
+        previous_status = loaded_values['trip_status']
+    else:
+        return
+
+    # Set by Load.update_trip_status, None for other code paths
+    changed_by = getattr(instance, '_status_changed_by', None)
+    TripStatusEvent.objects.create(
+        load=instance,
+        from_status=previous_status,
+        to_status=instance.trip_status,
+        changed_by_id=getattr(changed_by, 'pk', None),
+    )
+    instance._status_changed_by = None
+
+
+# =========================
+# Real-time trip events
+# =========================
+
+@receiver(post_save, sender=Load)
+def load_realtime_saved(sender, instance, created, **kwargs):
+    # Load.save re-snapshots after post_save, so this is still the old row
+    loaded_values = getattr(instance, '_loaded_values', None) or {}
+    if created:
+        return
+
+    if 'trip_status' in loaded_values and loaded_values['trip_status'] != instance.trip_status:
+        realtime.publish_trip_status(instance, loaded_values['trip_status'])
+
+    if 'current_location' in loaded_values and loaded_values['current_location'] != instance.current_location:
+        realtime.publish_trip_location(
+            instance.id,
+            instance.created_by_id,
+            realtime.vendor_id_for(instance),
+            instance.current_location,
+            instance.current_location_updated_at,
+        )
+
+
+@receiver(post_save, sender=TripComment)
+def trip_comment_realtime_saved(sender, instance, created, **kwargs):
+    if created:
+        realtime.publish_trip_comment(instance, instance.load)
+
+
+# =========================
+# Load filter options
+# =========================
+
+@receiver(post_save, sender=Load)
+def load_filter_options_saved(sender, instance, created, **kwargs):
+    loaded_values = getattr(instance, '_loaded_values', None) or {}
+    changed = created or any(
+        instance.__dict__[field] != loaded_values.get(field)
+        for field in filter_options.LOAD_FIELDS
+        if field in instance.__dict__
+    )
+    if changed:
+        filter_options.record_loads([instance])
+
+
+@receiver(post_save, sender=VehicleType)
+@receiver(post_delete, sender=VehicleType)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def filter_option_labels_changed(sender, instance, **kwargs):
+    transaction.on_commit(filter_options.invalidate)
+
+
+# =========================
+# Reference data cache
+# =========================
+
+@receiver(post_save, sender=TDSRate)
+@receiver(post_delete, sender=TDSRate)
+def tds_rate_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: reference_data.invalidate(reference_data.TDS_RATE))
+
+
+@receiver(post_save, sender=VehicleType)
+@receiver(post_delete, sender=VehicleType)
+def vehicle_type_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: reference_data.invalidate(reference_data.VEHICLE_TYPES))
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+@receiver(post_save, sender=CustomerContactPerson)
+@receiver(post_delete, sender=CustomerContactPerson)
+def customer_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: reference_data.invalidate(reference_data.CUSTOMERS))
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Every login saves last_login, that doesn't change the lists
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    transaction.on_commit(
+        lambda: reference_data.invalidate(reference_data.VENDORS, reference_data.TRAFFIC_PERSONS)
+    )
+
+
+# =========================
+# Vendor trip history summary
+# =========================
+
+@receiver(post_save, sender=Load)
+def trip_history_load_saved(sender, instance, created, **kwargs):
+    loaded_values = getattr(instance, '_loaded_values', None) or {}
+    statuses = {instance.__dict__.get('trip_status'), loaded_values.get('trip_status')}
+    # Only completed trips are in the history
+    if not statuses & set(trip_history.COMPLETED_STATUSES):
+        return
+    changed = created or any(
+        instance.__dict__[field] != loaded_values.get(field)
+        for field in trip_history.LOAD_FIELDS
+        if field in instance.__dict__
+    )
+    if changed:
+        transaction.on_commit(trip_history.bump_version)
+
+
+@receiver(post_delete, sender=Load)
+def trip_history_load_deleted(sender, instance, **kwargs):
+    if instance.__dict__.get('trip_status') in trip_history.COMPLETED_STATUSES:
+        transaction.on_commit(trip_history.bump_version)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def trip_history_payment_changed(sender, instance, **kwargs):
+    transaction.on_commit(trip_history.bump_version)
+
+
+@receiver(post_save, sender=LoadRequest)
+@receiver(post_delete, sender=LoadRequest)
+def trip_history_request_changed(sender, instance, **kwargs):
+    vendor_id = instance.vendor_id
+    transaction.on_commit(lambda: trip_history.bump_version(vendor_id))
+
+
+# =========================
+# Load money totals
+# =========================
+
+@receiver(post_delete, sender=HoldingCharge)
+@receiver(post_delete, sender=Payment)
+def load_total_entry_deleted(sender, instance, origin=None, **kwargs):
+    # Runs inside the delete's transaction. Deleting the load takes its
+    # charges and payments with it, no totals left to move.
+    if isinstance(origin, Load) or getattr(origin, 'model', None) is Load:
+        return
+    amount = getattr(instance, instance.amount_field)
+    load_totals.shift_totals(instance.load_id, **{instance.total_field: -amount})
@@ -4,7 +4,8 @@ Celery periodic tasks for automated load management
 from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
-from logistics_app.models import Load
+from logistics_app.models import SyncTombstone
+from logistics_app import load_queries
 
 
 @shared_task(bind=True)
@@ -25,10 +26,7 @@ def delete_old_unassigned_loads(self, days=1):
         cutoff_date = timezone.now() - timedelta(days=days)
         
         # Find unassigned loads older than N days
-        unassigned_loads = Load.objects.filter(
-            driver__isnull=True,
-            created_at__lt=cutoff_date
-        )
+        unassigned_loads = load_queries.unassigned_loads(cutoff_date)
         
         count = unassigned_loads.count()
         
@@ -54,3 +52,213 @@ def delete_old_unassigned_loads(self, days=1):
             'message': f'Error deleting loads: {str(e)}',
             'deleted_count': 0
         }
+
+
+@shared_task(bind=True)
+def prune_sync_tombstones(self, days=30):
+    """
+    Periodic task to delete sync tombstones older than N days.
+    Sync tokens older than that get a full resync instead
+    (see api_app.sync.TOMBSTONE_RETENTION_DAYS).
+    """
+    try:
+        cutoff_date = timezone.now() - timedelta(days=days)
+        deleted_count, _ = SyncTombstone.objects.filter(deleted_at__lt=cutoff_date).delete()
+
+        return {
+            'status': 'success',
+            'message': f'Deleted {deleted_count} sync tombstone(s)',
+            'deleted_count': deleted_count
+        }
+
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Error pruning sync tombstones: {str(e)}',
+            'deleted_count': 0
+        }
+
+
+@shared_task(bind=True)
+def reconcile_kpi_counters(self):
+    """
+    Periodic task to recompute the admin dashboard KPI counters and
+    fix any drift (queryset updates bypass the save/delete hooks).
+    """
+    try:
+        from logistics_app.kpis import reconcile_counters
+        fixed_count = reconcile_counters()
+
+        return {
+            'status': 'success',
+            'message': f'Reconciled KPI counters, {fixed_count} corrected',
+            'fixed_count': fixed_count
+        }
+
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Error reconciling KPI counters: {str(e)}',
+            'fixed_count': 0
+        }
+
+
+@shared_task(bind=True)
+def dispatch_push_notifications(self, max_batches=20):
+    """
+    Drain the push outbox, one FCM send_each request per batch of up to
+    500 messages. Queued right after a notification commits and also run
+    every minute to pick up retries.
+    """
+    try:
+        from logistics_app.notifications import dispatch_pending_pushes
+        totals = {'sent': 0, 'failed': 0, 'retried': 0}
+
+        for _ in range(max_batches):
+            counts = dispatch_pending_pushes()
+            for key, value in counts.items():
+                totals[key] += value
+            if not any(counts.values()):
+                break
+
+        return {
+            'status': 'success',
+            'message': f"Sent {totals['sent']} push(es), {totals['retried']} to retry, {totals['failed']} failed",
+            **totals
+        }
+
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Error dispatching push notifications: {str(e)}',
+            'sent': 0
+        }
+
+
+@shared_task(bind=True)
+def prune_push_outbox(self, days=7):
+    """
+    Periodic task to delete sent / failed outbox rows older than N days.
+    """
+    try:
+        from logistics_app.models import PushOutbox
+        cutoff_date = timezone.now() - timedelta(days=days)
+        deleted_count, _ = PushOutbox.objects.filter(
+            status__in=['sent', 'failed'],
+            created_at__lt=cutoff_date
+        ).delete()
+
+        return {
+            'status': 'success',
+            'message': f'Deleted {deleted_count} push outbox row(s)',
+            'deleted_count': deleted_count
+        }
+
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Error pruning push outbox: {str(e)}',
+            'deleted_count': 0
+        }
+
+
+@shared_task(bind=True)
+def alert_vendors_for_new_loads(self, load_ids):
+    """
+    Notify vendors whose vehicle lanes match newly created loads.
+    Queued by add_load / the bulk import once the loads are committed.
+    """
+    try:
+        from logistics_app.lanes import alert_vendors_for_loads
+        alerted_count = alert_vendors_for_loads(load_ids)
+
+        return {
+            'status': 'success',
+            'message': f'Alerted {alerted_count} vendor(s) for {len(load_ids)} load(s)',
+            'alerted_count': alerted_count
+        }
+
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Error alerting vendors: {str(e)}',
+            'alerted_count': 0
+        }
+
+
+@shared_task(bind=True)
+def maintain_partitions(self):
+    """
+    Periodic task for the monthly Notification / TripComment partitions:
+    create the coming months and detach (or drop) the ones past
+    NOTIFICATION_RETENTION_MONTHS / TRIP_COMMENT_RETENTION_MONTHS.
+    """
+    try:
+        from django.conf import settings
+        from logistics_app import partitions
+        from logistics_app.models import Notification, TripComment
+        from logistics_app.kpis import reconcile_counters
+
+        # (table, months kept, sync tombstone type and recipient column)
+        retention = [
+            (
+                Notification._meta.db_table, settings.NOTIFICATION_RETENTION_MONTHS,
+                ('notification', Notification._meta.get_field('recipient').column),
+            ),
+            (
+                TripComment._meta.db_table, settings.TRIP_COMMENT_RETENTION_MONTHS,
+                ('trip_comment', None),
+            ),
+        ]
+
+        created, removed = [], []
+        for table, keep_months, tombstones in retention:
+            created += partitions.ensure_partitions(table)
+            removed += partitions.detach_old_partitions(
+                table, keep_months, drop=settings.PARTITION_RETENTION_DROP, tombstones=tombstones
+            )
+
+        if removed:
+            # Detached notifications leave the unread counters behind
+            reconcile_counters()
+
+        return {
+            'status': 'success',
+            'message': f'Created {len(created)} partition(s), removed {len(removed)}',
+            'created': created,
+            'removed': removed
+        }
+
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Error maintaining partitions: {str(e)}',
+            'created': [],
+            'removed': []
+        }
+
+
+@shared_task(bind=True)
+def prune_load_filter_options(self):
+    """
+    Periodic task to drop vendor filter options no load uses any more
+    and add any that were missed (see logistics_app/filter_options.py).
+    """
+    try:
+        from logistics_app.filter_options import prune_options
+        added, removed = prune_options()
+
+        return {
+            'status': 'success',
+            'message': f'Added {added}, removed {removed} filter option(s)',
+            'added_count': added,
+            'removed_count': removed
+        }
+
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Error pruning filter options: {str(e)}',
+            'added_count': 0,
+            'removed_count': 0
+        }
@@ -1,3 +1,802 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import (
+    CustomUser, Customer, Driver, HoldingCharge, Load, Location, LocationAlias, Payment, PushOutbox, TDSRate,
+    TripComment, VehicleType,
+)
+from . import grids, load_queries, load_totals, location_search, notifications, realtime, reference_data
+from .consumers import JWTAuthMiddleware
+from .routing import websocket_urlpatterns
+
+# Big enough that the planner prefers a sequential scan whenever no
+# index fits the query
+SEED_LOADS = 60000
+TRAFFIC_PERSONS = 20
+PAGE_SIZE = 50
+
+INDEX_SCANS = {'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan'}
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN checks need PostgreSQL')
+class LoadQueryPlanTests(TestCase):
+    """
+    The main Load query of every hot view must be served by an index.
+    A filter change in load_queries.py that no longer matches the
+    (partial) indexes in Load.Meta shows up here as a Seq Scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            email='admin@example.com', full_name='Admin', phone_number='9000000000', role='admin', is_staff=True
+        )
+        cls.traffic_persons = [
+            CustomUser.objects.create_user(
+                email=f'traffic{i}@example.com', full_name=f'Traffic {i}', phone_number=f'91000000{i:02d}',
+                role='traffic_person'
+            )
+            for i in range(TRAFFIC_PERSONS)
+        ]
+        vendor = CustomUser.objects.create_user(
+            email='vendor@example.com', full_name='Vendor', phone_number='9200000000', role='vendor'
+        )
+        driver = Driver.objects.create(full_name='Driver', phone_number='9300000000', owner=vendor)
+        customer = Customer.objects.create(customer_name='Customer', phone_number='9400000000')
+        vehicle_type = VehicleType.objects.create(name='32 FT')
+
+        # Mostly closed trips, like production: a few % pending, open or
+        # in the POD stages
+        loads = []
+        for i in range(SEED_LOADS):
+            bucket = i % 100
+            if bucket < 3:
+                status, trip_status, assigned = 'pending', 'trip_requested', False
+            elif bucket < 7:
+                status, trip_status, assigned = 'in_transit', 'in_transit', True
+            elif bucket < 10:
+                status, trip_status, assigned = 'in_transit', 'pod_pending', True
+            else:
+                status, trip_status, assigned = 'delivered', 'trip_closed', True
+            loads.append(Load(
+                load_id=f'TEST{i:06d}',
+                customer=customer,
+                vehicle_type=vehicle_type,
+                driver=driver if assigned else None,
+                created_by=cls.traffic_persons[i % TRAFFIC_PERSONS],
+                pickup_location='Pune',
+                drop_location='Mumbai',
+                pickup_date=date(2025, 1, 1),
+                status=status,
+                trip_status=trip_status,
+            ))
+        Load.objects.bulk_create(loads, batch_size=5000)
+
+        table = Load._meta.db_table
+        with connection.cursor() as cursor:
+            # Spread the timestamps so ordering and range filters are realistic
+            cursor.execute(
+                f"UPDATE {table} SET created_at = NOW() - (id % 5000) * INTERVAL '1 hour', "
+                f"updated_at = NOW() - (id % 4999) * INTERVAL '1 hour'"
+            )
+            cursor.execute(f'ANALYZE {table}')
+
+    def assertUsesIndex(self, queryset):
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        scans = [
+            node for node in _plan_nodes(plan)
+            if node.get('Relation Name') == Load._meta.db_table
+        ]
+        self.assertTrue(scans, 'Load is not scanned at all')
+        for node in scans:
+            self.assertIn(
+                node['Node Type'], INDEX_SCANS,
+                f"{node['Node Type']} on {Load._meta.db_table}:\n{json.dumps(plan, indent=2)}"
+            )
+
+    def test_load_list_admin(self):
+        self.assertUsesIndex(load_queries.pending_loads(self.admin))
+
+    def test_load_list_traffic_person(self):
+        self.assertUsesIndex(load_queries.pending_loads(self.traffic_persons[0]))
+
+    def test_trip_management_admin(self):
+        self.assertUsesIndex(load_queries.open_trips(self.admin))
+
+    def test_trip_management_traffic_person(self):
+        self.assertUsesIndex(load_queries.open_trips(self.traffic_persons[0]))
+
+    def test_pod_management_admin(self):
+        # Includes every closed trip, only a page of it is index friendly
+        self.assertUsesIndex(load_queries.pod_loads(self.admin)[:PAGE_SIZE])
+
+    def test_pod_management_traffic_person(self):
+        self.assertUsesIndex(load_queries.pod_loads(self.traffic_persons[0]))
+
+    def test_trip_management_grid_deep_page(self):
+        # Keyset page far from the start, must seek in the index, not sort
+        queryset = load_queries.open_trips(self.admin)
+        last = grids.seek(queryset, '-updated_at')[1000]
+        cursor = grids.encode_cursor(last.updated_at, last.pk)
+        self.assertUsesIndex(grids.seek(queryset, '-updated_at', cursor)[:PAGE_SIZE])
+
+    def test_load_list_grid_deep_page_traffic_person(self):
+        queryset = load_queries.pending_loads(self.traffic_persons[0])
+        last = grids.seek(queryset, '-created_at')[50]
+        cursor = grids.encode_cursor(last.created_at, last.pk)
+        self.assertUsesIndex(grids.seek(queryset, '-created_at', cursor)[:PAGE_SIZE])
+
+    def test_delete_old_unassigned_loads(self):
+        self.assertUsesIndex(load_queries.unassigned_loads(timezone.now() - timedelta(days=2)))
+
+
+def _send_all(result):
+    """send_batch stub answering every message with result, records the batches"""
+    def send_batch(messages):
+        send_batch.batches.append(messages)
+        return None if result is None else [result] * len(messages)
+    send_batch.batches = []
+    return send_batch
+
+
+class DispatchPendingPushesTests(TestCase):
+    """notifications.dispatch_pending_pushes with a stubbed FCM client"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = CustomUser.objects.create_user(
+            email='push@example.com', full_name='Push Vendor', phone_number='9500000000', role='vendor',
+            fcm_token='device-token'
+        )
+        cls.logged_out = CustomUser.objects.create_user(
+            email='nopush@example.com', full_name='No Push', phone_number='9500000001', role='vendor'
+        )
+
+    def _push(self, recipient=None, **fields):
+        return PushOutbox.objects.create(
+            recipient=recipient or self.vendor, title='Title', body='Body', data={'load_id': '1'}, **fields
+        )
+
+    def test_success(self):
+        push = self._push()
+        send_batch = _send_all((True, None, False))
+
+        counts = notifications.dispatch_pending_pushes(send_batch=send_batch)
+
+        self.assertEqual(counts, {'sent': 1, 'failed': 0, 'retried': 0})
+        self.assertEqual(len(send_batch.batches), 1)
+        self.assertEqual(send_batch.batches[0][0].token, 'device-token')
+        push.refresh_from_db()
+        self.assertEqual(push.status, 'sent')
+        self.assertEqual(push.attempts, 1)
+        self.assertIsNotNone(push.sent_at)
+
+    def test_claimed_before_sending(self):
+        push = self._push()
+        seen = {}
+
+        def send_batch(messages):
+            # The claim is already written when FCM is called
+            seen['row'] = PushOutbox.objects.get(pk=push.pk)
+            return [(True, None, False)] * len(messages)
+
+        notifications.dispatch_pending_pushes(send_batch=send_batch)
+
+        self.assertEqual(seen['row'].attempts, 1)
+        self.assertGreater(seen['row'].next_attempt_at, timezone.now())
+        # Nothing is due while the lease runs
+        self.assertEqual(
+            notifications.dispatch_pending_pushes(send_batch=_send_all((True, None, False))),
+            {'sent': 0, 'failed': 0, 'retried': 0}
+        )
+
+    def test_retry_with_backoff(self):
+        push = self._push()
+        before = timezone.now()
+
+        counts = notifications.dispatch_pending_pushes(send_batch=_send_all((False, 'UNAVAILABLE', True)))
+
+        self.assertEqual(counts, {'sent': 0, 'failed': 0, 'retried': 1})
+        push.refresh_from_db()
+        self.assertEqual(push.status, 'pending')
+        self.assertEqual(push.last_error, 'UNAVAILABLE')
+        self.assertGreaterEqual(push.next_attempt_at, before + notifications.PUSH_RETRY_BASE)
+
+        # Third attempt waits twice as long again
+        push.attempts = 2
+        push.next_attempt_at = timezone.now()
+        push.save()
+        before = timezone.now()
+        notifications.dispatch_pending_pushes(send_batch=_send_all((False, 'UNAVAILABLE', True)))
+        push.refresh_from_db()
+        self.assertEqual(push.attempts, 3)
+        self.assertGreaterEqual(push.next_attempt_at, before + notifications.PUSH_RETRY_BASE * 4)
+
+    def test_firebase_unavailable_retries_batch(self):
+        self._push()
+        self._push()
+
+        counts = notifications.dispatch_pending_pushes(send_batch=_send_all(None))
+
+        self.assertEqual(counts, {'sent': 0, 'failed': 0, 'retried': 2})
+
+    def test_gives_up_after_max_attempts(self):
+        push = self._push(attempts=notifications.MAX_PUSH_ATTEMPTS - 1)
+
+        counts = notifications.dispatch_pending_pushes(send_batch=_send_all((False, 'UNAVAILABLE', True)))
+
+        self.assertEqual(counts, {'sent': 0, 'failed': 1, 'retried': 0})
+        push.refresh_from_db()
+        self.assertEqual(push.status, 'failed')
+        self.assertEqual(push.attempts, notifications.MAX_PUSH_ATTEMPTS)
+
+    def test_permanent_error_fails(self):
+        push = self._push()
+
+        counts = notifications.dispatch_pending_pushes(send_batch=_send_all((False, 'UNREGISTERED', False)))
+
+        self.assertEqual(counts, {'sent': 0, 'failed': 1, 'retried': 0})
+        push.refresh_from_db()
+        self.assertEqual(push.status, 'failed')
+        self.assertEqual(push.last_error, 'UNREGISTERED')
+
+    def test_missing_token(self):
+        push = self._push(recipient=self.logged_out)
+        send_batch = _send_all((True, None, False))
+
+        counts = notifications.dispatch_pending_pushes(send_batch=send_batch)
+
+        self.assertEqual(counts, {'sent': 0, 'failed': 1, 'retried': 0})
+        self.assertEqual(send_batch.batches, [])
+        push.refresh_from_db()
+        self.assertEqual(push.status, 'failed')
+        self.assertEqual(push.last_error, 'No FCM token stored')
+
+
+class FilterLocationsTests(TestCase):
+    """location_search.filter_locations where pg_trgm isn't available"""
+
+    @classmethod
+    def setUpTestData(cls):
+        customer = Customer.objects.create(customer_name='Search Customer', phone_number='9600000000')
+        vehicle_type = VehicleType.objects.create(name='20 FT')
+        routes = [
+            ('Mumbai, Maharashtra', 'Pune'),
+            ('Navi Mumbai', 'Nashik'),
+            ('Delhi', 'Pune'),
+            ('mumbai port', 'Delhi'),
+        ]
+        cls.loads = []
+        for i, (pickup, drop) in enumerate(routes):
+            load = Load.objects.create(
+                load_id=f'SEARCH{i}', customer=customer, vehicle_type=vehicle_type,
+                pickup_location=pickup, drop_location=drop, pickup_date=date(2025, 1, 1)
+            )
+            # Oldest first, so -created_at is the reverse of routes
+            Load.objects.filter(pk=load.pk).update(created_at=timezone.now() - timedelta(days=len(routes) - i))
+            cls.loads.append(load)
+
+    def _search(self, **kwargs):
+        with mock.patch.object(location_search, 'is_fuzzy_supported', return_value=False):
+            return list(location_search.filter_locations(Load.objects.all(), **kwargs))
+
+    def test_contains(self):
+        loads = self._search(from_locations=['mumbai'], mode=location_search.CONTAINS)
+        self.assertEqual(loads, [self.loads[3], self.loads[1], self.loads[0]])
+
+    def test_fuzzy_falls_back_to_contains(self):
+        loads = self._search(from_locations=['MUMBAI'], to_locations=['pune'], mode=location_search.FUZZY)
+        self.assertEqual(loads, [self.loads[0]])
+        self.assertFalse(hasattr(loads[0], location_search.RANK_FIELD))
+
+    def test_fuzzy_fallback_is_not_typo_tolerant(self):
+        self.assertEqual(self._search(from_locations=['Mumbia'], mode=location_search.FUZZY), [])
+
+    def test_any_of_several_terms(self):
+        loads = self._search(from_locations=['delhi', ' nashik ', ''], to_locations=[], mode=location_search.FUZZY)
+        self.assertEqual(loads, [self.loads[2]])
+
+        loads = self._search(to_locations=['nashik', 'delhi'])
+        self.assertEqual(loads, [self.loads[3], self.loads[1]])
+
+    def test_no_terms_orders_newest_first(self):
+        self.assertEqual(self._search(from_locations=[' '], mode=location_search.FUZZY), self.loads[::-1])
+
+
+class LoadTotalsTests(TestCase):
+    """Load money totals kept in step by LoadTotalEntry and signals.py (load_totals.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(customer_name='Totals Customer', phone_number='9800000000')
+        cls.vehicle_type = VehicleType.objects.create(name='24 FT')
+
+    def _load(self, load_id, price='10000.00'):
+        return Load.objects.create(
+            load_id=load_id, customer=self.customer, vehicle_type=self.vehicle_type,
+            pickup_location='Pune', drop_location='Mumbai', pickup_date=date(2025, 1, 1),
+            price_per_unit=Decimal(price)
+        )
+
+    def _charge(self, load, amount):
+        return HoldingCharge.objects.create(
+            load=load, amount=Decimal(amount), trip_stage='in_transit', reason='Waiting at site'
+        )
+
+    def _payment(self, load, amount):
+        return Payment.objects.create(load=load, amount_paid=Decimal(amount))
+
+    def assertTotals(self, load, holding_charges, total_paid, balance_due):
+        load = Load.objects.get(pk=load.pk)
+        self.assertEqual(
+            (load.holding_charges, load.total_paid, load.balance_due),
+            (Decimal(holding_charges), Decimal(total_paid), Decimal(balance_due))
+        )
+
+    def test_create(self):
+        load = self._load('TOTALS1')
+        self.assertTotals(load, '0.00', '0.00', '10000.00')
+
+        self._charge(load, '500.00')
+        self._payment(load, '4000.00')
+        self._payment(load, '1000.50')
+
+        self.assertTotals(load, '500.00', '5000.50', '5499.50')
+        # The instance passed in is refreshed
+        self.assertEqual(load.balance_due, Decimal('5499.50'))
+
+    def test_edit(self):
+        load = self._load('TOTALS1')
+        charge = self._charge(load, '500.00')
+        payment = self._payment(load, '4000.00')
+
+        charge.amount = Decimal('750.00')
+        charge.save()
+        payment.amount_paid = Decimal('3000.00')
+        payment.save()
+        # Saving an unchanged amount moves nothing
+        payment.description = 'First half'
+        payment.save()
+
+        self.assertTotals(load, '750.00', '3000.00', '7750.00')
+
+    def test_move_to_another_load(self):
+        load, other = self._load('TOTALS1'), self._load('TOTALS2', price='2000.00')
+        charge = self._charge(load, '500.00')
+        payment = self._payment(load, '4000.00')
+
+        charge.load = other
+        charge.save()
+        payment.load = other
+        payment.amount_paid = Decimal('1500.00')
+        payment.save()
+
+        self.assertTotals(load, '0.00', '0.00', '10000.00')
+        self.assertTotals(other, '500.00', '1500.00', '1000.00')
+
+    def test_delete(self):
+        load = self._load('TOTALS1')
+        charge = self._charge(load, '500.00')
+        payment = self._payment(load, '4000.00')
+        self._payment(load, '1000.00')
+
+        charge.delete()
+        payment.delete()
+
+        self.assertTotals(load, '0.00', '1000.00', '9000.00')
+
+    def test_queryset_delete(self):
+        load, other = self._load('TOTALS1'), self._load('TOTALS2')
+        self._charge(load, '500.00')
+        self._charge(load, '250.00')
+        self._payment(load, '4000.00')
+        self._payment(load, '1000.00')
+        self._payment(other, '700.00')
+
+        HoldingCharge.objects.filter(load=load).delete()
+        Payment.objects.filter(amount_paid__gte=Decimal('1000.00')).delete()
+
+        self.assertTotals(load, '0.00', '0.00', '10000.00')
+        self.assertTotals(other, '0.00', '700.00', '9300.00')
+
+    def test_load_delete_skips_totals(self):
+        load = self._load('TOTALS1')
+        self._charge(load, '500.00')
+        self._payment(load, '4000.00')
+
+        with mock.patch.object(load_totals, 'shift_totals') as shift_totals:
+            load.delete()
+
+        shift_totals.assert_not_called()
+        self.assertFalse(HoldingCharge.objects.exists())
+        self.assertFalse(Payment.objects.exists())
+
+    def test_price_change_recomputes_balance(self):
+        load = self._load('TOTALS1')
+        self._charge(load, '500.00')
+        self._payment(load, '4000.00')
+
+        # A stale instance, its totals were never refreshed
+        stale = Load.objects.get(pk=load.pk)
+        self._payment(load, '1000.00')
+        stale.price_per_unit = Decimal('12000.004')
+        stale.save()
+
+        self.assertTotals(load, '500.00', '5000.00', '7500.00')
+
+    def test_verify_load_totals_fix(self):
+        load, other = self._load('TOTALS1'), self._load('TOTALS2')
+        self._charge(load, '500.00')
+        self._payment(load, '4000.00')
+        self._payment(other, '700.00')
+        # Bypasses the maintained totals
+        Payment.objects.filter(load=load).update(amount_paid=Decimal('4500.00'))
+
+        out = StringIO()
+        call_command('verify_load_totals', stdout=out)
+        self.assertIn('1 load(s) with drifted money totals', out.getvalue())
+        self.assertIn('TOTALS1 total_paid: stored 4000.00, expected 4500.00', out.getvalue())
+        self.assertTotals(load, '500.00', '4000.00', '6500.00')
+
+        out = StringIO()
+        call_command('verify_load_totals', '--fix', stdout=out)
+        self.assertIn('Repaired the money totals of 1 load(s)', out.getvalue())
+        self.assertTotals(load, '500.00', '4500.00', '6000.00')
+        self.assertTotals(other, '0.00', '700.00', '9300.00')
+
+        out = StringIO()
+        call_command('verify_load_totals', stdout=out)
+        self.assertIn('All load money totals match', out.getvalue())
+
+
+class LoadPlacesTests(TestCase):
+    """Load.save() resolves pickup_place / drop_place only when the text changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(customer_name='Places Customer', phone_number='9810000000')
+        cls.vehicle_type = VehicleType.objects.create(name='28 FT')
+
+    def setUp(self):
+        self.load = Load.objects.create(
+            load_id='PLACES1', customer=self.customer, vehicle_type=self.vehicle_type,
+            pickup_location='Pune, Maharashtra', drop_location='Mumbai', pickup_date=date(2025, 1, 1)
+        )
+
+    def _location_queries(self, save):
+        tables = (Location._meta.db_table, LocationAlias._meta.db_table)
+        with CaptureQueriesContext(connection) as queries:
+            save()
+        return [query['sql'] for query in queries if any(f'"{table}"' in query['sql'] for table in tables)]
+
+    def test_places_assigned_on_create(self):
+        self.assertEqual(self.load.pickup_place.normalized_name, 'pune')
+        self.assertEqual(self.load.drop_place.normalized_name, 'mumbai')
+
+    def test_unchanged_save_skips_lookup(self):
+        load = Load.objects.get(pk=self.load.pk)
+        self.assertEqual(self._location_queries(load.save), [])
+
+        load.trip_status = 'in_transit'
+        self.assertEqual(self._location_queries(lambda: load.save(update_fields=['trip_status'])), [])
+
+    def test_edited_location_is_resolved(self):
+        load = Load.objects.get(pk=self.load.pk)
+        load.drop_location = 'Nashik'
+
+        self.assertNotEqual(self._location_queries(load.save), [])
+        load.refresh_from_db()
+        self.assertEqual(load.drop_place.normalized_name, 'nashik')
+        self.assertEqual(load.pickup_place_id, self.load.pickup_place_id)
+
+
+class ReferenceDataTests(TestCase):
+    """reference_data's per-process copies: version bumps and LOCAL_MAX_AGE"""
+
+    def setUp(self):
+        cache.clear()
+        reference_data._local.clear()
+        self.addCleanup(reference_data._local.clear)
+        TDSRate.objects.create(rate=Decimal('2.00'))
+
+    def test_cached_until_invalidated(self):
+        self.assertEqual(reference_data.tds_rate(), Decimal('2.00'))
+
+        TDSRate.objects.update(rate=Decimal('1.00'))
+        with self.assertNumQueries(0):
+            self.assertEqual(reference_data.tds_rate(), Decimal('2.00'))
+
+        reference_data.invalidate(reference_data.TDS_RATE)
+        self.assertEqual(reference_data.tds_rate(), Decimal('1.00'))
+
+    def test_reloaded_after_max_age(self):
+        # A bump another process made in its own LocMemCache never arrives here
+        now = 1000.0
+        with mock.patch.object(reference_data.time, 'monotonic', return_value=now):
+            self.assertEqual(reference_data.tds_rate(), Decimal('2.00'))
+
+        TDSRate.objects.update(rate=Decimal('1.00'))
+        with mock.patch.object(reference_data.time, 'monotonic', return_value=now + reference_data.LOCAL_MAX_AGE - 1):
+            self.assertEqual(reference_data.tds_rate(), Decimal('2.00'))
+        with mock.patch.object(reference_data.time, 'monotonic', return_value=now + reference_data.LOCAL_MAX_AGE):
+            self.assertEqual(reference_data.tds_rate(), Decimal('1.00'))
+
+
+class LoadDirtyFieldsTests(TestCase):
+    """Load.save() writes only what changed since from_db (see Load.get_dirty_fields)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        customer = Customer.objects.create(customer_name='Dirty Customer', phone_number='9820000000')
+        vehicle_type = VehicleType.objects.create(name='22 FT')
+        cls.load_pk = Load.objects.create(
+            load_id='DIRTY1', customer=customer, vehicle_type=vehicle_type,
+            pickup_location='Pune', drop_location='Mumbai', pickup_date=date(2025, 1, 1),
+            price_per_unit=Decimal('10000.00')
+        ).pk
+
+    def _saved_fields(self, load, **kwargs):
+        """update_fields the save reached the database with"""
+        saved = []
+
+        def receiver(sender, instance, update_fields, **kwargs):
+            saved.append(update_fields)
+
+        post_save.connect(receiver, sender=Load, weak=False)
+        try:
+            load.save(**kwargs)
+        finally:
+            post_save.disconnect(receiver, sender=Load)
+        return None if saved[0] is None else set(saved[0])
+
+    def test_unchanged_save_writes_updated_at(self):
+        load = Load.objects.get(pk=self.load_pk)
+        self.assertEqual(load.get_dirty_fields(), [])
+        self.assertEqual(self._saved_fields(load), {'updated_at'})
+
+    def test_changed_field(self):
+        load = Load.objects.get(pk=self.load_pk)
+        load.weight = '10 Ton'
+        self.assertEqual(self._saved_fields(load), {'weight', 'updated_at'})
+        # Saved values become the new snapshot
+        self.assertEqual(load.get_dirty_fields(), [])
+
+    def test_deferred_field_set_is_written(self):
+        load = Load.objects.only('id', 'load_id').get(pk=self.load_pk)
+        load.weight = '12 Ton'
+
+        self.assertIn('weight', load.get_dirty_fields())
+        self.assertIn('weight', self._saved_fields(load))
+        self.assertEqual(Load.objects.get(pk=self.load_pk).weight, '12 Ton')
+
+    def test_file_upload_detected(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        load = Load.objects.get(pk=self.load_pk)
+
+        with override_settings(MEDIA_ROOT=media_root):
+            load.pod_document = ContentFile(b'pod', name='pod.pdf')
+            self.assertEqual(load.get_dirty_fields(), ['pod_document'])
+            self.assertEqual(self._saved_fields(load), {'pod_document', 'updated_at'})
+
+        self.assertTrue(Load.objects.get(pk=self.load_pk).pod_document.name.startswith('pod_documents/pod'))
+
+    def test_explicit_update_fields(self):
+        load = Load.objects.get(pk=self.load_pk)
+        load.current_location = 'Lonavala'
+        load.weight = 'Not saved'
+
+        self.assertEqual(
+            self._saved_fields(load, update_fields=['current_location']),
+            {'current_location', 'current_location_updated_at', 'updated_at'}
+        )
+        saved = Load.objects.get(pk=self.load_pk)
+        self.assertEqual(saved.current_location, 'Lonavala')
+        self.assertIsNotNone(saved.current_location_updated_at)
+        self.assertNotEqual(saved.weight, 'Not saved')
+
+    def test_money_totals_never_written(self):
+        load = Load.objects.get(pk=self.load_pk)
+        # Moves the totals in SQL, load is now stale
+        Payment.objects.create(load_id=self.load_pk, amount_paid=Decimal('4000.00'))
+
+        load.total_paid = Decimal('1.00')
+        load.holding_charges = Decimal('2.00')
+        load.balance_due = Decimal('3.00')
+        load.weight = '14 Ton'
+        self.assertEqual(self._saved_fields(load), {'weight', 'updated_at'})
+        self.assertEqual(
+            self._saved_fields(load, update_fields=['total_paid', 'balance_due', 'weight']),
+            {'weight', 'updated_at'}
+        )
+
+        saved = Load.objects.get(pk=self.load_pk)
+        self.assertEqual(
+            (saved.holding_charges, saved.total_paid, saved.balance_due, saved.weight),
+            (Decimal('0.00'), Decimal('4000.00'), Decimal('6000.00'), '14 Ton')
+        )
+
+
+class UpdateTripLocationTests(TestCase):
+    """POST api/trip/<trip_id>/update-location/: 400 for a bad ping, 404 only for a missing trip"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            email='ping-admin@example.com', full_name='Ping Admin', phone_number='9830000000', role='admin',
+            is_staff=True
+        )
+        cls.load = Load.objects.create(
+            load_id='PING1', customer=Customer.objects.create(customer_name='Ping', phone_number='9830000001'),
+            vehicle_type=VehicleType.objects.create(name='10 FT'), pickup_location='Pune', drop_location='Mumbai',
+            pickup_date=date(2025, 1, 1)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _post(self, trip_id, location):
+        return self.client.post(
+            reverse('update_trip_location', args=[trip_id]), {'location': location}, content_type='application/json'
+        )
+
+    def test_updated(self):
+        response = self._post(self.load.id, 'Lonavala')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['success'])
+
+    def test_invalid_location(self):
+        response = self._post(self.load.id, 'x' * 256)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'location is too long')
+
+    def test_trip_not_found(self):
+        response = self._post(self.load.id + 1000, 'Lonavala')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['error'], 'Trip not found')
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class TripEventsConsumerTests(TransactionTestCase):
+    """
+    /ws/trips/ with the in-memory channel layer. TransactionTestCase:
+    the consumer reads users from other threads, and events wait for a
+    real commit.
+    """
+
+    application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            email='ws-admin@example.com', full_name='WS Admin', phone_number='9840000000', role='admin',
+            is_staff=True
+        )
+        self.traffic_person = CustomUser.objects.create_user(
+            email='ws-traffic@example.com', full_name='WS Traffic', phone_number='9840000001', role='traffic_person'
+        )
+        self.other_traffic_person = CustomUser.objects.create_user(
+            email='ws-other@example.com', full_name='WS Other', phone_number='9840000002', role='traffic_person'
+        )
+        self.vendor = CustomUser.objects.create_user(
+            email='ws-vendor@example.com', full_name='WS Vendor', phone_number='9840000003', role='vendor'
+        )
+        self.load = Load.objects.create(
+            load_id='WS1', customer=Customer.objects.create(customer_name='WS', phone_number='9840000004'),
+            vehicle_type=VehicleType.objects.create(name='17 FT'), pickup_location='Pune', drop_location='Mumbai',
+            pickup_date=date(2025, 1, 1), created_by=self.traffic_person,
+            driver=Driver.objects.create(full_name='WS Driver', phone_number='9840000005', owner=self.vendor)
+        )
+
+    async def _connect(self, user=None, token=None):
+        if user is not None:
+            token = str(AccessToken.for_user(user))
+        path = '/ws/trips/' if token is None else f'/ws/trips/?token={token}'
+        communicator = WebsocketCommunicator(self.application, path)
+        connected, code = await communicator.connect()
+        self.assertTrue(connected, f'connection closed with {code}')
+        return communicator
+
+    async def _assertRejected(self, path, code):
+        communicator = WebsocketCommunicator(self.application, path)
+        self.assertEqual(await communicator.connect(), (False, code))
+
+    def _groups_of(self, channel):
+        return {group for group, members in get_channel_layer().groups.items() if channel in members}
+
+    async def _joined_groups(self, user):
+        communicator = await self._connect(user)
+        # The consumer's channel is the only one in the layer
+        channels = {channel for members in get_channel_layer().groups.values() for channel in members}
+        self.assertEqual(len(channels), 1)
+        groups = self._groups_of(channels.pop())
+        await communicator.disconnect()
+        return groups
+
+    def _in_transaction(self, change, communicators):
+        """change() inside a transaction -> whether every communicator was still silent before the commit"""
+        with transaction.atomic():
+            change()
+            return all(async_to_sync(communicator.receive_nothing)() for communicator in communicators)
+
+    async def test_anonymous_rejected(self):
+        await self._assertRejected('/ws/trips/', 4401)
+
+    async def test_bad_token_rejected(self):
+        await self._assertRejected('/ws/trips/?token=not-a-jwt', 4401)
+
+    async def test_groups_per_role(self):
+        self.assertEqual(await self._joined_groups(self.admin), {realtime.ADMIN_GROUP})
+        self.assertEqual(
+            await self._joined_groups(self.traffic_person), {realtime.user_group(self.traffic_person.id)}
+        )
+        self.assertEqual(await self._joined_groups(self.vendor), {realtime.vendor_group(self.vendor.id)})
+
+    async def test_traffic_person_only_gets_own_trips(self):
+        own = await self._connect(self.traffic_person)
+        other = await self._connect(self.other_traffic_person)
+
+        await database_sync_to_async(realtime.publish_trip_status)(self.load, 'trip_requested')
+
+        event = await own.receive_json_from()
+        self.assertEqual((event['event'], event['trip_id']), (realtime.TRIP_STATUS, self.load.id))
+        self.assertTrue(await other.receive_nothing())
+        await own.disconnect()
+        await other.disconnect()
+
+    async def test_trip_status_after_commit(self):
+        communicators = [await self._connect(user) for user in (self.admin, self.traffic_person, self.vendor)]
+
+        def change_status():
+            self.load.trip_status = 'in_transit'
+            self.load.save()
+
+        self.assertTrue(await database_sync_to_async(self._in_transaction)(change_status, communicators))
+        for communicator in communicators:
+            event = await communicator.receive_json_from()
+            self.assertEqual(event['event'], realtime.TRIP_STATUS)
+            self.assertEqual((event['previous_status'], event['trip_status']), ('trip_requested', 'in_transit'))
+            await communicator.disconnect()
+
+    async def test_trip_comment_after_commit(self):
+        communicators = [await self._connect(user) for user in (self.admin, self.traffic_person, self.vendor)]
+        other = await self._connect(self.other_traffic_person)
+
+        def add_comment():
+            TripComment.objects.create(load=self.load, sender=self.admin, sender_type='admin', comment='Reached')
+
+        self.assertTrue(await database_sync_to_async(self._in_transaction)(add_comment, communicators))
+        for communicator in communicators:
+            event = await communicator.receive_json_from()
+            self.assertEqual(event['event'], realtime.TRIP_COMMENT)
+            self.assertEqual(event['comment']['comment'], 'Reached')
+            await communicator.disconnect()
+        self.assertTrue(await other.receive_nothing())
+        await other.disconnect()
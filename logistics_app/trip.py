@@ -28,6 +28,7 @@ import hmac
 from django.core.mail import send_mail
 from datetime import timedelta
 from .notifications import send_trip_assigned_notification, send_trip_rejected_notification
+from . import comment_reads, kpis
 from django.views.decorators.http import require_POST 
 
 def admin_login_view(request):
@@ -880,7 +881,9 @@ def accept_load_request(request, load_id, request_id):
                 load=load, 
                 status='pending'
             ).exclude(id=request_id)
+            rejected_vendor_ids = list(rejected_requests.values_list('vendor_id', flat=True))
             rejected_requests.update(status='rejected')
+            kpis.bump_vendor_dashboards_on_commit(rejected_vendor_ids)
             
             # Send rejection notifications
             for req in rejected_requests:
@@ -969,10 +972,13 @@ def accept_load_request_with_assignment(request, load_id, request_id):
             )
             
             # Reject other requests
-            LoadRequest.objects.filter(
+            pending_requests = LoadRequest.objects.filter(
                 load=load, 
                 status='pending'
-            ).exclude(id=request_id).update(status='rejected')
+            ).exclude(id=request_id)
+            rejected_vendor_ids = list(pending_requests.values_list('vendor_id', flat=True))
+            pending_requests.update(status='rejected')
+            kpis.bump_vendor_dashboards_on_commit(rejected_vendor_ids)
         
         return JsonResponse({
             "success": True, 
@@ -2158,6 +2164,7 @@ def get_trip_details_api(request, trip_id):
         # Get comments for this trip
         comments = []
         trip_comments = TripComment.objects.filter(load=load).select_related('sender').order_by('created_at')
+        last_read = comment_reads.read_cursors(request.user.id, [load.id])[load.id]
         for comment in trip_comments:
             comments.append({
                 'id': comment.id,
@@ -2166,7 +2173,7 @@ def get_trip_details_api(request, trip_id):
                 'sender_type': comment.sender_type,
                 'created_at': comment.created_at.isoformat(),
                 'timestamp': comment.created_at.strftime('%b %d, %I:%M %p'),
-                'is_read': comment.is_read
+                'is_read': comment_reads.is_read_for(comment, request.user.id, last_read)
             })
 
         # Get all holding charges with details
@@ -2629,15 +2636,12 @@ def get_trip_comments_api(request, trip_id):
             }, status=403)
         
         # Get all comments for this load
-        comments = TripComment.objects.filter(load=load).select_related('sender').order_by('created_at')
+        comments = list(TripComment.objects.filter(load=load).select_related('sender').order_by('created_at'))
+        last_read = comment_reads.read_cursors(request.user.id, [load.id])[load.id]
         
-        # Mark unread comments as read for current user
-        TripComment.objects.filter(
-            load=load,
-            is_read=False
-        ).exclude(
-            sender=request.user
-        ).update(is_read=True)
+        # Mark the thread as read up to what we return, one upsert
+        if comments:
+            comment_reads.mark_thread_read(request.user.id, load.id, max(comment.id for comment in comments))
         
         comments_data = []
         for comment in comments:
@@ -2648,7 +2652,7 @@ def get_trip_comments_api(request, trip_id):
                 'comment': comment.comment,
                 'created_at': comment.created_at.isoformat(),
                 'timestamp': comment.created_at.strftime('%b %d, %I:%M %p'),
-                'is_read': comment.is_read
+                'is_read': comment_reads.is_read_for(comment, request.user.id, last_read)
             })
         
         return JsonResponse({
@@ -2685,13 +2689,8 @@ def get_unread_comments_count_api(request, trip_id):
         if not (is_admin or is_vendor):
             return JsonResponse({'success': False, 'error': 'Permission denied'}, status=403)
         
-        # Count unread comments not sent by current user
-        unread_count = TripComment.objects.filter(
-            load=load,
-            is_read=False
-        ).exclude(
-            sender=request.user
-        ).count()
+        # Comments from others after this user's read cursor
+        unread_count = comment_reads.unread_counts(request.user.id, [load.id])[load.id]
         
         return JsonResponse({
             'success': True,
@@ -3234,8 +3233,8 @@ def delete_holding_charge_api(request, charge_id):
         # Delete the charge
         holding_charge.delete()
         
-        # Update load's total holding charges
-        load.update_holding_charges_total()
+        # Re-read the load's totals, the delete moved them (signals.py)
+        load.refresh_money_totals()
         
         # Get updated charges list
         all_charges = load.holding_charge_entries.all().order_by('created_at')
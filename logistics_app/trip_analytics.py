@@ -0,0 +1,268 @@
+"""
+Stage durations and SLA breaches from the trip status event log
+(PostgreSQL only).
+
+Every row of TripStatusEvent is the moment a trip entered a status. A
+stage visit lasts until the next event of the same trip, found with
+LEAD() over the per-trip timeline, so holds, re-entries and skipped
+stages come out right. Each report is one query that groups by
+customer, vendor (owner of the assigned driver), lane (normalized
+pickup -> drop city, same rule as lanes.normalize_place) or all trips:
+
+    stage_dwell(...)      time spent in each stage, re-entries summed
+                          per trip, p50 / p90 / p95 and SLA breaches
+    stage_to_stage(...)   time from first entering one stage to first
+                          reaching another (or any later) stage
+
+e.g. median loading-to-transit time by vendor last quarter:
+
+    start, end = last_quarter()
+    stage_to_stage('reached_loading_point', 'in_transit', group_by='vendor', start=start, end=end)
+
+Durations are in seconds. A trip still sitting in a stage doesn't count
+towards the percentiles, but does count as a breach once past the SLA.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Customer, CustomUser, Driver, Load, TripStatusEvent
+
+STAGE_FLOW = [code for code, _ in Load.TRIP_STATUS_CHOICES]
+
+# Trips never leave these, no dwell time
+TERMINAL_STAGES = ['trip_closed']
+
+PERCENTILES = [0.5, 0.9, 0.95]
+
+
+def _city(column):
+    return f"lower(regexp_replace(btrim(split_part({column}, ',', 1)), '\\s+', ' ', 'g'))"
+
+
+LANE_SQL = f"{_city('l.pickup_location')} || ' → ' || {_city('l.drop_location')}"
+
+# group_by -> (key, label) SQL expressions over the joined tables
+GROUPINGS = {
+    'all': ("'all'", "'All trips'"),
+    'customer': ('l.customer_id::text', 'c.customer_name'),
+    'vendor': ('d.owner_id::text', 'v.full_name'),
+    'lane': (LANE_SQL, LANE_SQL),
+}
+
+
+def quarter_bounds(value):
+    """[start, end) of the calendar quarter containing value, in UTC"""
+    first_month = (value.month - 1) // 3 * 3 + 1
+    start = datetime(value.year, first_month, 1, tzinfo=dt_timezone.utc)
+    if first_month == 10:
+        end = datetime(value.year + 1, 1, 1, tzinfo=dt_timezone.utc)
+    else:
+        end = datetime(value.year, first_month + 3, 1, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def last_quarter(today=None):
+    """[start, end) of the previous calendar quarter"""
+    today = today or datetime.now(dt_timezone.utc)
+    current_start, _ = quarter_bounds(today)
+    previous_month = current_start.month - 3
+    if previous_month < 1:
+        return quarter_bounds(current_start.replace(year=current_start.year - 1, month=previous_month + 12))
+    return quarter_bounds(current_start.replace(month=previous_month))
+
+
+def _sla_arrays(sla_hours):
+    if sla_hours is None:
+        sla_hours = getattr(settings, 'TRIP_STAGE_SLA_HOURS', {})
+    stages = list(sla_hours)
+    return stages, [float(sla_hours[stage]) * 3600 for stage in stages]
+
+
+def _check_arguments(group_by, *stages):
+    if connection.vendor != 'postgresql':
+        raise NotImplementedError("Trip stage analytics need PostgreSQL")
+    if group_by not in GROUPINGS:
+        raise ValueError(f"group_by must be one of {', '.join(GROUPINGS)}")
+    for stage in stages:
+        if stage not in STAGE_FLOW:
+            raise ValueError(f"Unknown trip stage: {stage}")
+
+
+def _tables():
+    return {
+        'events': TripStatusEvent._meta.db_table,
+        'loads': Load._meta.db_table,
+        'customers': Customer._meta.db_table,
+        'drivers': Driver._meta.db_table,
+        'users': CustomUser._meta.db_table,
+    }
+
+
+def _fetch(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column.name for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    for row in rows:
+        p50, p90, p95 = row.pop('percentiles') or (None, None, None)
+        row.update(p50_seconds=p50, p90_seconds=p90, p95_seconds=p95)
+    return rows
+
+
+def stage_dwell(group_by='all', start=None, end=None, stages=None, sla_hours=None):
+    """
+    Time spent in each stage, for stage visits that began in [start, end).
+
+    One row per (group, stage): trips, completed (trips that have left
+    the stage), re_entries, avg / p50 / p90 / p95 seconds over the
+    completed trips, and breaches (trips whose time in the stage, so far
+    or in total, is over the stage's SLA).
+    """
+    stages = stages or [stage for stage in STAGE_FLOW if stage not in TERMINAL_STAGES]
+    _check_arguments(group_by, *stages)
+    group_key, group_label = GROUPINGS[group_by]
+    sla_stages, sla_seconds = _sla_arrays(sla_hours)
+
+    sql = f"""
+        WITH visits AS (
+            SELECT
+                e.load_id,
+                e.to_status AS stage,
+                e.occurred_at AS entered_at,
+                LEAD(e.occurred_at) OVER (PARTITION BY e.load_id ORDER BY e.occurred_at, e.id) AS left_at
+            FROM {{events}} e
+            WHERE e.load_id IN (
+                SELECT load_id FROM {{events}}
+                WHERE occurred_at >= COALESCE(%(start)s, '-infinity'::timestamptz)
+                  AND occurred_at < COALESCE(%(end)s, 'infinity'::timestamptz)
+                  AND to_status = ANY(%(stages)s)
+            )
+        ),
+        per_trip AS (
+            SELECT
+                load_id,
+                stage,
+                COUNT(*) AS visits,
+                BOOL_OR(left_at IS NULL) AS is_open,
+                SUM(EXTRACT(EPOCH FROM COALESCE(left_at, NOW()) - entered_at))::float8 AS seconds
+            FROM visits
+            WHERE entered_at >= COALESCE(%(start)s, '-infinity'::timestamptz)
+              AND entered_at < COALESCE(%(end)s, 'infinity'::timestamptz)
+              AND stage = ANY(%(stages)s)
+            GROUP BY load_id, stage
+        ),
+        sla AS (
+            SELECT * FROM unnest(%(sla_stages)s::text[], %(sla_seconds)s::float8[]) AS sla(stage, seconds)
+        )
+        SELECT
+            {group_key} AS group_key,
+            {group_label} AS group_label,
+            p.stage,
+            COUNT(*) AS trips,
+            COUNT(*) FILTER (WHERE NOT p.is_open) AS completed,
+            SUM(p.visits) - COUNT(*) AS re_entries,
+            AVG(p.seconds) FILTER (WHERE NOT p.is_open) AS avg_seconds,
+            percentile_cont(%(percentiles)s::float8[]) WITHIN GROUP (ORDER BY p.seconds)
+                FILTER (WHERE NOT p.is_open) AS percentiles,
+            COUNT(*) FILTER (WHERE p.seconds > sla.seconds) AS breaches,
+            MAX(sla.seconds) AS sla_seconds
+        FROM per_trip p
+        JOIN {{loads}} l ON l.id = p.load_id
+        LEFT JOIN {{customers}} c ON c.id = l.customer_id
+        LEFT JOIN {{drivers}} d ON d.id = l.driver_id
+        LEFT JOIN {{users}} v ON v.id = d.owner_id
+        LEFT JOIN sla ON sla.stage = p.stage
+        GROUP BY 1, 2, p.stage
+        ORDER BY 2, array_position(%(flow)s::text[], p.stage::text)
+    """.format(**_tables())
+
+    return _fetch(sql, {
+        'start': start,
+        'end': end,
+        'stages': stages,
+        'sla_stages': sla_stages,
+        'sla_seconds': sla_seconds,
+        'percentiles': PERCENTILES,
+        'flow': STAGE_FLOW,
+    })
+
+
+def stage_to_stage(from_stage, to_stage, group_by='all', start=None, end=None, sla_hours=None):
+    """
+    Time from a trip's first entry into from_stage (in [start, end)) to
+    the first later event at to_stage or any stage after it, so trips
+    that skipped to_stage still count.
+
+    One row per group: trips, completed, avg / p50 / p90 / p95 seconds
+    over the completed trips and breaches against sla_hours (a number of
+    hours for this span, no SLA if None).
+    """
+    _check_arguments(group_by, from_stage, to_stage)
+    if STAGE_FLOW.index(to_stage) <= STAGE_FLOW.index(from_stage):
+        raise ValueError("to_stage must come after from_stage")
+    group_key, group_label = GROUPINGS[group_by]
+
+    sql = f"""
+        WITH marked AS (
+            SELECT
+                e.load_id,
+                e.to_status,
+                e.occurred_at,
+                MIN(e.occurred_at) FILTER (WHERE e.to_status = %(from_stage)s)
+                    OVER (PARTITION BY e.load_id) AS from_at
+            FROM {{events}} e
+            WHERE e.load_id IN (
+                SELECT load_id FROM {{events}}
+                WHERE to_status = %(from_stage)s
+                  AND occurred_at >= COALESCE(%(start)s, '-infinity'::timestamptz)
+                  AND occurred_at < COALESCE(%(end)s, 'infinity'::timestamptz)
+            )
+        ),
+        spans AS (
+            SELECT
+                load_id,
+                MIN(from_at) AS from_at,
+                MIN(occurred_at) FILTER (
+                    WHERE to_status = ANY(%(reached)s) AND occurred_at >= from_at
+                ) AS to_at
+            FROM marked
+            GROUP BY load_id
+        ),
+        durations AS (
+            SELECT
+                load_id,
+                to_at IS NOT NULL AS is_completed,
+                EXTRACT(EPOCH FROM COALESCE(to_at, NOW()) - from_at)::float8 AS seconds
+            FROM spans
+            WHERE from_at >= COALESCE(%(start)s, '-infinity'::timestamptz)
+              AND from_at < COALESCE(%(end)s, 'infinity'::timestamptz)
+        )
+        SELECT
+            {group_key} AS group_key,
+            {group_label} AS group_label,
+            COUNT(*) AS trips,
+            COUNT(*) FILTER (WHERE s.is_completed) AS completed,
+            AVG(s.seconds) FILTER (WHERE s.is_completed) AS avg_seconds,
+            percentile_cont(%(percentiles)s::float8[]) WITHIN GROUP (ORDER BY s.seconds)
+                FILTER (WHERE s.is_completed) AS percentiles,
+            COUNT(*) FILTER (WHERE s.seconds > %(sla_seconds)s) AS breaches
+        FROM durations s
+        JOIN {{loads}} l ON l.id = s.load_id
+        LEFT JOIN {{customers}} c ON c.id = l.customer_id
+        LEFT JOIN {{drivers}} d ON d.id = l.driver_id
+        LEFT JOIN {{users}} v ON v.id = d.owner_id
+        GROUP BY 1, 2
+        ORDER BY 2
+    """.format(**_tables())
+
+    return _fetch(sql, {
+        'from_stage': from_stage,
+        'reached': STAGE_FLOW[STAGE_FLOW.index(to_stage):],
+        'start': start,
+        'end': end,
+        'sla_seconds': float(sla_hours) * 3600 if sla_hours is not None else None,
+        'percentiles': PERCENTILES,
+    })
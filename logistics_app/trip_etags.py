@@ -0,0 +1,98 @@
+"""
+Conditional GET for the trip detail endpoints: get_trip_details_api,
+get_payment_details_api and api_app's VendorTripDetailsView.
+
+A trip's validator comes from one aggregate query: Load.updated_at plus
+the newest updated_at and the row count of its comments, holding charges
+and payments (the counts catch deletes). The query runs on the queryset
+the caller may see, so no row means not found / not allowed. The ETag
+also covers the TDS rate version (the payloads include TDS math) and,
+for per-viewer payloads, the viewer and their chat read cursor.
+
+If-None-Match matching the ETag gets a 304. If-Modified-Since is not
+honoured: deleting a comment, charge or payment, or a TDS rate change,
+leaves the newest timestamp as it was. Last-Modified is informational.
+Otherwise the payload is cached under the ETag: an unchanged trip costs
+the one query and a cache read, whoever polls it.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.http import HttpResponse
+from django.utils.http import http_date
+
+from . import reference_data
+from .models import HoldingCharge, Payment, TripComment, TripCommentReadCursor
+
+BODY_CACHE_KEY = 'trip_body:{}'
+BODY_TIMEOUT = 60 * 10
+
+RELATED = {
+    'comments': TripComment,
+    'charges': HoldingCharge,
+    'payments': Payment,
+}
+
+
+def _related(model, aggregate):
+    rows = model.objects.filter(load=OuterRef('pk')).order_by().values('load')
+    return Subquery(rows.annotate(value=aggregate).values('value')[:1])
+
+
+def trip_validator(loads, trip_id, name, viewer=None):
+    """
+    {'etag', 'last_modified'} of trip_id within the loads queryset, None
+    if it isn't in there. name keeps the payloads of different endpoints
+    apart. Pass viewer for payloads with per-viewer read state.
+    """
+    annotations = {}
+    for prefix, model in RELATED.items():
+        annotations[f'{prefix}_at'] = _related(model, Max('updated_at'))
+        annotations[f'{prefix}_count'] = _related(model, Count('id'))
+    if viewer is not None:
+        annotations['last_read'] = Subquery(
+            TripCommentReadCursor.objects.filter(user=viewer, load=OuterRef('pk'))
+            .values('last_read_comment_id')[:1],
+            output_field=IntegerField()
+        )
+
+    row = loads.filter(pk=trip_id).annotate(**annotations).values('updated_at', *annotations).first()
+    if row is None:
+        return None
+
+    last_modified = max(value for key, value in row.items() if key.endswith('_at') and value is not None)
+    parts = [
+        name, trip_id, reference_data.version(reference_data.TDS_RATE),
+        viewer.id if viewer is not None else None,
+        sorted((key, value.isoformat() if hasattr(value, 'isoformat') else value) for key, value in row.items()),
+    ]
+    digest = hashlib.md5(json.dumps(parts).encode()).hexdigest()
+    return {'etag': f'"trip-{digest}"', 'last_modified': last_modified}
+
+
+def is_not_modified(request, validator):
+    # If-None-Match only: If-Modified-Since can't see deletes or a TDS
+    # rate change, the newest timestamp stays the same
+    return request.META.get('HTTP_IF_NONE_MATCH') == validator['etag']
+
+
+def with_validator(response, validator):
+    response['ETag'] = validator['etag']
+    response['Last-Modified'] = http_date(validator['last_modified'].timestamp())
+    # Clients may keep it but must revalidate, and only for this user
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def not_modified(validator):
+    return with_validator(HttpResponse(status=304), validator)
+
+
+def cached_body(validator):
+    return cache.get(BODY_CACHE_KEY.format(validator['etag']))
+
+
+def cache_body(validator, body):
+    cache.set(BODY_CACHE_KEY.format(validator['etag']), body, BODY_TIMEOUT)
@@ -0,0 +1,115 @@
+"""
+Vendor trip history (api_app VendorTripHistoryView): the vendor's
+completed trips, newest first, and summary figures over all of them.
+
+The trips are keyset paginated (api_app.pagination) with payments and the
+vendor's requests prefetched. The summary is one conditional-aggregate
+query, cached per vendor under a (global, vendor) version like the
+vendor dashboard counts in kpis.py. signals.py bumps the versions:
+
+    global    a load enters or leaves the completed statuses, a completed
+              trip's POD, driver or vehicle changes, a Payment is saved
+              or deleted
+    vendor    one of the vendor's LoadRequests changes
+
+Changes the signals don't see (queryset .update(), a driver or vehicle
+changing owner) show once SUMMARY_TIMEOUT expires.
+"""
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q, Subquery, Sum
+
+from .models import Load, LoadRequest, Payment
+
+COMPLETED_STATUSES = [
+    'pod_uploaded',
+    'payment_completed',
+    'trip_closed',
+]
+
+# Load fields the history summary depends on, for the post_save dirty check
+LOAD_FIELDS = ('trip_status', 'pod_document', 'driver_id', 'vehicle_id')
+
+SUMMARY_TIMEOUT = 60 * 60
+
+
+def vendor_trips(vendor):
+    """Completed loads the vendor took (accepted request) or drove (own driver / vehicle)"""
+    accepted = LoadRequest.objects.filter(load=OuterRef('pk'), vendor=vendor, status='accepted')
+    return Load.objects.filter(
+        Q(Exists(accepted)) | Q(driver__owner=vendor) | Q(vehicle__owner=vendor),
+        trip_status__in=COMPLETED_STATUSES
+    )
+
+
+def compute_summary(vendor):
+    """Status counts and POD / payment figures of all the vendor's completed trips, one query"""
+    paid = (
+        Payment.objects.filter(load=OuterRef('pk')).order_by().values('load')
+        .annotate(total=Sum('amount_paid')).values('total')
+    )
+    totals = vendor_trips(vendor).annotate(paid=Subquery(paid)).aggregate(
+        total=Count('id'),
+        with_pod=Count('id', filter=Q(pod_document__isnull=False)),
+        with_payments=Count('id', filter=Q(paid__isnull=False)),
+        amount_paid=Sum('paid'),
+        **{
+            f'status_{status}': Count('id', filter=Q(trip_status=status))
+            for status in COMPLETED_STATUSES
+        }
+    )
+
+    status_counts = {status: totals[f'status_{status}'] for status in COMPLETED_STATUSES}
+    total = totals['total']
+    amount_paid = float(totals['amount_paid'] or 0)
+    return {
+        'total_count': total,
+        'status_counts': status_counts,
+        'summary': {
+            'total_completed_trips': sum(status_counts.values()),
+            'pod_uploaded_count': status_counts['pod_uploaded'],
+            'payment_completed_count': status_counts['payment_completed'],
+            'trips_with_pod': totals['with_pod'],
+            'trips_without_pod': total - totals['with_pod'],
+            'trips_with_payments': totals['with_payments'],
+            'total_amount_paid_all_trips': amount_paid,
+            'average_payment_per_trip': amount_paid / max(total, 1),
+        },
+    }
+
+
+def _version_key(vendor_id=None):
+    if vendor_id is None:
+        return 'vendor_trip_history:version:global'
+    return f'vendor_trip_history:version:{vendor_id}'
+
+
+def _new_version():
+    # Time based so a cache restart never reuses an old version
+    return int(time.time() * 1000)
+
+
+def bump_version(vendor_id=None):
+    """Invalidate one vendor's cached summary, or everyone's if vendor_id is None"""
+    try:
+        cache.incr(_version_key(vendor_id))
+    except ValueError:
+        cache.set(_version_key(vendor_id), _new_version(), None)
+
+
+def get_summary(vendor):
+    """compute_summary(vendor), from the cache unless a version was bumped"""
+    keys = [_version_key(), _version_key(vendor.id)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+
+    key = f'vendor_trip_history:summary:{vendor.id}:{versions[keys[0]]}:{versions[keys[1]]}'
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute_summary(vendor)
+        cache.set(key, summary, SUMMARY_TIMEOUT)
+    return summary
@@ -25,6 +25,7 @@ urlpatterns = [
     path('delete_vehicle_type/<int:pk>/', views.delete_vehicle_type, name='delete_vehicle_type'),
     path('vehicle_type_list_view/', views.vehicle_type_list_view, name='vehicle_type_list_view'),
     path('loads/', views.load_list, name='load_list'),
+    path('loads/rows/', views.grid_rows, {'grid': 'loads'}, name='load_list_rows'),
     path('loads/<int:load_id>/requests/', views.load_requests_api, name='load_requests_api'),
     path('loads/<int:load_id>/requests/<int:request_id>/accepted-old/', 
     views.accept_load_request_with_assignment, 
@@ -35,6 +36,7 @@ urlpatterns = [
     path('api/vendors/<int:vendor_id>/vehicles/', views.vendor_vehicles_api, name='vendor_vehicles_api'),
     path('api/vendors/<int:vendor_id>/drivers/', views.vendor_drivers_api, name='vendor_drivers_api'),
     path('loads/add/', views.add_load, name='add_load'),
+    path('loads/import/', views.import_loads_api, name='import_loads'),
     path('loads/<int:load_id>/requests/<int:request_id>/accepted/', views.accept_load_request, name='accept_load_request'),
     path('loads/<int:load_id>/requests/<int:request_id>/rejected/', views.reject_load_request, name='reject_load_request'),
     path('loads/<int:load_id>/delete/', views.delete_load, name='delete_load'),
@@ -62,6 +64,7 @@ urlpatterns = [
          name='update_pod_notes'),
 
     path('trips/', views.trip_management, name='trip_management'),
+    path('trips/rows/', views.grid_rows, {'grid': 'trips'}, name='trip_management_rows'),
     path('vehicle-inventory/', views.vehicle_inventory, name='vehicle_inventory'),
     path('api/trip/<int:trip_id>/details/', views.get_trip_details_api, name='get_trip_details_api'),
     path('api/trip/<int:trip_id>/update-status/', views.update_trip_status_api, name='update_trip_status_api'),
@@ -69,6 +72,7 @@ urlpatterns = [
     path('api/trip/<int:trip_id>/add-comment/', views.add_trip_comment_api, name='add_trip_comment'),
     path('api/trip/<int:trip_id>/comments/', views.get_trip_comments_api, name='get_trip_comments'),
     path('api/trip/<int:trip_id>/unread-count/', views.get_unread_comments_count_api, name='unread_comments_count'),
+    path('api/trips/unread-counts/', views.get_unread_comments_counts_api, name='unread_comments_counts'),
     path('api/trip/<int:trip_id>/close/', views.close_trip_api, name='close_trip_api'),
     path('api/trip/<int:trip_id>/upload-lr/', views.upload_lr_document_api, name='upload_lr_document'),
     path('api/trip/<int:trip_id>/view-lr/', views.view_lr_document_api, name='view_lr_document'),
@@ -88,7 +92,9 @@ urlpatterns = [
 
 
 path('payments/', views.payment_management, name='payment_management'),
+path('payments/rows/', views.grid_rows, {'grid': 'payments'}, name='payment_management_rows'),
 path('pods/', views.pod_management, name='pod_management'),
+path('pods/rows/', views.grid_rows, {'grid': 'pods'}, name='pod_management_rows'),
 path('api/payment/<int:trip_id>/details/', views.get_payment_details_api, name='get_payment_details_api'),
 path('api/payment/<int:trip_id>/mark-final-payment-paid/', views.mark_final_payment_paid_api, name='mark_final_payment_paid'),
 path('api/payment/<int:trip_id>/record-payment/', views.record_payment_api, name='record_payment_api'),
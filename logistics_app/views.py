@@ -3,7 +3,11 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import CustomUser, Customer, Driver, VehicleType, Load, Vehicle, LoadRequest, TripComment, Notification, HoldingCharge, TDSRate, Payment, CustomerContactPerson
+from .models import CustomUser, Customer, Driver, VehicleType, Load, Vehicle, LoadRequest, TripComment, Notification, HoldingCharge, TDSRate, Payment, CustomerContactPerson, VehicleLatestPosition
+from . import kpis, comment_reads, grids, reference_data, trip_etags
+from .locations import TRIP_NOT_FOUND, ingest_location_pings
+from .lanes import queue_new_load_alerts
+from .load_import import clean_load_fields, read_load_rows, import_loads, LoadImportError
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from datetime import datetime, date
@@ -64,12 +68,18 @@ def admin_dashboard(request):
         messages.error(request, "Access denied.")
         return redirect('admin_login')
     # Get statistics based on user role
+    # Counters are maintained on save/delete (see kpis.py), one small read here
     if request.user.role == 'traffic_person':
         # Traffic person only sees their own data
-        total_loads = Load.objects.filter(created_by=request.user).count()
-        closed_trips = Load.objects.filter(created_by=request.user, trip_status='trip_closed').count()
-        ongoing_trips = Load.objects.filter(created_by=request.user).exclude(trip_status__in=['trip_closed', 'trip_requested']).count()
-        unassigned_loads = Load.objects.filter(created_by=request.user, driver__isnull=True).count()
+        counters = kpis.get_counters(kpis.user_scope(request.user.id))
+        total_loads = counters.get(kpis.TOTAL_LOADS, 0)
+        closed_trips = counters.get(kpis.trip_status_metric('trip_closed'), 0)
+        ongoing_trips = (
+            total_loads
+            - closed_trips
+            - counters.get(kpis.trip_status_metric('trip_requested'), 0)
+        )
+        unassigned_loads = counters.get(kpis.UNASSIGNED_LOADS, 0)
 
         context = {
             'user': request.user,
@@ -80,11 +90,11 @@ def admin_dashboard(request):
         }
     else:
         # Admin sees all statistics and KPIs - Trip/Load Status Focus
-        now = timezone.now()
-        
+        counters = kpis.get_counters(kpis.GLOBAL_SCOPE)
+
         # Trip Status Statistics
-        total_loads = Load.objects.count()
-        closed_trips = Load.objects.filter(trip_status='trip_closed').count()
+        total_loads = counters.get(kpis.TOTAL_LOADS, 0)
+        closed_trips = counters.get(kpis.trip_status_metric('trip_closed'), 0)
         
         # On-going trips (all active statuses except closed/requested)
         ongoing_statuses = [
@@ -92,20 +102,18 @@ def admin_dashboard(request):
             'reached_unloading_point', 'unloading_completed', 'pod_pending', 
             'pod_received_at_office'
         ]
-        ongoing_trips = Load.objects.filter(trip_status__in=ongoing_statuses).count()
+        ongoing_trips = sum(counters.get(kpis.trip_status_metric(s), 0) for s in ongoing_statuses)
         
         # Non-assigned loads (pending status with no driver)
-        unassigned_loads = Load.objects.filter(driver__isnull=True).count()
+        unassigned_loads = counters.get(kpis.UNASSIGNED_LOADS, 0)
         
         # Active drivers and vehicles
-        active_drivers = Driver.objects.filter(is_active=True).count()
-        active_vehicles = Vehicle.objects.filter(status='active').count()
+        active_drivers = counters.get(kpis.ACTIVE_DRIVERS, 0)
+        active_vehicles = counters.get(kpis.ACTIVE_VEHICLES, 0)
 
         # Trip status counts for charting
-        status_counts_qs = Load.objects.values('trip_status').annotate(count=Count('id'))
-        status_counts_map = {item['trip_status']: item['count'] for item in status_counts_qs}
         trip_status_labels = [label for key, label in Load.TRIP_STATUS_CHOICES]
-        trip_status_values = [status_counts_map.get(key, 0) for key, label in Load.TRIP_STATUS_CHOICES]
+        trip_status_values = [counters.get(kpis.trip_status_metric(key), 0) for key, label in Load.TRIP_STATUS_CHOICES]
 
         context = {
             'user': request.user,
@@ -492,7 +500,7 @@ def driver_list(request):
     drivers = Driver.objects.filter(created_by=request.user).select_related('owner').order_by('-created_at')
     
     # Get all vendors for the owner dropdown
-    vendors = CustomUser.objects.filter(role='vendor', is_active=True)
+    vendors = reference_data.active_vendors()
     
     context = {
         'drivers': drivers,
@@ -748,35 +756,24 @@ def load_list(request):
         messages.error(request, "Access denied.")
         return redirect('admin_login')
 
-    # Get loads based on user role
-    if request.user.role == 'traffic_person':
-        # Traffic person only sees their own pending loads
-        loads = Load.objects.filter(
-            created_by=request.user,
-            status='pending'
-        )
-    else:
-        # Admin sees ALL pending loads from ALL users
-        loads = Load.objects.filter(status='pending')
-
-    loads = loads.select_related(
-        'customer', 'vehicle_type', 'driver', 'vehicle'
-    ).order_by('-created_at')
+    # Traffic person only sees their own pending loads, admin sees all.
+    # First page only, the grid fetches the rest from load_list_rows
+    page = grids.get_initial_page('loads', request)
 
-    tds_rate = TDSRate.objects.first()
-    
+    # Reference data comes from the process cache, see reference_data.py
     # Get customers with their contact persons
-    customers = Customer.objects.filter(is_active=True).prefetch_related('contacts').order_by('customer_name')
-    vehicle_types = VehicleType.objects.all().order_by('name')
+    customers = reference_data.active_customers()
+    vehicle_types = reference_data.vehicle_types()
     
     # Get all traffic persons (employees) for assignment
-    employees = CustomUser.objects.filter(role='traffic_person', is_active=True).order_by('full_name')
+    employees = reference_data.active_traffic_persons()
 
     context = {
-        'loads': loads,
+        'loads': page['rows'],
+        'grid': grids.page_state(page),
         'customers': customers,
         'vehicle_types': vehicle_types,
-        'tds_rate': tds_rate.rate if tds_rate else 2,
+        'tds_rate': reference_data.tds_rate(),
         'employees': employees,
     }
     return render(request, 'load_list.html', context)
@@ -895,7 +892,9 @@ def accept_load_request(request, load_id, request_id):
                 load=load, 
                 status='pending'
             ).exclude(id=request_id)
+            rejected_vendor_ids = list(rejected_requests.values_list('vendor_id', flat=True))
             rejected_requests.update(status='rejected')
+            kpis.bump_vendor_dashboards_on_commit(rejected_vendor_ids)
             
             # Send rejection notifications
             for req in rejected_requests:
@@ -984,10 +983,13 @@ def accept_load_request_with_assignment(request, load_id, request_id):
             )
             
             # Reject other requests
-            LoadRequest.objects.filter(
+            pending_requests = LoadRequest.objects.filter(
                 load=load, 
                 status='pending'
-            ).exclude(id=request_id).update(status='rejected')
+            ).exclude(id=request_id)
+            rejected_vendor_ids = list(pending_requests.values_list('vendor_id', flat=True))
+            pending_requests.update(status='rejected')
+            kpis.bump_vendor_dashboards_on_commit(rejected_vendor_ids)
         
         return JsonResponse({
             "success": True, 
@@ -1143,92 +1145,12 @@ def add_load(request):
                 return JsonResponse({'success': False, 'error': 'Invalid vehicle type'}, status=400)
 
             # =========================
-            # 3. Locations
-            # =========================
-            pickup_location = request.POST.get('pickupLocation', '').strip()
-            drop_location = request.POST.get('dropLocation', '').strip()
-
-            if not pickup_location or not drop_location:
-                return JsonResponse(
-                    {'success': False, 'error': 'Both pickup & drop locations are required'},
-                    status=400
-                )
-
-            # =========================
-            # 4. Dates
+            # 3-8. Locations, dates, time, amounts, optional fields
+            # (same rules as the bulk import, see load_import.py)
             # =========================
-            pickup_date_str = request.POST.get('pickupDate')
-            if not pickup_date_str:
-                return JsonResponse({'success': False, 'error': 'Pickup date is required'}, status=400)
-
-            try:
-                pickup_date = datetime.strptime(pickup_date_str, '%Y-%m-%d').date()
-            except ValueError:
-                return JsonResponse({'success': False, 'error': 'Invalid pickup date format'}, status=400)
-
-            drop_date = None
-            drop_date_str = request.POST.get('dropDate', '').strip()
-            if drop_date_str:
-                try:
-                    drop_date = datetime.strptime(drop_date_str, '%Y-%m-%d').date()
-                except ValueError:
-                    return JsonResponse({'success': False, 'error': 'Invalid drop date format'}, status=400)
-
-            # =========================
-            # 5. Time (Optional)
-            # =========================
-            time_obj = None
-            time_str = request.POST.get('time', '').strip()
-            if time_str:
-                try:
-                    time_obj = datetime.strptime(time_str, '%I:%M %p').time()
-                except ValueError:
-                    return JsonResponse(
-                        {'success': False, 'error': 'Invalid time format. Use: 02:30 PM'},
-                        status=400
-                    )
-
-            # =========================
-            # 6. Total Trip Amount
-            # =========================
-            total_amount_str = request.POST.get('total_amount', '').replace(',', '').strip()
-
-            if total_amount_str:
-                try:
-                    total_amount = Decimal(total_amount_str)
-                    if total_amount <= 0:
-                        return JsonResponse(
-                            {'success': False, 'error': 'Amount must be greater than 0'},
-                            status=400
-                        )
-                except:
-                    return JsonResponse(
-                        {'success': False, 'error': 'Invalid amount format'},
-                        status=400
-                    )
-            else:
-                total_amount = Decimal('0.00')
-
-            # =========================
-            # 7. Optional Fields
-            # =========================
-            contact_person_name = request.POST.get('contactPersonName', '').strip() or None
-            contact_person_phone = request.POST.get('contactPersonPhone', '').strip() or None
-            weight = request.POST.get('weight', '').strip() or None
-            material = request.POST.get('material', '').strip() or None
-            notes = request.POST.get('notes', '').strip() or None
-            apply_tds = request.POST.get('apply_tds') == 'on' and total_amount > 0
-            
-            # User Amount (Optional)
-            user_amount = Decimal('0.00')
-            user_amount_str = request.POST.get('customer_amount', '').replace(',', '').strip()
-            if user_amount_str:
-                try:
-                    user_amount = Decimal(user_amount_str).quantize(
-                        Decimal('0.01'), rounding=ROUND_HALF_UP
-                    )
-                except:
-                    user_amount = Decimal('0.00')
+            fields, error = clean_load_fields(request.POST)
+            if error:
+                return JsonResponse({'success': False, 'error': error}, status=400)
 
             # =========================
             # 9. Create Load
@@ -1250,25 +1172,16 @@ def add_load(request):
             
             load = Load.objects.create(
                 customer=customer,
-                contact_person_name=contact_person_name,
-                contact_person_phone=contact_person_phone,
                 vehicle_type=vehicle_type,
-                pickup_location=pickup_location,
-                drop_location=drop_location,
-                pickup_date=pickup_date,
-                drop_date=drop_date,
-                time=time_obj,
-                weight=weight,
-                material=material,
-                notes=notes,
-                apply_tds=apply_tds,
-                user_amount=user_amount,
-                price_per_unit=total_amount,
                 created_by=created_by_user,
                 status='pending',
-                trip_status='pending'
+                trip_status='pending',
+                **fields
             )
 
+            # Alert vendors whose vehicles run this lane
+            queue_new_load_alerts([load.id])
+
             # =========================
             # 10. Success Response
             # =========================
@@ -1294,16 +1207,73 @@ def add_load(request):
             status=500
         )
 
+@login_required
+@require_http_methods(["POST"])
+def import_loads_api(request):
+    """
+    Bulk load import from a CSV / XLSX upload (field "file").
+    Columns are the add_load form fields, see load_import.py.
+    Send dry_run=1 to only validate. Returns a per-row error report.
+    """
+    if not (request.user.is_staff or request.user.role == 'admin' or request.user.role == 'traffic_person'):
+        return JsonResponse({'success': False, 'error': 'Unauthorized'}, status=403)
+
+    upload = request.FILES.get('file')
+    if not upload:
+        return JsonResponse({'success': False, 'error': 'File is required'}, status=400)
+
+    try:
+        rows = read_load_rows(upload, upload.name)
+    except LoadImportError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    if not rows:
+        return JsonResponse({'success': False, 'error': 'The file has no rows'}, status=400)
+
+    dry_run = request.POST.get('dry_run') in ('1', 'true', 'on')
+
+    try:
+        result = import_loads(rows, request.user, dry_run=dry_run)
+    except Exception:
+        print("=== IMPORT LOADS ERROR ===")
+        traceback.print_exc()
+        print("=== END ERROR ===")
+
+        return JsonResponse(
+            {'success': False, 'error': 'Failed to import loads. Please try again.'},
+            status=500
+        )
+
+    created_count = len(result['created'])
+    if dry_run:
+        message = f"{result['valid_count']} of {len(rows)} rows are valid"
+    else:
+        message = f"{created_count} of {len(rows)} loads imported successfully!"
+
+    return JsonResponse({
+        'success': True,
+        'message': message,
+        'dry_run': dry_run,
+        'total_rows': len(rows),
+        'created_count': created_count,
+        'error_count': len(result['errors']),
+        'created': result['created'],
+        'errors': result['errors'],
+    })
+
 @login_required
 @require_GET
 def get_customer_contact_persons(request):
     """API endpoint to get all customers with their contact persons"""
     try:
-        customers = Customer.objects.filter(is_active=True).prefetch_related('contacts')
+        customers = reference_data.active_customers()
         
         contact_persons_dict = {}
         for customer in customers:
-            contact_persons = list(customer.contacts.values('id', 'name', 'phone_number'))
+            contact_persons = [
+                {'id': contact.id, 'name': contact.name, 'phone_number': contact.phone_number}
+                for contact in customer.contacts.all()
+            ]
             # Add customer's own phone as primary contact
             contact_persons_dict[customer.id] = contact_persons
         
@@ -1406,7 +1376,7 @@ def vendor_list(request):
     ).order_by('-date_joined')
     
     # Get vehicle types for the form dropdown
-    vehicle_types = VehicleType.objects.all().order_by('name')
+    vehicle_types = reference_data.vehicle_types()
 
     return render(request, 'vendor_list.html', {'vendors': vendors, 'vehicle_types': vehicle_types})
 
@@ -1628,10 +1598,10 @@ def vehicle_list(request):
     vehicles = Vehicle.objects.select_related('owner').order_by('-id')
 
     # Vendors: ALL active vendors (role='vendor')
-    vendors = CustomUser.objects.filter(role='vendor', is_active=True).order_by('full_name')
+    vendors = reference_data.active_vendors()
     
     # Vehicle types from VehicleType model
-    vehicle_types = VehicleType.objects.all().order_by('name')
+    vehicle_types = reference_data.vehicle_types()
 
     return render(request, 'vehicle_list.html', {
         'vehicles': vehicles,
@@ -1646,75 +1616,27 @@ def vehicle_inventory(request):
     if not request.user.is_staff:
         return redirect('admin_login')
 
-    # Vehicles: still only those whose owner was created by this admin
-    all_vehicles = Vehicle.objects.select_related('owner').filter(status='active').order_by('-id')
-    print(f"\n✓ TOTAL ACTIVE VEHICLES: {all_vehicles.count()}")
-    
-    # Add current_location to each vehicle by fetching from latest active load
-    # Filter to show only vehicles with location updated within 24 hours
-    from django.utils import timezone
-    from datetime import timedelta
-    
-    filtered_vehicles = []
+    # Only active vehicles with a location update within 24 hours.
+    # VehicleLatestPosition is kept up to date from Load.current_location
+    # and Vehicle.location, so this is one indexed range query.
     cutoff_time = timezone.now() - timedelta(hours=24)
-    print(f"✓ CUTOFF TIME (24 hours ago): {cutoff_time}")
-    
-    for vehicle in all_vehicles:
-        print(f"\n--- VEHICLE: {vehicle.reg_no} ---")
-        
-        # Check location update timestamp from either Load OR Vehicle itself
-        location_timestamp = None
-        source = None
-        current_location = None
-        
-        # First, try to get location from the latest load
-        latest_load = Load.objects.filter(
-            vehicle=vehicle
-        ).select_related().order_by('-created_at').first()
-        
-        if latest_load:
-            print(f"  ✓ Latest Load ID: {latest_load.id}")
-            print(f"  ✓ Load Status: {latest_load.status}")
-            print(f"  ✓ Current Location: {latest_load.current_location}")
-            print(f"  ✓ Location Updated At: {latest_load.current_location_updated_at}")
-            
-            current_location = latest_load.current_location
-            location_timestamp = latest_load.current_location_updated_at
-            source = "Load"
-            vehicle.current_location_from_load = latest_load.current_location
-        else:
-            print(f"  ✗ No loads found for this vehicle, checking vehicle's own timestamp...")
-            
-        # Fallback: Check vehicle's own location timestamp if load doesn't have timestamp
-        if not location_timestamp and vehicle.current_location_updated_at:
-            print(f"  ✓ Using Vehicle's location timestamp: {vehicle.current_location_updated_at}")
-            location_timestamp = vehicle.current_location_updated_at
-            current_location = vehicle.location
-            source = "Vehicle"
-            vehicle.current_location_from_load = vehicle.location
-        
-        # Include vehicle if it has a recent location update
-        if location_timestamp:
-            is_recent = location_timestamp >= cutoff_time
-            print(f"  ✓ Location from {source}, Updated At: {location_timestamp}")
-            print(f"  ✓ Is Recent (>= {cutoff_time})?: {is_recent}")
-            
-            if is_recent:
-                filtered_vehicles.append(vehicle)
-                print(f"  ✓ ✓ ADDED TO INVENTORY")
-            else:
-                print(f"  ✗ Too old, not added")
-        else:
-            print(f"  ✗ No location update timestamp found anywhere, skipping")
-    
-    vehicles = filtered_vehicles
-    print(f"\n✓ FINAL FILTERED VEHICLES: {len(vehicles)}")
+
+    positions = VehicleLatestPosition.objects.filter(
+        located_at__gte=cutoff_time,
+        vehicle__status='active'
+    ).select_related('vehicle', 'vehicle__owner').order_by('-vehicle_id')
+
+    vehicles = []
+    for position in positions:
+        vehicle = position.vehicle
+        vehicle.current_location_from_load = position.location
+        vehicles.append(vehicle)
 
     # Vendors: ALL active vendors (role='vendor')
-    vendors = CustomUser.objects.filter(role='vendor', is_active=True).order_by('full_name')
+    vendors = reference_data.active_vendors()
     
     # Vehicle types from VehicleType model
-    vehicle_types = VehicleType.objects.all().order_by('name')
+    vehicle_types = reference_data.vehicle_types()
 
     return render(request, 'vehicle_inventory.html', {
         'vehicles': vehicles,
@@ -1907,11 +1829,7 @@ def get_profile_data(request):
     # Get TDS rate if user is admin/staff
     tds_rate = None
     if user.is_staff or user.role == 'admin':
-        tds_rate_obj = TDSRate.objects.first()
-        if tds_rate_obj:
-            tds_rate = float(tds_rate_obj.rate)
-        else:
-            tds_rate = 2.00  # Default value
+        tds_rate = float(reference_data.tds_rate())
     
     return JsonResponse({
         'full_name': user.full_name,
@@ -2117,59 +2035,207 @@ def trip_management(request):
         messages.error(request, "Access denied.")
         return redirect('admin_login')
 
-    # Get trips based on user role
-    if request.user.role == 'traffic_person':
-        # Traffic person only sees their own trips
-        trips = Load.objects.filter(
-            created_by=request.user
-        ).exclude(
-            status='pending'
-        ).exclude(trip_status='trip_closed')  # Exclude pending and trip_closed for traffic person view
-    else:
-        # Admin sees ALL trips from ALL users
-        trips = Load.objects.exclude(status='pending').exclude(trip_status='trip_closed')  # Exclude pending and trip_closed for admin view
-
-    trips = trips.select_related(
-        'driver', 'vehicle', 'vehicle_type', 'customer', 'created_by'
-    ).order_by('-updated_at')
+    # Traffic person only sees their own trips, pending and trip_closed excluded.
+    # First page only, the grid fetches the rest from trip_management_rows
+    page = grids.get_initial_page('trips', request)
 
-    return render(request, 'trip_management.html', {'trips': trips})
+    return render(request, 'trip_management.html', {'trips': page['rows'], 'grid': grids.page_state(page)})
 
 @api_view(['POST'])
 def update_trip_location(request, trip_id):
     """
     Update current location for a trip
     """
-    try:
-        load = Load.objects.get(id=trip_id)
-    except Load.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Trip not found'}, status=404)
-    
     location = request.data.get('location', '').strip()
     
     if not location:
         return JsonResponse({'success': False, 'error': 'Location is required'}, status=400)
     
-    # Update the location
-    load.current_location = location
-    load.updated_at = timezone.now()
-    load.save()
+    # Update the location (also appended to the trip's location history)
+    updated_at = timezone.now()
+    result = ingest_location_pings(
+        [{'trip_id': trip_id, 'location': location, 'recorded_at': updated_at.isoformat()}],
+        Load.objects.all(),
+        reported_by=request.user if request.user.is_authenticated else None
+    )[0]
+    if not result['accepted']:
+        return JsonResponse(
+            {'success': False, 'error': result['error']},
+            status=404 if result['error'] == TRIP_NOT_FOUND else 400
+        )
     
     # Format the timestamp for display
-    formatted_timestamp = load.updated_at.strftime('%b %d, %Y %I:%M %p')
+    formatted_timestamp = updated_at.strftime('%b %d, %Y %I:%M %p')
     
     return JsonResponse({
         'success': True,
         'message': 'Location updated successfully',
-        'updated_at': load.updated_at.isoformat(),
+        'updated_at': updated_at.isoformat(),
         'formatted_updated_at': formatted_timestamp,
         'location': location
     })
 
+def _trip_details_data(request, load):
+    """Payload of get_trip_details_api"""
+    # Progress mapping
+    status_progress = {
+        'trip_requested': 0,
+        'trip_confirmed': 7.7,
+        'reached_loading_point': 15.4,
+        'upload_lr': 23.1,
+        'in_transit': 30.8,
+        'reached_unloading_point': 38.5,
+        'unloading_completed': 46.2,
+        'pod_pending': 53.8,
+        'pod_received_at_office': 61.5,
+        'trip_closed': 100,
+    }
+    progress = status_progress.get(load.trip_status, 0)
+
+    # Payment status
+    final_payment_paid = load.trip_status == 'trip_closed'
+
+    # Get comments for this trip
+    comments = []
+    trip_comments = TripComment.objects.filter(load=load).select_related('sender').order_by('created_at')
+    last_read = comment_reads.read_cursors(request.user.id, [load.id])[load.id]
+    for comment in trip_comments:
+        comments.append({
+            'id': comment.id,
+            'comment': comment.comment,
+            'sender_name': comment.sender.full_name,
+            'sender_type': comment.sender_type,
+            'created_at': comment.created_at.isoformat(),
+            'timestamp': comment.created_at.strftime('%b %d, %I:%M %p'),
+            'is_read': comment_reads.is_read_for(comment, request.user.id, last_read)
+        })
+
+    # Get all holding charges with details
+    holding_charges_list = []
+    all_holding_charges = load.holding_charge_entries.all().order_by('created_at')
+    
+    for charge in all_holding_charges:
+        holding_charges_list.append({
+            'id': charge.id,
+            'amount': float(charge.amount),
+            'trip_stage': charge.trip_stage,
+            'trip_stage_display': dict(Load.TRIP_STATUS_CHOICES).get(charge.trip_stage, charge.trip_stage),
+            'reason': charge.reason,
+            'added_by': charge.added_by.full_name if charge.added_by else 'System',
+            'created_at': charge.created_at.isoformat(),
+            'created_at_display': charge.created_at.strftime('%b %d, %Y %I:%M %p')
+        })
+
+    # Get all payments for this trip
+    payments_list = []
+    all_payments = load.payments.all().select_related('recorded_by').order_by('-payment_date')
+    
+    for payment in all_payments:
+        payments_list.append({
+            'id': payment.id,
+            'amount_paid': float(payment.amount_paid),
+            'payment_date': payment.payment_date.isoformat(),
+            'payment_date_display': payment.payment_date.strftime('%b %d, %Y %I:%M %p'),
+            'description': payment.description or 'N/A',
+            'recorded_by': payment.recorded_by.full_name if payment.recorded_by else 'System',
+        })
+
+    tds_rate = reference_data.tds_rate()
+    data = {
+        'id': load.id,
+        'load_id': load.load_id,
+        'trip_status': load.trip_status,
+        'trip_status_display': load.get_trip_status_display(),
+
+        'pickup_location': load.pickup_location,
+        'drop_location': load.drop_location,
+        'pickup_date': load.pickup_date.strftime('%b %d, %Y'),
+        'drop_date': load.drop_date.strftime('%b %d, %Y') if load.drop_date else 'TBD',
+        'time': load.time.strftime('%I:%M %p') if load.time else 'Not specified',
+
+        'vehicle_no': load.vehicle.reg_no if load.vehicle else 'Not Assigned',
+        'vehicle_type': load.vehicle_type.name,
+        'driver_name': load.driver.full_name if load.driver else 'Not Assigned',
+        'driver_phone': load.driver.phone_number if load.driver else 'N/A',
+
+        'customer_name': load.customer.customer_name,
+        'customer_phone': load.customer.phone_number,
+        'customer_location': load.customer.location or 'N/A',
+        'contact_person': load.contact_person_name or (load.customer.contacts.first().name if load.customer.contacts.exists() else 'N/A'),
+        'contact_person_phone': load.contact_person_phone or (load.customer.contacts.first().phone_number if load.customer.contacts.exists() else 'N/A'),
+
+        'vendor_name': load.driver.owner.full_name if load.driver and hasattr(load.driver, 'owner') and load.driver.owner else 'Not Assigned',
+        'vendor_phone': load.driver.owner.phone_number if load.driver and hasattr(load.driver, 'owner') and load.driver.owner else 'N/A',
+        
+        # Payment details
+        'price_per_unit': float(load.price_per_unit),
+        'holding_charges': float(load.holding_charges),
+        'holding_charges_list': holding_charges_list,
+        'total_amount': float(load.price_per_unit) + float(load.holding_charges),
+        'holding_charges_added_at': load.holding_charges_added_at.isoformat() if load.holding_charges_added_at else None,
+        'holding_charges_added_at_status': load.holding_charges_added_at_status or '',
+        'user_amount':float(load.user_amount or 0),
+        
+        # Payment details
+        'payments_list': payments_list,
+        'total_paid': float(load.total_paid),
+        'balance_due': float(load.balance_due),
+
+        # TDS Information - Applied to price_per_unit
+        'apply_tds': load.apply_tds,
+        'tds_rate': float(tds_rate),
+        'tds_amount': float((load.price_per_unit or Decimal('0')) * (tds_rate / Decimal('100'))) if load.apply_tds else 0,
+        'tds_deductible_amount': float((load.price_per_unit or Decimal('0')) - ((load.price_per_unit or Decimal('0')) * (tds_rate / Decimal('100')))) if load.apply_tds else float(load.price_per_unit or Decimal('0')),
+
+        'weight': load.weight or 'N/A',
+        'material': load.material or 'N/A',
+        'distance': 'Calculating...',
+        'current_location': load.current_location or 'N/A',
+        'current_location_updated_at': load.updated_at.strftime('%b %d, %Y %I:%M %p') if load.updated_at else '-',
+        'notes': load.notes or '',
+        
+
+        'progress': progress,
+        'comments': comments,
+
+        'created_at': load.created_at.strftime('%b %d, %Y %I:%M %p'),
+        'last_updated': load.updated_at.strftime('%b %d, %Y %I:%M %p'),
+        
+        # Show creator information for admin
+        'created_by_name': load.created_by.full_name if load.created_by else 'System',
+        'created_by_role': load.created_by.role if load.created_by else 'N/A',
+        
+        # LR Document
+        'lr_document': load.lr_document.url if load.lr_document else None,
+        'lr_document_name': load.lr_document.name if load.lr_document else None,
+        
+        # POD Document
+        'pod_document': load.pod_document.url if load.pod_document else None,
+        'pod_document_name': load.pod_document.name if load.pod_document else None,
+        
+        # All timestamps in ISO format for JavaScript parsing
+        'pending_at': load.created_at.isoformat() if load.created_at else None,
+        'assigned_at': load.assigned_at.isoformat() if load.assigned_at else None,
+        'loaded_at': load.loaded_at.isoformat() if load.loaded_at else None,
+        'lr_uploaded_at': load.lr_uploaded_at.isoformat() if load.lr_uploaded_at else None,
+        'in_transit_at': load.in_transit_at.isoformat() if load.in_transit_at else None,
+        'unloading_at': load.unloading_at.isoformat() if load.unloading_at else None,
+        'pod_uploaded_at': load.pod_uploaded_at.isoformat() if load.pod_uploaded_at else None,
+        'payment_completed_at': load.payment_completed_at.isoformat() if load.payment_completed_at else None,
+        'pod_received_at': load.pod_received_at.isoformat() if load.pod_received_at else None,
+        'hold_at': load.hold_at.isoformat() if load.hold_at else None,
+        'hold_reason': load.hold_reason or '',
+    }
+    return data
+
+
 @login_required
 @require_http_methods(["GET"])
 def get_trip_details_api(request, trip_id):
-    """API endpoint to get detailed trip information"""
+    """
+    API endpoint to get detailed trip information. Conditional GET: see
+    trip_etags.py, an unchanged trip costs one query.
+    """
     try:
         # Check user permissions before attempting to fetch
         # Admin/staff can access ANY trip
@@ -2177,173 +2243,33 @@ def get_trip_details_api(request, trip_id):
         
         if request.user.role == 'traffic_person' and not request.user.is_staff:
             # Strict permission: traffic person can only see trips they created
-            load = Load.objects.select_related(
-                'customer', 'driver', 'vehicle', 'vehicle_type', 'created_by', 'driver__owner'
-            ).get(id=trip_id, created_by=request.user)
+            loads = Load.objects.filter(created_by=request.user)
         elif request.user.is_staff or request.user.role == 'admin':
             # Admin/staff can access any trip
-            load = Load.objects.select_related(
-                'customer', 'driver', 'vehicle', 'vehicle_type', 'created_by', 'driver__owner'
-            ).get(id=trip_id)
+            loads = Load.objects.all()
         else:
             # User doesn't have permission to view trips
             return JsonResponse({
                 'success': False,
                 'error': 'You do not have permission to view trip details'
             }, status=403)
-        
-        # Progress mapping
-        status_progress = {
-            'trip_requested': 0,
-            'trip_confirmed': 7.7,
-            'reached_loading_point': 15.4,
-            'upload_lr': 23.1,
-            'in_transit': 30.8,
-            'reached_unloading_point': 38.5,
-            'unloading_completed': 46.2,
-            'pod_pending': 53.8,
-            'pod_received_at_office': 61.5,
-            'trip_closed': 100,
-        }
-        progress = status_progress.get(load.trip_status, 0)
-
-        # Payment status
-        final_payment_paid = load.trip_status == 'trip_closed'
-
-        # Get comments for this trip
-        comments = []
-        trip_comments = TripComment.objects.filter(load=load).select_related('sender').order_by('created_at')
-        for comment in trip_comments:
-            comments.append({
-                'id': comment.id,
-                'comment': comment.comment,
-                'sender_name': comment.sender.full_name,
-                'sender_type': comment.sender_type,
-                'created_at': comment.created_at.isoformat(),
-                'timestamp': comment.created_at.strftime('%b %d, %I:%M %p'),
-                'is_read': comment.is_read
-            })
-
-        # Get all holding charges with details
-        holding_charges_list = []
-        all_holding_charges = load.holding_charge_entries.all().order_by('created_at')
-        total_holding_charges = Decimal('0.00')
-        
-        for charge in all_holding_charges:
-            holding_charges_list.append({
-                'id': charge.id,
-                'amount': float(charge.amount),
-                'trip_stage': charge.trip_stage,
-                'trip_stage_display': dict(Load.TRIP_STATUS_CHOICES).get(charge.trip_stage, charge.trip_stage),
-                'reason': charge.reason,
-                'added_by': charge.added_by.full_name if charge.added_by else 'System',
-                'created_at': charge.created_at.isoformat(),
-                'created_at_display': charge.created_at.strftime('%b %d, %Y %I:%M %p')
-            })
-            total_holding_charges += charge.amount
-
-        # Get all payments for this trip
-        payments_list = []
-        all_payments = load.payments.all().select_related('recorded_by').order_by('-payment_date')
-        total_paid = Decimal('0.00')
-        
-        for payment in all_payments:
-            payments_list.append({
-                'id': payment.id,
-                'amount_paid': float(payment.amount_paid),
-                'payment_date': payment.payment_date.isoformat(),
-                'payment_date_display': payment.payment_date.strftime('%b %d, %Y %I:%M %p'),
-                'description': payment.description or 'N/A',
-                'recorded_by': payment.recorded_by.full_name if payment.recorded_by else 'System',
-            })
-            total_paid += payment.amount_paid
-
-        data = {
-            'id': load.id,
-            'load_id': load.load_id,
-            'trip_status': load.trip_status,
-            'trip_status_display': load.get_trip_status_display(),
-
-            'pickup_location': load.pickup_location,
-            'drop_location': load.drop_location,
-            'pickup_date': load.pickup_date.strftime('%b %d, %Y'),
-            'drop_date': load.drop_date.strftime('%b %d, %Y') if load.drop_date else 'TBD',
-            'time': load.time.strftime('%I:%M %p') if load.time else 'Not specified',
-
-            'vehicle_no': load.vehicle.reg_no if load.vehicle else 'Not Assigned',
-            'vehicle_type': load.vehicle_type.name,
-            'driver_name': load.driver.full_name if load.driver else 'Not Assigned',
-            'driver_phone': load.driver.phone_number if load.driver else 'N/A',
-
-            'customer_name': load.customer.customer_name,
-            'customer_phone': load.customer.phone_number,
-            'customer_location': load.customer.location or 'N/A',
-            'contact_person': load.contact_person_name or (load.customer.contacts.first().name if load.customer.contacts.exists() else 'N/A'),
-            'contact_person_phone': load.contact_person_phone or (load.customer.contacts.first().phone_number if load.customer.contacts.exists() else 'N/A'),
-
-            'vendor_name': load.driver.owner.full_name if load.driver and hasattr(load.driver, 'owner') and load.driver.owner else 'Not Assigned',
-            'vendor_phone': load.driver.owner.phone_number if load.driver and hasattr(load.driver, 'owner') and load.driver.owner else 'N/A',
-            
-            # Payment details
-            'price_per_unit': float(load.price_per_unit),
-            'holding_charges': float(total_holding_charges),
-            'holding_charges_list': holding_charges_list,
-            'total_amount': float(load.price_per_unit) + float(total_holding_charges),
-            'holding_charges_added_at': load.holding_charges_added_at.isoformat() if load.holding_charges_added_at else None,
-            'holding_charges_added_at_status': load.holding_charges_added_at_status or '',
-            'user_amount':float(load.user_amount or 0),
-            
-            # Payment details
-            'payments_list': payments_list,
-            'total_paid': float(total_paid),
-
-            # TDS Information - Applied to price_per_unit
-            'apply_tds': load.apply_tds,
-            'tds_rate': float(TDSRate.objects.first().rate if TDSRate.objects.exists() else 2.00),
-            'tds_amount': float((load.price_per_unit or Decimal('0')) * (Decimal(str(TDSRate.objects.first().rate if TDSRate.objects.exists() else 2.00)) / Decimal('100'))) if load.apply_tds else 0,
-            'tds_deductible_amount': float((load.price_per_unit or Decimal('0')) - ((load.price_per_unit or Decimal('0')) * (Decimal(str(TDSRate.objects.first().rate if TDSRate.objects.exists() else 2.00)) / Decimal('100')))) if load.apply_tds else float(load.price_per_unit or Decimal('0')),
-
-            'weight': load.weight or 'N/A',
-            'material': load.material or 'N/A',
-            'distance': 'Calculating...',
-            'current_location': load.current_location or 'N/A',
-            'current_location_updated_at': load.updated_at.strftime('%b %d, %Y %I:%M %p') if load.updated_at else '-',
-            'notes': load.notes or '',
-            
 
-            'progress': progress,
-            'comments': comments,
+        # Comments carry the viewer's read state, so the validator does too
+        validator = trip_etags.trip_validator(loads, trip_id, 'trip_details', viewer=request.user)
+        if validator is None:
+            raise Load.DoesNotExist
+        if trip_etags.is_not_modified(request, validator):
+            return trip_etags.not_modified(validator)
 
-            'created_at': load.created_at.strftime('%b %d, %Y %I:%M %p'),
-            'last_updated': load.updated_at.strftime('%b %d, %Y %I:%M %p'),
-            
-            # Show creator information for admin
-            'created_by_name': load.created_by.full_name if load.created_by else 'System',
-            'created_by_role': load.created_by.role if load.created_by else 'N/A',
-            
-            # LR Document
-            'lr_document': load.lr_document.url if load.lr_document else None,
-            'lr_document_name': load.lr_document.name if load.lr_document else None,
-            
-            # POD Document
-            'pod_document': load.pod_document.url if load.pod_document else None,
-            'pod_document_name': load.pod_document.name if load.pod_document else None,
-            
-            # All timestamps in ISO format for JavaScript parsing
-            'pending_at': load.created_at.isoformat() if load.created_at else None,
-            'assigned_at': load.assigned_at.isoformat() if load.assigned_at else None,
-            'loaded_at': load.loaded_at.isoformat() if load.loaded_at else None,
-            'lr_uploaded_at': load.lr_uploaded_at.isoformat() if load.lr_uploaded_at else None,
-            'in_transit_at': load.in_transit_at.isoformat() if load.in_transit_at else None,
-            'unloading_at': load.unloading_at.isoformat() if load.unloading_at else None,
-            'pod_uploaded_at': load.pod_uploaded_at.isoformat() if load.pod_uploaded_at else None,
-            'payment_completed_at': load.payment_completed_at.isoformat() if load.payment_completed_at else None,
-            'pod_received_at': load.pod_received_at.isoformat() if load.pod_received_at else None,
-            'hold_at': load.hold_at.isoformat() if load.hold_at else None,
-            'hold_reason': load.hold_reason or '',
-        }
+        data = trip_etags.cached_body(validator)
+        if data is None:
+            load = loads.select_related(
+                'customer', 'driver', 'vehicle', 'vehicle_type', 'created_by', 'driver__owner'
+            ).get(id=trip_id)
+            data = _trip_details_data(request, load)
+            trip_etags.cache_body(validator, data)
 
-        return JsonResponse({'success': True, 'data': data})
+        return trip_etags.with_validator(JsonResponse({'success': True, 'data': data}), validator)
 
     except Load.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Trip not found'}, status=404)
@@ -2718,32 +2644,33 @@ def add_trip_comment_api(request, trip_id):
         # Determine sender type
         sender_type = 'admin' if is_admin else 'vendor'
         
-        # Create comment
-        comment = TripComment.objects.create(
-            load=load,
-            sender=request.user,
-            sender_type=sender_type,
-            comment=comment_text
-        )
-        
-        # Send notification to the other party
-        if is_admin and load.driver and load.driver.owner:
-            # Admin commented, notify vendor
-            try:
-                from .notifications import send_trip_comment_notification
-                send_trip_comment_notification(
-                    vendor=load.driver.owner,
-                    load=load,
-                    comment=comment_text,
-                    commenter_name=request.user.full_name
-                )
-            except Exception as e:
-                print(f"Error sending comment notification: {e}")
-        elif is_vendor and load.created_by:
-            # Vendor commented, notify admin
-            # You might want to add a separate function for admin notifications
-            # For now, we'll just log it
-            print(f"Vendor {request.user.full_name} commented on load {load.load_id}")
+        with transaction.atomic():
+            # Create comment
+            comment = TripComment.objects.create(
+                load=load,
+                sender=request.user,
+                sender_type=sender_type,
+                comment=comment_text
+            )
+            
+            # Send notification to the other party (queued, sent after commit)
+            if is_admin and load.driver and load.driver.owner:
+                # Admin commented, notify vendor
+                try:
+                    from .notifications import send_trip_comment_notification
+                    send_trip_comment_notification(
+                        vendor=load.driver.owner,
+                        load=load,
+                        comment=comment_text,
+                        commenter_name=request.user.full_name
+                    )
+                except Exception as e:
+                    print(f"Error sending comment notification: {e}")
+            elif is_vendor and load.created_by:
+                # Vendor commented, notify admin
+                # You might want to add a separate function for admin notifications
+                # For now, we'll just log it
+                print(f"Vendor {request.user.full_name} commented on load {load.load_id}")
         
         return JsonResponse({
             'success': True,
@@ -2787,15 +2714,12 @@ def get_trip_comments_api(request, trip_id):
             return JsonResponse({'error': 'No permission to access this trip'}, status=403)
         
         # Get all comments for this load
-        comments = TripComment.objects.filter(load=load).select_related('sender').order_by('created_at')
+        comments = list(TripComment.objects.filter(load=load).select_related('sender').order_by('created_at'))
+        last_read = comment_reads.read_cursors(request.user.id, [load.id])[load.id]
         
-        # Mark unread comments as read for current user
-        TripComment.objects.filter(
-            load=load,
-            is_read=False
-        ).exclude(
-            sender=request.user
-        ).update(is_read=True)
+        # Mark the thread as read up to what we return, one upsert
+        if comments:
+            comment_reads.mark_thread_read(request.user.id, load.id, max(comment.id for comment in comments))
         
         comments_data = []
         for comment in comments:
@@ -2806,7 +2730,7 @@ def get_trip_comments_api(request, trip_id):
                 'comment': comment.comment,
                 'created_at': comment.created_at.isoformat(),
                 'timestamp': comment.created_at.strftime('%b %d, %I:%M %p'),
-                'is_read': comment.is_read
+                'is_read': comment_reads.is_read_for(comment, request.user.id, last_read)
             })
         
         return JsonResponse({
@@ -2840,13 +2764,8 @@ def get_unread_comments_count_api(request, trip_id):
         else:
             return JsonResponse({'error': 'No permission to access this trip'}, status=403)
         
-        # Count unread comments not sent by current user
-        unread_count = TripComment.objects.filter(
-            load=load,
-            is_read=False
-        ).exclude(
-            sender=request.user
-        ).count()
+        # Comments from others after this user's read cursor
+        unread_count = comment_reads.unread_counts(request.user.id, [load.id])[load.id]
         
         return JsonResponse({
             'success': True,
@@ -2859,6 +2778,34 @@ def get_unread_comments_count_api(request, trip_id):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
+@login_required
+@require_http_methods(["GET"])
+def get_unread_comments_counts_api(request):
+    """Unread comment counts for a page of trips: ?trip_ids=1,2,3"""
+    try:
+        try:
+            trip_ids = [int(trip_id) for trip_id in request.GET.get('trip_ids', '').split(',') if trip_id.strip()]
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid trip_ids'}, status=400)
+        trip_ids = trip_ids[:200]
+        
+        # Check permission
+        if request.user.role == 'traffic_person' and not request.user.is_staff:
+            trip_ids = list(Load.objects.filter(id__in=trip_ids, created_by=request.user).values_list('id', flat=True))
+        elif not (request.user.is_staff or request.user.role == 'admin'):
+            return JsonResponse({'error': 'No permission to access these trips'}, status=403)
+        
+        counts = comment_reads.unread_counts(request.user.id, trip_ids)
+        
+        return JsonResponse({
+            'success': True,
+            'unread_counts': {str(trip_id): count for trip_id, count in counts.items()}
+        })
+    
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
 @login_required
 @require_http_methods(["POST"])
 def close_trip_api(request, trip_id):
@@ -2984,128 +2931,138 @@ def payment_management(request):
         messages.error(request, "Access denied.")
         return redirect('admin_login')
 
-    # Fetch Payment records with related Load information
-    if request.user.role == 'traffic_person':
-        payments = Payment.objects.filter(
-            load__created_by=request.user
-        ).select_related(
-            'load', 'load__customer', 'load__driver', 'load__vehicle', 'load__vehicle_type', 'recorded_by'
-        ).order_by('-payment_date')
-    else:
-        payments = Payment.objects.all().select_related(
-            'load', 'load__customer', 'load__driver', 'load__vehicle', 'load__vehicle_type', 'recorded_by'
-        ).order_by('-payment_date')
+    # Payment records with related Load information, traffic person only
+    # sees payments of their own loads. First page only, the grid fetches
+    # the rest from payment_management_rows
+    page = grids.get_initial_page('payments', request)
+
+    return render(request, 'payment_management.html', {'payments': page['rows'], 'grid': grids.page_state(page)})
 
-    return render(request, 'payment_management.html', {'payments': payments})
+
+def _payment_details_data(load):
+    """Payload of get_payment_details_api"""
+    # Determine payment status
+    final_payment_paid = load.trip_status == 'trip_closed'
+
+    # Get payment dates
+    final_payment_date = None
+    if hasattr(load, 'payment_completed_at') and load.payment_completed_at:
+        final_payment_date = load.payment_completed_at.strftime('%b %d, %Y %I:%M %p')
+
+    # Get holding charges
+    holding_charges = load.get_total_holding_charges()
+    
+    # Get holding charges list
+    holding_charges_list = []
+    for charge in load.holding_charge_entries.all().order_by('-created_at'):
+        holding_charges_list.append({
+            'id': charge.id,
+            'amount': float(charge.amount),
+            'trip_stage': charge.trip_stage,
+            'trip_stage_display': charge.get_trip_stage_display(),
+            'reason': charge.reason,
+            'added_by': charge.added_by.full_name if charge.added_by else 'System',
+            'created_at': charge.created_at.strftime('%b %d, %Y %I:%M %p'),
+            'created_at_display': charge.created_at.strftime('%d %b %Y, %I:%M %p')
+        })
+
+    tds_rate = reference_data.tds_rate()
+    data = {
+        'id': load.id,
+        'load_id': load.load_id,
+        'trip_status': load.trip_status,
+        'trip_status_display': load.get_trip_status_display(),
+
+        'pickup_location': load.pickup_location,
+        'drop_location': load.drop_location,
+        'pickup_date': load.pickup_date.strftime('%b %d, %Y'),
+        'drop_date': load.drop_date.strftime('%b %d, %Y') if load.drop_date else 'TBD',
+
+        'vehicle_no': load.vehicle.reg_no if load.vehicle else 'Not Assigned',
+        'vehicle_type': load.vehicle_type.name,
+        'driver_name': load.driver.full_name if load.driver else 'Not Assigned',
+        'driver_phone': load.driver.phone_number if load.driver else 'N/A',
+
+        'customer_name': load.customer.customer_name,
+        'customer_phone': load.customer.phone_number,
+
+        'vendor_name': load.driver.owner.full_name if load.driver and hasattr(load.driver, 'owner') and load.driver.owner else 'Not Assigned',
+        'vendor_phone': load.driver.owner.phone_number if load.driver and hasattr(load.driver, 'owner') and load.driver.owner else 'N/A',
+
+        # Payment details
+        'price_per_unit': float(load.price_per_unit),
+        'total_amount': float(load.price_per_unit) + float(holding_charges),
+        'holding_charges': float(holding_charges),
+        'holding_charges_added_at': load.holding_charges_added_at.strftime('%b %d, %Y %I:%M %p') if load.holding_charges_added_at else None,
+        'holding_charges_added_at_status': load.holding_charges_added_at_status,
+        'holding_charges_list': holding_charges_list,
+        'final_payment_paid': final_payment_paid,
+        'final_payment_date': final_payment_date,
+
+        # TDS Information - Applied to price_per_unit
+        'apply_tds': load.apply_tds,
+        'tds_rate': float(tds_rate),
+        'tds_amount': float((load.price_per_unit or Decimal('0')) * (tds_rate / Decimal('100'))) if load.apply_tds else 0,
+        'tds_deductible_amount': float((load.price_per_unit or Decimal('0')) - ((load.price_per_unit or Decimal('0')) * (tds_rate / Decimal('100')))) if load.apply_tds else float(load.price_per_unit or Decimal('0')),
+
+        # Show creator information for admin
+        'created_by_name': load.created_by.full_name if load.created_by else 'System',
+        'created_by_role': load.created_by.role if load.created_by else 'N/A',
+
+        'notes': load.notes or 'No notes available',
+        'created_at': load.created_at.strftime('%b %d, %Y %I:%M %p'),
+        'last_updated': load.updated_at.strftime('%b %d, %Y %I:%M %p'),
+    }
+    
+    # Get payment records from Payment model
+    payment_records = []
+    for payment in load.payments.all().order_by('-payment_date'):
+        # Time is already stored in IST, no conversion needed
+        payment_records.append({
+            'id': payment.id,
+            'amount_paid': float(payment.amount_paid),
+            'payment_date': payment.payment_date.strftime('%d %b %Y'),
+            'payment_time': payment.payment_date.strftime('%I:%M %p'),
+            'payment_datetime': payment.payment_date.strftime('%d %b %Y, %I:%M %p'),
+            'description': payment.description,
+            'recorded_by': payment.recorded_by.full_name if payment.recorded_by else 'System'
+        })
+    
+    data['payment_records'] = payment_records
+    return data
 
 
 @login_required
 @require_http_methods(["GET"])
 def get_payment_details_api(request, trip_id):
-    """API endpoint to get detailed payment information for a trip"""
+    """
+    API endpoint to get detailed payment information for a trip.
+    Conditional GET: see trip_etags.py, an unchanged trip costs one query.
+    """
     try:
         # Admin can access any payment, traffic person only their own
         if request.user.role == 'traffic_person':
-            load = Load.objects.select_related(
-                'customer', 'driver', 'vehicle', 'vehicle_type', 'created_by', 
-                'driver__owner'
-            ).get(id=trip_id, created_by=request.user)
+            loads = Load.objects.filter(created_by=request.user)
         else:
             # Admin can access any payment
-            load = Load.objects.select_related(
-                'customer', 'driver', 'vehicle', 'vehicle_type', 'created_by', 
-                'driver__owner', 
-            ).get(id=trip_id)
-        
-        # Determine payment status
-        final_payment_paid = load.trip_status == 'trip_closed'
-
-        # Get payment dates
-        final_payment_date = None
-        if hasattr(load, 'payment_completed_at') and load.payment_completed_at:
-            final_payment_date = load.payment_completed_at.strftime('%b %d, %Y %I:%M %p')
+            loads = Load.objects.all()
 
-        # Get holding charges
-        holding_charges = load.get_total_holding_charges()
-        
-        # Get holding charges list
-        holding_charges_list = []
-        for charge in load.holding_charge_entries.all().order_by('-created_at'):
-            holding_charges_list.append({
-                'id': charge.id,
-                'amount': float(charge.amount),
-                'trip_stage': charge.trip_stage,
-                'trip_stage_display': charge.get_trip_stage_display(),
-                'reason': charge.reason,
-                'added_by': charge.added_by.full_name if charge.added_by else 'System',
-                'created_at': charge.created_at.strftime('%b %d, %Y %I:%M %p'),
-                'created_at_display': charge.created_at.strftime('%d %b %Y, %I:%M %p')
-            })
+        validator = trip_etags.trip_validator(loads, trip_id, 'payment_details')
+        if validator is None:
+            raise Load.DoesNotExist
+        if trip_etags.is_not_modified(request, validator):
+            return trip_etags.not_modified(validator)
 
-        data = {
-            'id': load.id,
-            'load_id': load.load_id,
-            'trip_status': load.trip_status,
-            'trip_status_display': load.get_trip_status_display(),
-
-            'pickup_location': load.pickup_location,
-            'drop_location': load.drop_location,
-            'pickup_date': load.pickup_date.strftime('%b %d, %Y'),
-            'drop_date': load.drop_date.strftime('%b %d, %Y') if load.drop_date else 'TBD',
-
-            'vehicle_no': load.vehicle.reg_no if load.vehicle else 'Not Assigned',
-            'vehicle_type': load.vehicle_type.name,
-            'driver_name': load.driver.full_name if load.driver else 'Not Assigned',
-            'driver_phone': load.driver.phone_number if load.driver else 'N/A',
-
-            'customer_name': load.customer.customer_name,
-            'customer_phone': load.customer.phone_number,
-
-            'vendor_name': load.driver.owner.full_name if load.driver and hasattr(load.driver, 'owner') and load.driver.owner else 'Not Assigned',
-            'vendor_phone': load.driver.owner.phone_number if load.driver and hasattr(load.driver, 'owner') and load.driver.owner else 'N/A',
-
-            # Payment details
-            'price_per_unit': float(load.price_per_unit),
-            'total_amount': float(load.price_per_unit) + float(holding_charges),
-            'holding_charges': float(holding_charges),
-            'holding_charges_added_at': load.holding_charges_added_at.strftime('%b %d, %Y %I:%M %p') if load.holding_charges_added_at else None,
-            'holding_charges_added_at_status': load.holding_charges_added_at_status,
-            'holding_charges_list': holding_charges_list,
-            'final_payment_paid': final_payment_paid,
-            'final_payment_date': final_payment_date,
-
-            # TDS Information - Applied to price_per_unit
-            'apply_tds': load.apply_tds,
-            'tds_rate': float(TDSRate.objects.first().rate if TDSRate.objects.exists() else 2.00),
-            'tds_amount': float((load.price_per_unit or Decimal('0')) * (Decimal(str(TDSRate.objects.first().rate if TDSRate.objects.exists() else 2.00)) / Decimal('100'))) if load.apply_tds else 0,
-            'tds_deductible_amount': float((load.price_per_unit or Decimal('0')) - ((load.price_per_unit or Decimal('0')) * (Decimal(str(TDSRate.objects.first().rate if TDSRate.objects.exists() else 2.00)) / Decimal('100')))) if load.apply_tds else float(load.price_per_unit or Decimal('0')),
-
-            # Show creator information for admin
-            'created_by_name': load.created_by.full_name if load.created_by else 'System',
-            'created_by_role': load.created_by.role if load.created_by else 'N/A',
-
-            'notes': load.notes or 'No notes available',
-            'created_at': load.created_at.strftime('%b %d, %Y %I:%M %p'),
-            'last_updated': load.updated_at.strftime('%b %d, %Y %I:%M %p'),
-        }
-        
-        # Get payment records from Payment model
-        payment_records = []
-        for payment in load.payments.all().order_by('-payment_date'):
-            # Time is already stored in IST, no conversion needed
-            payment_records.append({
-                'id': payment.id,
-                'amount_paid': float(payment.amount_paid),
-                'payment_date': payment.payment_date.strftime('%d %b %Y'),
-                'payment_time': payment.payment_date.strftime('%I:%M %p'),
-                'payment_datetime': payment.payment_date.strftime('%d %b %Y, %I:%M %p'),
-                'description': payment.description,
-                'recorded_by': payment.recorded_by.full_name if payment.recorded_by else 'System'
-            })
-        
-        data['payment_records'] = payment_records
+        data = trip_etags.cached_body(validator)
+        if data is None:
+            load = loads.select_related(
+                'customer', 'driver', 'vehicle', 'vehicle_type', 'created_by', 
+                'driver__owner'
+            ).get(id=trip_id)
+            data = _payment_details_data(load)
+            trip_etags.cache_body(validator, data)
 
-        return JsonResponse({'success': True, 'data': data})
+        return trip_etags.with_validator(JsonResponse({'success': True, 'data': data}), validator)
 
     except Load.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Payment record not found'}, status=404)
@@ -3540,8 +3497,8 @@ def delete_holding_charge_api(request, charge_id):
         # Delete the charge
         holding_charge.delete()
         
-        # Update load's total holding charges
-        load.update_holding_charges_total()
+        # Re-read the load's totals, the delete moved them (signals.py)
+        load.refresh_money_totals()
         
         # Get updated charges list
         all_charges = load.holding_charge_entries.all().order_by('created_at')
@@ -3845,8 +3802,8 @@ def edit_load(request, load_id):
             messages.error(request, "You don't have permission to edit this load.")
             return redirect('load_list')
         
-        customers = Customer.objects.filter(is_active=True).order_by('customer_name')
-        vehicle_types = VehicleType.objects.all().order_by('name')
+        customers = reference_data.active_customers()
+        vehicle_types = reference_data.vehicle_types()
         
         context = {
             'load': load,
@@ -4101,7 +4058,7 @@ def edit_driver(request, driver_id):
     
     try:
         driver = Driver.objects.get(id=driver_id, created_by=request.user)
-        vendors = CustomUser.objects.filter(role='vendor', is_active=True).order_by('full_name')
+        vendors = reference_data.active_vendors()
         
         context = {
             'driver': driver,
@@ -4220,7 +4177,7 @@ def edit_vehicle(request, vehicle_id):
     
     try:
         vehicle = Vehicle.objects.get(id=vehicle_id)
-        vendors = CustomUser.objects.filter(role='vendor', is_active=True).order_by('full_name')
+        vendors = reference_data.active_vendors()
         
         context = {
             'vehicle': vehicle,
@@ -4626,11 +4583,16 @@ def update_vendor(request, vendor_id):
 def get_vendors_list(request):
     """Get list of all vendors for assignment"""
     try:
-        vendors = CustomUser.objects.filter(role='vendor', is_active=True).values(
-            'id', 'full_name', 'email', 'phone_number', 'address'
-        )
-        
-        vendors_list = list(vendors)
+        vendors_list = [
+            {
+                'id': vendor.id,
+                'full_name': vendor.full_name,
+                'email': vendor.email,
+                'phone_number': vendor.phone_number,
+                'address': vendor.address,
+            }
+            for vendor in reference_data.active_vendors()
+        ]
         return JsonResponse({
             'success': True,
             'vendors': vendors_list
@@ -4924,32 +4886,36 @@ def pod_management(request):
         messages.error(request, "Access denied.")
         return redirect('admin_login')
 
-    # Show all trips with these statuses for sidebar slider
-    pod_statuses = [
-        'unloading_completed',
-        'pod_pending',
-        'pod_received_at_office',
-        'trip_closed',
-    ]
-
-    if request.user.role == 'traffic_person':
-        loads = Load.objects.filter(
-            created_by=request.user,
-            trip_status__in=pod_statuses
-        )
-    else:
-        loads = Load.objects.filter(trip_status__in=pod_statuses)
-
-    loads = loads.select_related(
-        'customer', 'driver', 'vehicle', 'vehicle_type', 'created_by'
-    ).order_by('-created_at')
+    # Trips from unloading_completed onwards. First page only, the grid
+    # fetches the rest from pod_management_rows
+    page = grids.get_initial_page('pods', request)
 
     context = {
-        'loads': loads,
+        'loads': page['rows'],
+        'grid': grids.page_state(page),
     }
     return render(request, 'pod_management.html', context)
 
 
+@login_required
+@require_GET
+def grid_rows(request, grid):
+    """One page of an admin grid as rendered rows (load list, trips, payments, PODs), see grids.py"""
+    if not (request.user.is_staff or request.user.role == 'admin' or request.user.role == 'traffic_person'):
+        return JsonResponse({'success': False, 'error': 'Access denied.'}, status=403)
+
+    try:
+        page = grids.get_page(grid, request)
+    except grids.GridError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'html': grids.render_rows(grid, request, page['rows']),
+        **grids.page_state(page),
+    })
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def update_pod_status(request, trip_id):
@@ -91,6 +91,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'rotra_logistics.wsgi.application'
+ASGI_APPLICATION = 'rotra_logistics.asgi.application'
 
 
 # Database
@@ -196,6 +197,48 @@ STATICFILES_DIRS = [
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ================================================================
+# CACHE
+# ================================================================
+# Dashboard counts and other cached API data must be shared by all workers,
+# so point this at Redis in production. Falls back to per-process memory.
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Channel layer for the real-time trip WebSockets (logistics_app/realtime.py).
+# Redis in production so every ASGI worker and Celery sees the same groups,
+# in-memory (single process only) for local development and tests.
+CHANNEL_REDIS_URL = os.getenv('CHANNEL_REDIS_URL')
+
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [CHANNEL_REDIS_URL],
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
 # ================================================================
 # CELERY CONFIGURATION
 # ================================================================
@@ -217,6 +260,25 @@ CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 
+# Retention of the monthly Notification / TripComment partitions (PostgreSQL,
+# see logistics_app/partitions.py). Older partitions are detached, or dropped
+# if PARTITION_RETENTION_DROP is set.
+NOTIFICATION_RETENTION_MONTHS = int(os.getenv('NOTIFICATION_RETENTION_MONTHS', 12))
+TRIP_COMMENT_RETENTION_MONTHS = int(os.getenv('TRIP_COMMENT_RETENTION_MONTHS', 24))
+PARTITION_RETENTION_DROP = os.getenv('PARTITION_RETENTION_DROP', 'False').lower() == 'true'
+
+# SLA per trip stage, in hours spent in that status before moving on
+# (see logistics_app/trip_analytics.py). Stages not listed have no SLA.
+TRIP_STAGE_SLA_HOURS = {
+    'trip_confirmed': 24,
+    'reached_loading_point': 12,
+    'upload_lr': 6,
+    'reached_unloading_point': 12,
+    'unloading_completed': 48,
+    'pod_pending': 168,
+    'pod_received_at_office': 168,
+}
+
 # Celery Beat Schedule (Periodic Tasks)
 from celery.schedules import crontab
 
@@ -226,6 +288,32 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': crontab(hour=2, minute=0),  # Run daily at 2:00 AM UTC
         'args': (2,)  # Delete loads older than 2 days
     },
+    'prune-sync-tombstones': {
+        'task': 'logistics_app.tasks.prune_sync_tombstones',
+        'schedule': crontab(hour=3, minute=0),  # Run daily at 3:00 AM UTC
+        'args': (30,)  # Keep in step with api_app.sync.TOMBSTONE_RETENTION_DAYS
+    },
+    'reconcile-kpi-counters': {
+        'task': 'logistics_app.tasks.reconcile_kpi_counters',
+        'schedule': crontab(minute='*/30'),  # Every 30 minutes
+    },
+    'dispatch-push-notifications': {
+        'task': 'logistics_app.tasks.dispatch_push_notifications',
+        'schedule': crontab(),  # Every minute, picks up retries
+    },
+    'prune-push-outbox': {
+        'task': 'logistics_app.tasks.prune_push_outbox',
+        'schedule': crontab(hour=3, minute=30),  # Run daily at 3:30 AM UTC
+        'args': (7,)
+    },
+    'maintain-partitions': {
+        'task': 'logistics_app.tasks.maintain_partitions',
+        'schedule': crontab(hour=4, minute=0),  # Run daily at 4:00 AM UTC
+    },
+    'prune-load-filter-options': {
+        'task': 'logistics_app.tasks.prune_load_filter_options',
+        'schedule': crontab(hour=4, minute=30),  # Run daily at 4:30 AM UTC
+    },
 }
 
 # ================================================================
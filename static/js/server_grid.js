@@ -0,0 +1,168 @@
+/*
+ * Server-side paging for the admin grids (logistics_app/grids.py).
+ *
+ * The page renders the first page of rows. This fetches the others from
+ * the grid's rows endpoint when the user pages, searches, filters or
+ * sorts, and replaces the table body with the rendered rows.
+ *
+ * Pages are keyset pages: each response carries the cursor of the next
+ * page, the cursors of the pages seen so far are kept for "Previous".
+ *
+ * Uses the shared pagination controls (#searchInput, #entriesPerPage,
+ * #prevPage, #nextPage, #showingStart, #showingEnd, #totalEntries,
+ * #currentPageInfo) and the grid state rendered with json_script.
+ * Sortable headers have data-sort="<field>".
+ */
+class ServerGrid {
+  constructor(options) {
+    this.url = options.url;
+    this.tbody = options.tbody;
+    this.filters = options.filters || (() => ({}));
+    this.onRender = options.onRender || (() => {});
+
+    const state = JSON.parse(document.getElementById(options.stateId || 'gridState').textContent);
+    this.pageSize = state.page_size;
+    this.sort = state.sort;
+    this.cursors = [null];
+    this.requestSeq = 0;
+    this.searchTimer = null;
+    this.applyState(state);
+
+    this.controls = {
+      search: document.getElementById('searchInput'),
+      entries: document.getElementById('entriesPerPage'),
+      prev: document.getElementById('prevPage'),
+      next: document.getElementById('nextPage'),
+      showingStart: document.getElementById('showingStart'),
+      showingEnd: document.getElementById('showingEnd'),
+      total: document.getElementById('totalEntries'),
+      pageInfo: document.getElementById('currentPageInfo'),
+    };
+    this.bindControls(options.table || this.tbody.closest('table'));
+    this.updateControls();
+  }
+
+  applyState(state) {
+    this.count = state.count;
+    this.nextCursor = state.next_cursor;
+    this.hasMore = state.has_more;
+    if (state.total !== null && state.total !== undefined) {
+      this.total = state.total;
+    }
+  }
+
+  bindControls(table) {
+    const { search, entries, prev, next } = this.controls;
+
+    if (entries) {
+      entries.value = String(this.pageSize);
+      entries.addEventListener('change', () => {
+        this.pageSize = parseInt(entries.value, 10);
+        this.reload();
+      });
+    }
+
+    if (search) {
+      search.addEventListener('input', () => {
+        clearTimeout(this.searchTimer);
+        this.searchTimer = setTimeout(() => this.reload(), 300);
+      });
+    }
+
+    prev?.addEventListener('click', () => {
+      if (this.cursors.length > 1) {
+        this.cursors.pop();
+        this.fetchPage(this.cursors[this.cursors.length - 1]);
+      }
+    });
+
+    next?.addEventListener('click', () => {
+      if (this.hasMore && this.nextCursor) {
+        this.cursors.push(this.nextCursor);
+        this.fetchPage(this.nextCursor);
+      }
+    });
+
+    table?.querySelectorAll('th[data-sort]').forEach(th => {
+      th.style.cursor = 'pointer';
+      th.addEventListener('click', () => {
+        const field = th.dataset.sort;
+        this.sort = this.sort === `-${field}` ? field : `-${field}`;
+        this.reload();
+      });
+    });
+    this.table = table;
+  }
+
+  params(cursor, withTotal) {
+    const params = new URLSearchParams({ page_size: this.pageSize, sort: this.sort });
+    const term = this.controls.search ? this.controls.search.value.trim() : '';
+    if (term) params.set('q', term);
+    Object.entries(this.filters()).forEach(([key, value]) => {
+      if (value && value !== 'all') params.set(key, value);
+    });
+    if (cursor) params.set('cursor', cursor);
+    if (withTotal && cursor) params.set('total', '1');
+    return params;
+  }
+
+  fetchPage(cursor, withTotal = false) {
+    const seq = ++this.requestSeq;
+    this.tbody.style.opacity = '0.5';
+
+    return fetch(`${this.url}?${this.params(cursor, withTotal)}`, {
+      headers: { 'Accept': 'application/json' },
+      credentials: 'same-origin'
+    })
+    .then(response => response.json())
+    .then(data => {
+      // A newer request (typing, fast paging) wins
+      if (seq !== this.requestSeq) return;
+      if (!data.success) throw new Error(data.error || 'Failed to load rows');
+
+      this.tbody.innerHTML = data.html;
+      this.sort = data.sort;
+      this.applyState(data);
+      this.updateControls();
+      this.onRender(this.tbody);
+    })
+    .catch(error => {
+      if (seq !== this.requestSeq) return;
+      console.error('Error loading rows:', error);
+    })
+    .finally(() => {
+      if (seq === this.requestSeq) this.tbody.style.opacity = '';
+    });
+  }
+
+  // Back to the first page, e.g. after a search, filter or sort change
+  reload() {
+    this.cursors = [null];
+    return this.fetchPage(null);
+  }
+
+  // Same page again with a fresh total, e.g. after a row was removed
+  refresh() {
+    return this.fetchPage(this.cursors[this.cursors.length - 1], true);
+  }
+
+  updateControls() {
+    const { prev, next, showingStart, showingEnd, total, pageInfo } = this.controls;
+    const page = this.cursors.length;
+    const start = (page - 1) * this.pageSize;
+
+    if (showingStart) showingStart.textContent = this.count ? start + 1 : 0;
+    if (showingEnd) showingEnd.textContent = start + this.count;
+    if (total) total.textContent = this.total ?? 0;
+    if (pageInfo) pageInfo.textContent = `Page ${page}`;
+    if (prev) prev.disabled = page === 1;
+    if (next) next.disabled = !this.hasMore;
+
+    this.table?.querySelectorAll('th[data-sort]').forEach(th => {
+      const field = th.dataset.sort;
+      th.dataset.sortDir = this.sort === field ? 'asc' : this.sort === `-${field}` ? 'desc' : '';
+      const arrow = th.dataset.sortDir === 'asc' ? ' ▲' : th.dataset.sortDir === 'desc' ? ' ▼' : '';
+      th.textContent = th.textContent.replace(/ [▲▼]$/, '') + arrow;
+    });
+  }
+}